@@ -1,43 +1,159 @@
+from utils import startup  # first, so the report covers every import below
+
 import argparse
-import sys
 
-# Import exercise runners
-from exercises.pushup import run as run_pushup
-from exercises.standing_cable_press import run as run_press
-from exercises.bicep_curl import bicep_curl_run   # bicep_curl runs directly on cap loop
-from exercises.squat import run as run_squat
+# The registry imports an exercise's module (and MediaPipe) only once it is chosen
+from exercises.registry import exercise_names
+from utils import pose_backend
+from utils.pose_backend import BACKENDS
 
 
 def main():
     parser = argparse.ArgumentParser(description="AI Gym Trainer")
     parser.add_argument(
         "--exercise", "-e",
-        choices=["pushup", "press", "curl", "squat"],
+        choices=exercise_names(),
         required=True,
-        help="Choose exercise: pushup | press | curl | squat"
+        help="Choose exercise: " + " | ".join(exercise_names())
     )
     parser.add_argument(
         "--src", default="0",
         help="0 for webcam, or path/URL to video file"
     )
+    parser.add_argument(
+        "--batch", nargs="+", metavar="PATH",
+        help="Headless mode: analyse recorded videos (files or directories) and exit"
+    )
+    parser.add_argument(
+        "--out", default=None,
+        help="Batch mode: directory for annotated output videos (skipped if not set)"
+    )
+    parser.add_argument(
+        "--report", default=None,
+        help="Batch mode: write per-video reps and feedback timelines to this JSON file"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Batch mode: worker processes, one video each at a time (0 = all CPU cores)"
+    )
+    parser.add_argument(
+        "--cache", default=None, metavar="DIR",
+        help="Batch mode: landmark cache; re-runs of cached videos skip pose inference"
+    )
+    parser.add_argument(
+        "--dataset", default=None, metavar="DIR",
+        help="Batch mode (with --cache): also append every analysed video's landmarks to this "
+             "memory-mapped landmark store"
+    )
+    parser.add_argument(
+        "--roi", type=int, default=None, metavar="SIZE",
+        help="Run pose inference on a tracked person crop scaled to SIZE px "
+             "(e.g. 256) instead of the whole frame; helps on wide-angle cameras"
+    )
+    parser.add_argument(
+        "--processes", action="store_true",
+        help="Live mode: decode and run pose in separate processes (frames shared, not copied), "
+             "to spread one high-resolution camera over several cores"
+    )
+    parser.add_argument(
+        "--people", type=int, default=None, metavar="N",
+        help="Group mode: track and score up to N people in the feed, each with their own rep count"
+    )
+    parser.add_argument(
+        "--pose-backend", default=None, choices=sorted(BACKENDS),
+        help="Pose estimator: mediapipe (default), replay (landmarks from --cache for --src), "
+             "synthetic (stick-figure landmarks, no camera model)"
+    )
+    parser.add_argument(
+        "--model-complexity", type=int, choices=[0, 1, 2], default=None,
+        help="MediaPipe tier: 0 lite (weak CPUs), 1 full (default), 2 heavy"
+    )
+    parser.add_argument(
+        "--analytics", default=None, metavar="DIR",
+        help="Log per-frame angles, form flags and reps of the live session to DIR for history charts"
+    )
+    parser.add_argument(
+        "--profile", default=None, metavar="FILE",
+        help="Record per-stage frame latency (p50/p95/p99) and write it to FILE (.json or .csv)"
+    )
+    parser.add_argument(
+        "--overlay", action="store_true",
+        help="With --profile: draw the live latency table on the video"
+    )
+    parser.add_argument(
+        "--startup-report", action="store_true",
+        help="Print how long imports, model loading and the first frame took (or set STARTUP_REPORT=1)"
+    )
     args = parser.parse_args()
+    if args.analytics and (args.people or args.batch):
+        parser.error("--analytics logs the single-person live session (not with --people or --batch)")
+    if args.pose_backend == "replay" and args.batch:
+        parser.error("--pose-backend replay plays one --src; batch runs replay through --cache")
+    if args.profile and args.batch:
+        parser.error("--profile records the live loop (batch reports carry their own throughput)")
+    startup.mark("imports + args")
 
     try:
         src = int(args.src)
     except ValueError:
         src = args.src
 
-    if args.exercise == "pushup":
-        run_pushup(src)
-    elif args.exercise == "press":
-        run_press(src)
-    elif args.exercise == "curl":
-        bicep_curl_run()  # directly executes its loop
-    elif args.exercise == "squat":
-        run_squat(src)
-    else:
-        print("Invalid choice. Use -h for help.")
-        sys.exit(1)
+    pose_cfg = pose_backend.configure(
+        backend=args.pose_backend or pose_backend.DEFAULT.backend,
+        model_complexity=(pose_backend.DEFAULT.model_complexity if args.model_complexity is None
+                          else args.model_complexity),
+        options={'exercise': args.exercise, 'cache_dir': args.cache, 'video': src},
+    )
+
+    show_startup = args.startup_report or startup.enabled()
+
+    if args.batch:
+        if args.dataset and not args.cache:
+            parser.error("--dataset needs --cache (sessions are packed from the landmark cache)")
+        from utils.pipeline import BatchConfig, run_batch
+        startup.mark("import pipeline")
+        try:
+            run_batch(args.batch, args.exercise,
+                      BatchConfig(out_dir=args.out, report_path=args.report,
+                                  cache_dir=args.cache, dataset_dir=args.dataset,
+                                  roi_size=args.roi,
+                                  pose_backend=pose_cfg.backend,
+                                  model_complexity=pose_cfg.model_complexity),
+                      workers=args.workers)
+        finally:
+            if show_startup:
+                startup.print_report()
+        return
+
+    profiler = None
+    if args.profile:
+        from utils.profiling import StageProfiler
+        profiler = StageProfiler(overlay=args.overlay)
+
+    store = log = None
+    if args.analytics:
+        from utils.analytics import AnalyticsStore
+        store = AnalyticsStore(args.analytics)
+        log = store.open("desktop", args.exercise, src=str(src))
+
+    try:
+        if args.people:
+            from utils.multi_person import run as run_group
+            startup.mark("import multi_person")
+            run_group(src, args.exercise, max_people=args.people, profiler=profiler)
+        else:
+            from exercises.runner import run
+            run(args.exercise, src, profiler=profiler, roi_size=args.roi, log=log,
+                processes=args.processes)
+    finally:
+        if store is not None:
+            store.close()
+            print(f"Session log written to {log.path}")
+        if profiler is not None:
+            profiler.dump(args.profile)
+            print(f"Stage latency written to {args.profile}")
+        if show_startup:
+            startup.print_report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,215 @@
+"""
+Reproducible evaluator benchmark
+Runs every exercise evaluator over synthetic landmark sessions (and,
+optionally, labelled local clips through the full batch pipeline) and
+records frames/sec, per-stage latency, peak RSS and rep-count accuracy.
+
+    python -m benchmarks.bench_evaluators
+    python -m benchmarks.bench_evaluators --clips clips/ --out before.json
+    python -m benchmarks.bench_evaluators --compare before.json
+
+Clips need a labels.json next to them:
+    {"squat_01.mp4": {"exercise": "squat", "reps": 12}, ...}
+
+Synthetic cases run twice: evaluate + render, and evaluate only ('/headless').
+Each case runs in a fresh process so peak RSS is per case.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.landmark_cache import array_to_landmarks
+from exercises.registry import EXERCISES, create_evaluator
+from utils.pipeline import BatchConfig, process_video
+from utils.profiling import StageProfiler
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0, 1)
+
+
+def _accuracy(expected: int, counted: int) -> Dict[str, Any]:
+    return {
+        'reps_expected': expected,
+        'reps_counted': counted,
+        'rep_error': counted - expected,
+        'rep_accuracy': round(1.0 - min(1.0, abs(counted - expected) / max(1, expected)), 3),
+    }
+
+
+# =========================
+# Cases (each runs in its own process)
+# =========================
+def bench_synthetic(exercise: str, reps: int, fps: float, noise_px: float, seed: int,
+                    render: bool = True) -> Dict[str, Any]:
+    landmarks, timestamps_ms = synthetic_session(exercise, reps=reps, fps=fps,
+                                                 noise_px=noise_px, seed=seed)
+    evaluator = create_evaluator(exercise)
+    w, h = FRAME_SIZE
+    evaluator.frame_size = FRAME_SIZE
+    canvas = np.zeros((h, w, 3), dtype=np.uint8)
+    prof = StageProfiler(window=len(landmarks))
+
+    start = time.perf_counter()
+    for i in range(len(landmarks)):
+        prof.start()
+        lms = array_to_landmarks(landmarks[i])
+        prof.mark('unpack')
+        result = evaluator.update(lms, timestamps_ms[i] / 1000.0)
+        prof.mark('evaluate')
+        if render:
+            evaluator.render(canvas, lms, result)
+            prof.mark('render')
+        prof.end()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'name': f"synthetic/{exercise}" + ('' if render else '/headless'),
+        'exercise': exercise,
+        'frames': len(landmarks),
+        'elapsed_s': round(elapsed, 4),
+        'fps': round(len(landmarks) / elapsed, 1),
+        'stages': prof.summary(),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    result.update(_accuracy(reps, evaluator.state()['reps']))
+    return result
+
+
+def bench_clip(path: str, exercise: str, reps: int) -> Dict[str, Any]:
+    report = process_video(path, exercise, BatchConfig())
+    result = {
+        'name': f"clip/{os.path.basename(path)}",
+        'exercise': exercise,
+        'frames': report.frames,
+        'elapsed_s': round(report.elapsed_s, 4),
+        'fps': round(report.fps, 1),
+        'error': report.error,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    result.update(_accuracy(reps, report.reps))
+    return result
+
+
+def _run_case(isolate: bool, fn, *args) -> Dict[str, Any]:
+    if not isolate:
+        return fn(*args)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(fn, *args).result()
+
+
+# =========================
+# Reporting
+# =========================
+def machine_info() -> Dict[str, Any]:
+    info = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+    }
+    try:
+        import cv2
+        info['opencv'] = cv2.__version__
+    except ImportError:
+        pass
+    try:
+        import mediapipe
+        info['mediapipe'] = mediapipe.__version__
+    except (ImportError, AttributeError):
+        pass
+    try:
+        info['commit'] = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['commit'] = None
+    return info
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict]] = None):
+    print(f"{'case':<28}{'fps':>10}{'p95 ms':>9}{'rss MB':>9}{'reps':>9}  {'vs baseline'}")
+    for r in results:
+        p95 = r.get('stages', {}).get('total', {}).get('p95_ms', float('nan'))
+        reps = f"{r['reps_counted']}/{r['reps_expected']}"
+        delta = ''
+        if baseline and r['name'] in baseline:
+            old = baseline[r['name']]
+            if old.get('fps'):
+                delta = f"fps {100.0 * (r['fps'] - old['fps']) / old['fps']:+.1f}%"
+            if old.get('reps_counted') != r['reps_counted']:
+                delta += f"  reps {old.get('reps_counted')} -> {r['reps_counted']}"
+        rss = r['peak_rss_mb'] if r['peak_rss_mb'] is not None else float('nan')
+        print(f"{r['name']:<28}{r['fps']:>10.1f}{p95:>9.3f}{rss:>9.1f}{reps:>9}  {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the exercise evaluators")
+    parser.add_argument('--exercises', nargs='+', default=list(EXERCISES), choices=list(EXERCISES))
+    parser.add_argument('--reps', type=int, default=20, help="Reps per synthetic session")
+    parser.add_argument('--fps', type=float, default=30.0, help="Frame rate of synthetic sessions")
+    parser.add_argument('--noise', type=float, default=1.0, help="Landmark jitter in pixels")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--clips', default=None, help="Directory of clips with a labels.json")
+    parser.add_argument('--out', default=None, help="Results JSON (default bench_results/<commit>-<time>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results JSON to diff against")
+    parser.add_argument('--no-isolate', action='store_true', help="Run all cases in this process")
+    args = parser.parse_args()
+    isolate = not args.no_isolate
+
+    results = []
+    for exercise in args.exercises:
+        results.append(_run_case(isolate, bench_synthetic, exercise, args.reps, args.fps,
+                                 args.noise, args.seed))
+        results.append(_run_case(isolate, bench_synthetic, exercise, args.reps, args.fps,
+                                 args.noise, args.seed, False))
+
+    if args.clips:
+        with open(os.path.join(args.clips, 'labels.json')) as f:
+            labels = json.load(f)
+        for name, label in sorted(labels.items()):
+            if label['exercise'] not in args.exercises:
+                continue
+            results.append(_run_case(isolate, bench_clip, os.path.join(args.clips, name),
+                                     label['exercise'], int(label['reps'])))
+
+    meta = machine_info()
+    meta['settings'] = {'reps': args.reps, 'fps': args.fps, 'noise_px': args.noise,
+                        'seed': args.seed, 'isolate': isolate}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {r['name']: r for r in json.load(f)['results']}
+    print_results(results, baseline)
+
+    out = args.out
+    if out is None:
+        os.makedirs('bench_results', exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        out = os.path.join('bench_results', f"{meta.get('commit') or 'nogit'}-{stamp}.json")
+    with open(out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == '__main__':
+    main()
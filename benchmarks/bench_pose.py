@@ -0,0 +1,117 @@
+"""
+Pose backend tier benchmark
+Runs each pose backend / MediaPipe model tier over the same decoded frames
+and reports inference latency, detection rate and landmark deviation from
+a reference tier (heavy by default), so the speed a lighter model buys can
+be weighed against the accuracy it costs on your own footage.
+
+    python -m benchmarks.bench_pose --video clips/squat_01.mp4
+    python -m benchmarks.bench_pose --video clips/squat_01.mp4 --tiers 0 1 --reference 1 --out tiers.json
+
+Deviation is the mean distance, in pixels of the processed frame, between
+landmarks both tiers see with visibility >= 0.5.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.landmark_cache import landmarks_to_array
+from utils.pose_backend import PoseConfig, create_pose
+from utils.profiling import _percentile
+
+
+def load_frames(video: str, width: int, max_frames: int) -> List[np.ndarray]:
+    """Decode once, already resized and converted to RGB, so only inference is timed"""
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        frame = cv2.resize(frame, (width, int(width * h / w)))
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Cannot read video: {video}")
+    return frames
+
+
+def run_tier(cfg: PoseConfig, frames: List[np.ndarray]) -> Dict[str, Any]:
+    """Landmarks (frames, 33, 4; NaN where nothing was found) and per-frame latency for one backend"""
+    pose = create_pose(cfg)
+    out = np.full((len(frames), 33, 4), np.nan, dtype=np.float32)
+    latencies = []
+    try:
+        for i, rgb in enumerate(frames):
+            start = time.perf_counter()
+            res = pose.process(rgb)
+            latencies.append(time.perf_counter() - start)
+            if res.pose_landmarks:
+                landmarks_to_array(res.pose_landmarks.landmark, out[i])
+    finally:
+        pose.close()
+    return {'landmarks': out, 'latencies': latencies}
+
+
+def deviation_px(a: np.ndarray, b: np.ndarray, w: int, h: int, min_visibility: float = 0.5) -> Optional[float]:
+    both = (a[..., 3] >= min_visibility) & (b[..., 3] >= min_visibility)
+    if not both.any():
+        return None
+    dx = (a[..., 0] - b[..., 0]) * w
+    dy = (a[..., 1] - b[..., 1]) * h
+    return float(np.sqrt(dx * dx + dy * dy)[both].mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pose backend tiers on one clip")
+    parser.add_argument('--video', required=True, help="Clip to run every tier on")
+    parser.add_argument('--tiers', type=int, nargs='+', default=[0, 1, 2], choices=[0, 1, 2],
+                        help="MediaPipe model_complexity values to run")
+    parser.add_argument('--reference', type=int, default=2, choices=[0, 1, 2],
+                        help="Tier the others are compared against")
+    parser.add_argument('--width', type=int, default=640, help="Processing width")
+    parser.add_argument('--max-frames', type=int, default=300)
+    parser.add_argument('--out', default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.width, args.max_frames)
+    h, w = frames[0].shape[:2]
+    tiers = sorted(set(args.tiers) | {args.reference})
+    runs = {tier: run_tier(PoseConfig(model_complexity=tier), frames) for tier in tiers}
+    ref = runs[args.reference]['landmarks']
+
+    results = []
+    print(f"{'tier':>5}{'mean ms':>9}{'p95 ms':>9}{'fps':>8}{'detected':>10}{'dev px':>8}")
+    for tier in tiers:
+        run = runs[tier]
+        lat = sorted(run['latencies'])
+        mean = sum(lat) / len(lat)
+        dev = deviation_px(run['landmarks'], ref, w, h) if tier != args.reference else 0.0
+        r = {
+            'model_complexity': tier,
+            'mean_ms': round(mean * 1000, 2),
+            'p95_ms': round(_percentile(lat, 95) * 1000, 2),
+            'fps': round(1.0 / mean, 1) if mean > 0 else 0.0,
+            'detected': round(float((~np.isnan(run['landmarks'][:, 0, 0])).mean()), 3),
+            'deviation_px': round(dev, 2) if dev is not None else None,
+        }
+        results.append(r)
+        dev_s = f"{r['deviation_px']:>8.1f}" if dev is not None else f"{'-':>8}"
+        print(f"{tier:>5}{r['mean_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['fps']:>8.1f}{r['detected']:>10.0%}{dev_s}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'video': args.video, 'width': w, 'height': h, 'frames': len(frames),
+                       'reference': args.reference, 'cpu_count': os.cpu_count(),
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
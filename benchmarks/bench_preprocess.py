@@ -0,0 +1,128 @@
+"""
+Preprocessing benchmark
+Compares the per-frame resize + BGR->RGB step as the loops used to do it
+(fresh arrays every frame) with utils.preprocess (reused buffers), for both
+cv2 frames and PyAV/WebRTC frames, and reports time and bytes allocated per
+frame. Pose inference is not run: this isolates the memory traffic.
+
+    python -m benchmarks.bench_preprocess
+    python -m benchmarks.bench_preprocess --size 1920x1080 --width 640 --out preprocess.json
+
+"Alloc KB" is the peak of numpy/cv2 allocations made while one frame is
+preprocessed (tracemalloc), i.e. the transient memory each frame costs, plus
+the frames PyAV unpacks into with its own allocator, which tracemalloc
+cannot see.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import av
+import cv2
+import numpy as np
+
+from utils.preprocess import FramePreprocessor, av_to_ndarray
+from utils.profiling import _percentile
+
+
+def make_frames(w: int, h: int, n: int, seed: int = 0) -> List[np.ndarray]:
+    # Smooth gradients plus noise: compresses/scales like a camera image, not like pure noise
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w]
+    frames = []
+    for i in range(n):
+        base = np.stack([(xx + 7 * i) % 256, (yy + 3 * i) % 256, (xx + yy) % 256], axis=-1)
+        noise = rng.integers(0, 24, size=(h, w, 3))
+        frames.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def variants(width: int) -> Dict[str, Callable[[Any], Any]]:
+    """name -> fn(frame) returning (outputs, bytes allocated by PyAV)"""
+    prep = FramePreprocessor()
+    web = FramePreprocessor()
+
+    def cv2_alloc(frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (width, int(width * h / w)))
+        return (small, cv2.cvtColor(small, cv2.COLOR_BGR2RGB)), 0
+
+    def cv2_reused(frame):
+        small = prep.resize_width(frame, width)
+        return (small, prep.rgb(small)), 0
+
+    def av_alloc(frame):
+        img = frame.to_ndarray(format='bgr24')
+        h, w = img.shape[:2]
+        small = cv2.resize(img, (width, int(width * h / w)))
+        return (small, cv2.cvtColor(small, cv2.COLOR_BGR2RGB)), img.nbytes
+
+    def av_fused(frame):
+        small = av_to_ndarray(frame, width)
+        return (small, web.rgb(web.resize_width(small, width))), small.nbytes
+
+    return {'cv2/alloc': cv2_alloc, 'cv2/reused': cv2_reused,
+            'av/alloc': av_alloc, 'av/fused': av_fused}
+
+
+def measure(fn: Callable[[Any], Any], frames: List[Any], repeat: int) -> Dict[str, float]:
+    fn(frames[0])  # warm-up: first-call buffers are not per-frame cost
+    latencies = []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            fn(frame)
+            latencies.append(time.perf_counter() - start)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        out = fn(frames[0])
+        for frame in frames:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            out, native = fn(frame)  # the previous result stays alive meanwhile, as in a loop
+            peaks.append(tracemalloc.get_traced_memory()[1] - before + native)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+        'alloc_kb': round(sum(peaks) / len(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame cost of resize + colour conversion")
+    parser.add_argument('--size', default='1280x720', help="Input frame size WxH")
+    parser.add_argument('--width', type=int, default=640, help="Processing width")
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    w, h = (int(v) for v in args.size.lower().split('x'))
+    frames = make_frames(w, h, args.frames)
+    # WebRTC hands over decoded YUV frames; unpacking them is part of the cost
+    av_frames = [av.VideoFrame.from_ndarray(f, format='bgr24').reformat(format='yuv420p') for f in frames]
+
+    results = {}
+    print(f"{'variant':<12}{'mean ms':>9}{'p95 ms':>9}{'alloc KB':>10}")
+    for name, fn in variants(args.width).items():
+        r = measure(fn, av_frames if name.startswith('av/') else frames, args.repeat)
+        results[name] = r
+        print(f"{name:<12}{r['mean_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['alloc_kb']:>10.1f}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'size': [w, h], 'width': args.width, 'frames': args.frames,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+WebRTC server load test
+Simulates N concurrent trainees in one process, the way streamlit-webrtc runs
+one processor thread per connection: every peer opens a session through the
+SessionManager and pushes frames at a fixed rate into process_web_frame().
+Frames that arrive while the previous one is still being processed are
+dropped (as a real-time track would), so the achieved FPS per peer shows
+how many trainees one box can serve. --mode adaptive follows the server's
+AdaptiveScheduler (skipped frames are redrawn with the last overlay);
+--mode async gives every peer a LatestFrameWorker fed at the scheduler's
+cadence, as the server does by default.
+
+    python -m benchmarks.load_test --peers 1 2 4 8
+    python -m benchmarks.load_test --peers 4 --video sample/squat.mp4 --seconds 20
+    python -m benchmarks.load_test --peers 1 2 4 8 --mode adaptive
+    python -m benchmarks.load_test --peers 1 2 4 8 --mode async
+
+Without --video the peers send rendered stick figures from utils.synthetic;
+MediaPipe rarely locks onto those, so use a real clip for tracking-mode costs.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+
+from exercises.registry import get_exercise
+from utils import pose_backend
+from utils.async_infer import LatestFrameWorker
+from utils.overlay import SkeletonRenderer
+from utils.pose_backend import create_pose
+from utils.profiling import _percentile
+from utils.scheduler import AdaptiveScheduler
+from utils.sessions import SessionLimitError, SessionManager
+from utils.synthetic import FRAME_SIZE, synthetic_session
+from utils.web_frame import infer_web_frame, process_web_frame, redraw_web_frame
+
+
+def load_frames(video: str = None, width: int = 640, max_frames: int = 300) -> List[np.ndarray]:
+    """Decode a clip into memory, or render a synthetic squat session"""
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            h, w = frame.shape[:2]
+            frames.append(cv2.resize(frame, (width, int(width * h / w))))
+        cap.release()
+        if not frames:
+            raise SystemExit(f"Cannot read video: {video}")
+        return frames
+
+    landmarks, _ = synthetic_session('squat', reps=3, noise_px=1.0)
+    skeleton = SkeletonRenderer((40, 40, 40), (40, 40, 40), thickness=18, radius=6)
+    w, h = FRAME_SIZE
+    for lms in landmarks[:max_frames]:
+        frame = np.full((h, w, 3), 200, dtype=np.uint8)
+        skeleton.draw(frame, lms)
+        frames.append(frame)
+    return frames
+
+
+def _peer(manager: SessionManager, frames: List[np.ndarray], fps: float, seconds: float,
+          width: int, mode: str, start: threading.Event, out: Dict[str, Any]):
+    try:
+        session = manager.open()
+    except SessionLimitError:
+        out['admitted'] = False
+        return
+    out['admitted'] = True
+    scheduler = AdaptiveScheduler(target_fps=fps, max_load=0.8, max_interval=6) if mode != 'sync' else None
+    worker = None
+    scheduled = 0  # worker results fed back to the scheduler
+    if mode == 'async':
+        def infer(item):
+            submitted, frame = item
+            infer_web_frame(session, frame, width=width)
+            return submitted  # the overlay now shows the frame submitted at this time
+        worker = LatestFrameWorker(infer, name=f"pose-{session.id}")
+    latencies, ages = [], []
+    sent = returned = inferred = 0
+    period = 1.0 / fps
+    start.wait()
+    t0 = time.perf_counter()
+    busy_until = t0
+    try:
+        while True:
+            due = t0 + sent * period
+            if due - t0 >= seconds:
+                break
+            sent += 1
+            if due < busy_until:
+                continue  # arrived while the previous frame was in flight: dropped
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            t = time.perf_counter()
+            frame = frames[sent % len(frames)]
+            if worker is not None:
+                if worker.processed != scheduled:
+                    scheduled = worker.processed
+                    scheduler.record(worker.last_latency_s)
+                if scheduler.should_process(due):
+                    worker.submit((t, frame))
+                redraw_web_frame(session, frame, width=width)
+                born = worker.latest()
+                if born is not None:
+                    ages.append(time.perf_counter() - born)
+            elif scheduler is None or scheduler.should_process(due):
+                process_web_frame(session, frame, width=width)
+                inferred += 1
+                if scheduler is not None:
+                    scheduler.record(time.perf_counter() - t)
+            else:
+                redraw_web_frame(session, frame, width=width)
+            busy_until = time.perf_counter()
+            latencies.append(busy_until - t)
+            if worker is None:
+                ages.append(busy_until - t)
+            returned += 1
+    finally:
+        if worker is not None:
+            worker.close()
+            inferred = worker.processed
+        manager.close(session)
+    elapsed = time.perf_counter() - t0
+    out.update(sent=sent, processed=returned,
+               fps=returned / elapsed if elapsed > 0 else 0.0,
+               inference_fps=inferred / elapsed if elapsed > 0 else 0.0,
+               latencies=latencies, ages=ages)
+
+
+def run_level(peers: int, frames: List[np.ndarray], fps: float, seconds: float,
+              width: int, max_sessions: int, mode: str = 'sync') -> Dict[str, Any]:
+    manager = SessionManager(get_exercise('squat').factory, create_pose, max_sessions=max_sessions)
+    manager.pool.warm(min(peers, max_sessions))
+    start = threading.Event()
+    results = [dict() for _ in range(peers)]
+    threads = [threading.Thread(target=_peer, args=(manager, frames, fps, seconds, width, mode, start, r),
+                                daemon=True) for r in results]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)  # let every peer go through admission first
+    start.set()
+    for t in threads:
+        t.join()
+    manager.shutdown()
+
+    served = [r for r in results if r.get('admitted')]
+    lat = sorted(x for r in served for x in r['latencies'])
+    ages = sorted(x for r in served for x in r['ages'])
+    fps_each = [r['fps'] for r in served]
+    return {
+        'peers': peers,
+        'admitted': len(served),
+        'rejected': peers - len(served),
+        'target_fps': fps,
+        'fps_mean': round(sum(fps_each) / len(fps_each), 2) if fps_each else 0.0,
+        'fps_min': round(min(fps_each), 2) if fps_each else 0.0,
+        'inference_fps_mean': round(sum(r['inference_fps'] for r in served) / len(served), 2) if served else 0.0,
+        'drop_rate': round(1.0 - sum(r['processed'] for r in served) / max(1, sum(r['sent'] for r in served)), 3),
+        'latency_p50_ms': round(_percentile(lat, 50) * 1000, 1),
+        'latency_p95_ms': round(_percentile(lat, 95) * 1000, 1),
+        # Age of the shown overlay relative to its source frame (~glass-to-glass on the server)
+        'overlay_age_p95_ms': round(_percentile(ages, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent WebRTC trainees")
+    parser.add_argument('--peers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--fps', type=float, default=15.0, help="Frame rate each peer sends")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Duration per load level")
+    parser.add_argument('--width', type=int, default=640, help="Processing width")
+    parser.add_argument('--video', default=None, help="Clip each peer loops (default: synthetic)")
+    parser.add_argument('--max-sessions', type=int, default=None,
+                        help="Admission limit (default: no limit below the largest --peers)")
+    parser.add_argument('--mode', choices=['sync', 'adaptive', 'async'], default='sync',
+                        help="sync: infer every frame in recv; adaptive: AdaptiveScheduler skips frames; "
+                             "async: LatestFrameWorker per peer, recv only composites")
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1, 2], default=None,
+                        help="MediaPipe tier each session uses (default: POSE_MODEL_COMPLEXITY or 1)")
+    parser.add_argument('--out', default=None, help="Write results JSON here")
+    args = parser.parse_args()
+    if args.model_complexity is not None:
+        pose_backend.configure(model_complexity=args.model_complexity)
+
+    frames = load_frames(args.video, args.width)
+    results = []
+    print(f"{'peers':>6}{'admitted':>10}{'fps mean':>10}{'fps min':>9}{'infer':>7}{'drop':>7}{'p50 ms':>9}{'p95 ms':>9}{'age p95':>9}")
+    for n in args.peers:
+        r = run_level(n, frames, args.fps, args.seconds, args.width,
+                      args.max_sessions or max(args.peers), args.mode)
+        results.append(r)
+        print(f"{r['peers']:>6}{r['admitted']:>10}{r['fps_mean']:>10.1f}{r['fps_min']:>9.1f}"
+              f"{r['inference_fps_mean']:>7.1f}"
+              f"{r['drop_rate']:>7.0%}{r['latency_p50_ms']:>9.1f}{r['latency_p95_ms']:>9.1f}"
+              f"{r['overlay_age_p95_ms']:>9.1f}")
+
+    # Capacity: most peers whose slowest stream still gets 90% of the sent rate
+    ok = [r['admitted'] for r in results if r['admitted'] and r['fps_min'] >= 0.9 * args.fps]
+    print(f"Capacity at {args.fps:.0f} FPS: {max(ok) if ok else 0} concurrent trainees "
+          f"({os.cpu_count()} CPUs)")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'cpu_count': os.cpu_count(), 'video': args.video, 'mode': args.mode,
+                       'model_complexity': pose_backend.DEFAULT.model_complexity,
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Shared evaluator result type and protocol
+-----------------------------------------
+Every evaluator splits its per-frame work in two:
+- evaluate(landmarks, w, h, t) -> EvalResult   (form logic only, no drawing)
+- render(frame, landmarks, result) -> frame     (all cv2 drawing)
+StreamingEvaluator derives the rest of the Evaluator protocol from those two:
+update(landmarks, t) at a fixed frame_size, reset(), state(), and
+eval_and_draw(frame, landmarks, t) = evaluate + render for the live loops.
+Frames without a person go through update(None, t) (evaluate_missing()) in
+every engine, headless or not, then render_missing(frame, result), which only
+draws. Renderers draw from the EvalResult (not the evaluator's live state),
+so a result can be drawn on another thread while the next frame evaluates.
+t is the frame's time from a utils.clock.FrameClock (media/capture time, so
+replays are timed like live sessions); the wall clock is only a fallback.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+import cv2
+
+
+@dataclass
+class EvalResult:
+    reps: int = 0
+    state: Optional[str] = None           # exercise-specific stage ('up', 'bottom', ...)
+    feedback: str = ""
+    good: bool = True                     # feedback is positive (green) vs a correction (red)
+    visible: bool = True                  # False: landmarks too poor to evaluate this frame
+    t: Optional[float] = None             # timestamp (s) the frame was evaluated at
+    angles: Dict[str, Optional[float]] = field(default_factory=dict)   # smoothed, degrees
+    flags: Dict[str, bool] = field(default_factory=dict)               # form checks
+    points: Dict[str, Tuple[int, int]] = field(default_factory=dict)   # pixel coords for drawing
+    extra: Dict[str, Any] = field(default_factory=dict)                # evaluator-specific values ('fps', ...)
+
+
+class Evaluator(Protocol):
+    """What engines (desktop runner, batch pipeline, web sessions) rely on"""
+
+    frame_size: Tuple[int, int]  # (w, h) that update() evaluates at
+
+    def evaluate(self, landmarks, w: int, h: int, t: Optional[float] = None) -> EvalResult: ...
+
+    def render(self, frame, landmarks, result: EvalResult): ...
+
+    def render_missing(self, frame, result: EvalResult): ...
+
+    def update(self, landmarks, t: Optional[float] = None) -> EvalResult: ...  # None = no person
+
+    def update_fps(self, fps: float) -> None: ...
+
+    def reset(self) -> None: ...
+
+    def state(self) -> Dict[str, Any]: ...
+
+
+class StreamingEvaluator:
+    """
+    Base class giving an evaluate()/render() pair the full Evaluator protocol
+
+    Subclasses name their rep counter and feedback attributes in REP_ATTR and
+    FEEDBACK_ATTR so state() reads the live values (including the start-up
+    feedback shown before the first evaluated frame), and extend reset().
+    """
+
+    REP_ATTR = 'reps'
+    FEEDBACK_ATTR = 'feedback'
+    MISSING_TEXT = 'No person detected'
+    frame_size: Tuple[int, int] = (960, 540)
+    last_result: Optional[EvalResult] = None
+
+    def update(self, landmarks, t: Optional[float] = None) -> EvalResult:
+        """evaluate() at frame_size, evaluate_missing() for landmarks None; t is the frame time in seconds"""
+        if landmarks is None:
+            self.last_result = self.evaluate_missing(t)
+        else:
+            w, h = self.frame_size
+            self.last_result = self.evaluate(landmarks, w, h, t)
+        return self.last_result
+
+    def evaluate_missing(self, t: Optional[float] = None) -> EvalResult:
+        """Frame without a detected person: counters and feedback are kept by default"""
+        last = self.last_result
+        return EvalResult(reps=getattr(self, self.REP_ATTR), state=last.state if last is not None else None,
+                          feedback=getattr(self, self.FEEDBACK_ATTR), good=False, visible=False, t=t)
+
+    def update_fps(self, fps: float):
+        pass
+
+    def reset(self):
+        """
+        Start a new set: subclasses clear their counters, stages, segmenter and
+        filters, then call this. Configuration and frame_size are kept.
+        """
+        self.last_result = None
+
+    def state(self) -> Dict[str, Any]:
+        result = self.last_result
+        return {
+            'reps': getattr(self, self.REP_ATTR),
+            'feedback': getattr(self, self.FEEDBACK_ATTR),
+            'state': result.state if result is not None else None,
+            'good': result.good if result is not None else True,
+            't': result.t if result is not None else None,
+        }
+
+    def eval_and_draw(self, frame, landmarks, t: Optional[float] = None):
+        h, w = frame.shape[:2]
+        self.frame_size = (w, h)
+        return self.render(frame, landmarks, self.update(landmarks, t))
+
+    def render_missing(self, frame, result: EvalResult):
+        """Frame without a detected person (result: the evaluate_missing() one)"""
+        cv2.putText(frame, self.MISSING_TEXT, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+        return frame
@@ -0,0 +1,78 @@
+"""
+Exercise plugin registry
+------------------------
+One table of exercises for every front end: the desktop runner, the batch
+pipeline, the Streamlit server and the benchmarks. Evaluator modules (and
+so MediaPipe) are imported only when an exercise is instantiated.
+
+Adding an exercise: implement a StreamingEvaluator subclass, then
+    register_exercise(ExerciseSpec('lunge', _make_lunge, 'Lunge AI Trainer'))
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple
+
+if TYPE_CHECKING:  # exercises.base pulls in cv2; keep `app.py --help` import-light
+    from exercises.base import Evaluator
+
+
+@dataclass(frozen=True)
+class ExerciseSpec:
+    name: str
+    factory: Callable[[], 'Evaluator']      # fresh evaluator (own counters and smoothing)
+    title: str                            # desktop window title
+    pose_overrides: Dict[str, Any] = field(default_factory=dict)  # PoseConfig fields, e.g. confidences
+    overlay_origin: Tuple[int, int] = (10, 140)  # where the latency table goes clear of the panel
+
+
+EXERCISES: Dict[str, ExerciseSpec] = {}
+
+
+def register_exercise(spec: ExerciseSpec) -> ExerciseSpec:
+    EXERCISES[spec.name] = spec
+    return spec
+
+
+def get_exercise(name: str) -> ExerciseSpec:
+    try:
+        return EXERCISES[name]
+    except KeyError:
+        raise ValueError(f"Unknown exercise {name!r} (available: {', '.join(EXERCISES)})") from None
+
+
+def create_evaluator(name: str) -> 'Evaluator':
+    return get_exercise(name).factory()
+
+
+def exercise_names() -> List[str]:
+    return list(EXERCISES)
+
+
+# =========================
+# Built-in exercises
+# =========================
+def _make_squat():
+    from exercises.squat import SquatEvaluator, CFG
+    return SquatEvaluator(CFG)
+
+def _make_pushup():
+    from exercises.pushup import PushupEvaluator
+    return PushupEvaluator(down_threshold=90, up_threshold=160)
+
+def _make_press():
+    from exercises.standing_cable_press import StandingCablePressEvaluator
+    return StandingCablePressEvaluator()
+
+def _make_curl():
+    from exercises.bicep_curl import BicepCurlEvaluator
+    return BicepCurlEvaluator()
+
+
+register_exercise(ExerciseSpec('squat', _make_squat, 'Visual Squat AI Trainer'))
+register_exercise(ExerciseSpec('pushup', _make_pushup, 'Pushup AI Trainer',
+                               {'min_detection_confidence': 0.7, 'min_tracking_confidence': 0.7},
+                               overlay_origin=(10, 240)))
+register_exercise(ExerciseSpec('press', _make_press, 'Standing Cable Press AI Trainer',
+                               {'min_detection_confidence': 0.7, 'min_tracking_confidence': 0.7},
+                               overlay_origin=(10, 120)))
+register_exercise(ExerciseSpec('curl', _make_curl, 'AI Trainer - Synchronized Bicep Curls'))
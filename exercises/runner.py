@@ -0,0 +1,160 @@
+"""
+Desktop capture -> pose -> evaluate -> render loop shared by every exercise
+---------------------------------------------------------------------------
+Keys: q quits, r resets the rep counter.
+"""
+
+import gc
+from dataclasses import replace
+
+import cv2
+
+from exercises.registry import get_exercise
+from utils import pose_backend, startup
+from utils.capture import ThreadedCapture
+from utils.clock import FrameClock
+from utils.landmark_cache import array_to_landmarks
+from utils.pose_backend import create_pose
+from utils.preprocess import FramePreprocessor
+from utils.profiling import get_profiler
+from utils.roi import RoiTracker
+
+
+def run(exercise: str, src=0, profiler=None, roi_size=None, width: int = 960, log=None,
+        processes: bool = False):
+    """
+    Train one exercise live from a camera or a video file
+
+    Args:
+        exercise: Key of exercises.registry.EXERCISES
+        src: cv2.VideoCapture source (camera index, file path or URL)
+        profiler: Optional StageProfiler
+        roi_size: Infer on a tracked person crop of the full-resolution frame scaled
+            to this size instead of the resized view (None = whole frame)
+        width: Display/processing width
+        log: Optional utils.analytics.SessionLog receiving every evaluated frame
+        processes: Decode and run pose in two child processes, passing frames
+            through shared memory (utils.shm_ring), so one stream uses three cores
+    """
+    if processes:
+        if roi_size:
+            raise SystemExit("--processes does not support --roi (the crop needs the full frame)")
+        return run_processes(exercise, src, profiler, width, log)
+    spec = get_exercise(exercise)
+    cap = ThreadedCapture(src)  # decodes ahead on its own thread; latest-frame for cameras
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video source: {src}")
+
+    evaluator = spec.factory()
+    startup.mark(f"import {exercise}")
+    pose = create_pose(**spec.pose_overrides)
+    tracker = RoiTracker(roi_size) if roi_size else None
+    prep = FramePreprocessor()  # resize/RGB buffers reused every frame
+    prof = get_profiler(profiler)
+
+    def frames():
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            media_t = cap.frame_time()
+            prof.mark('capture')
+
+            raw = frame
+            frame = prep.resize_width(frame, width)
+            prof.mark('resize')
+
+            if tracker is not None:
+                landmarks = tracker.process(pose, raw)  # full-frame normalised, fits any display size
+            else:
+                rgb = prep.rgb(frame)
+                prof.mark('convert')
+                res = pose.process(rgb)
+                landmarks = res.pose_landmarks.landmark if res.pose_landmarks else None
+            prof.mark('pose')
+            yield frame, landmarks, media_t
+
+    try:
+        _train(spec, evaluator, frames(), prof, log)
+    finally:
+        cap.release()
+        if profiler is not None:
+            print("Capture:", cap.stats())
+        pose.close()
+
+
+def run_processes(exercise: str, src=0, profiler=None, width: int = 960, log=None):
+    """run() with capture and pose inference in child processes; this process evaluates and draws"""
+    from utils.shm_ring import ProcessPipeline
+
+    spec = get_exercise(exercise)
+    pipe = ProcessPipeline(src, replace(pose_backend.DEFAULT, **spec.pose_overrides), width=width)
+    if not pipe.open():
+        pipe.close()
+        raise SystemExit(f"Cannot open video source: {src}")
+
+    evaluator = spec.factory()
+    startup.mark(f"import {exercise}")
+    prof = get_profiler(profiler)
+
+    def frames():
+        while True:
+            ret, frame, landmarks, media_t = pipe.read()
+            if not ret:
+                return
+            prof.mark('capture+pose')  # waiting on the child processes
+            # The slot is this process's until the next read(): it is drawn on in place
+            yield frame, None if landmarks is None else array_to_landmarks(landmarks), media_t
+
+    try:
+        _train(spec, evaluator, frames(), prof, log)
+    finally:
+        if profiler is not None:
+            print("Pipeline:", pipe.stats())
+        pipe.close()
+
+
+def _train(spec, evaluator, frames, prof, log=None):
+    """
+    Evaluate, draw and show (frame, landmarks or None, media time) items until q or the end
+
+    Shared by run() and run_processes(); the caller owns the source behind `frames`.
+    """
+    # Frame times come from the source (file position / grab time), so holds and FPS
+    # are the same whether a file plays in real time or as fast as it decodes
+    clock = FrameClock()
+
+    try:
+        while True:
+            prof.start()
+            item = next(frames, None)
+            if item is None:
+                break
+            frame, landmarks, media_t = item
+            t = clock.stamp(media_t)
+
+            if landmarks is not None:
+                frame = evaluator.eval_and_draw(frame, landmarks, t)
+                if log is not None:
+                    log.append(evaluator.last_result)
+            else:
+                frame = evaluator.render_missing(frame, evaluator.update(None, t))
+            prof.mark('evaluate')
+
+            if clock.fps:
+                evaluator.update_fps(clock.fps)
+
+            prof.draw(frame, origin=spec.overlay_origin)
+            cv2.imshow(spec.title, frame)
+            startup.once('first frame')
+            key = cv2.waitKey(1) & 0xFF
+            prof.mark('display')
+            prof.end()
+            if key == ord('q'):
+                break
+            elif key == ord('r'):
+                evaluator.reset()
+    finally:
+        frames.close()
+        cv2.destroyAllWindows()
+        gc.collect()
@@ -1,22 +1,21 @@
 """
-Visual Squat AI Trainer - WebRTC friendly
------------------------------------------
+Visual Squat AI Trainer
+-----------------------
 - Keeps original logic (angles, feedback, rep counting, drawing)
-- Adds squat_callback(frame) for streamlit-webrtc
+- Web sessions drive it through utils.web_frame (own Pose + evaluator per session)
 - Keeps run() so desktop/testing still works
 """
 
 from dataclasses import dataclass
 import time
 import argparse
-from collections import deque
-import av
-import gc
 import cv2
-import numpy as np
 import mediapipe as mp
-from mediapipe.framework.formats import landmark_pb2
-from utils.angle_calculator import angle_3pts, line_angle_deg, moving_average
+from exercises.base import EvalResult, StreamingEvaluator
+from utils.angle_calculator import angle_3pts, line_angle_deg
+from utils.filters import MovingAverage, make_filter
+from utils.overlay import PanelCanvas, SkeletonRenderer
+from utils.segmentation import ACTIVE, TURNED, RepSegmenter
 
 # =========================
 # Configuration
@@ -30,10 +29,11 @@ class Config:
     knee_green_max: float = 100.0
     knee_diff_warn_deg: float = 10.0     # L vs R knee mismatch
     shoulder_sym_tol_px: int = 25        # L vs R shoulder depth symmetry
-    bottom_hold_ms: int = 150            # bottom pause for rep counting
+    bottom_hold_ms: int = 150            # time in the depth band before a rep can count
     min_stand_knee_angle: float = 150.0  # standing threshold
     max_deep_knee_angle: float = 60.0    # too deep
     smoothing_win: int = 5               # MA window
+    smoothing: str = 'sma'               # sma | ema | one_euro | median (utils.filters)
     draw_scale: float = 1.0
     fps_smoothing: int = 20
 
@@ -64,27 +64,61 @@ def get_point(landmarks, name, w, h):
     return int(lm.x * w), int(lm.y * h), lm.visibility
 
 # =========================
-# Visual Squat Evaluator (kept intact)
+# Status panel (static part drawn once per frame width)
 # =========================
-class SquatEvaluator:
+PANEL_HEIGHT = 110
+PANEL_FLAGS = (  # (x, y, label, EvalResult.flags key)
+    (20, 25, 'Shoulders level', 'shoulder_ok'),
+    (20, 55, 'Torso parallel', 'torso_ok'),
+    (240, 25, 'Depth ~90°', 'depth_good'),
+    (240, 55, 'Knees balanced', 'knees_balanced'),
+    (460, 25, 'Shoulders symmetric', 'shoulder_sym_ok'),
+)
+
+def _draw_static_panel(panel):
+    for x, y, text, _ in PANEL_FLAGS:
+        cv2.putText(panel, text, (x+15, y+5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
+
+# =========================
+# Visual Squat Evaluator
+# =========================
+class SquatEvaluator(StreamingEvaluator):
+    REP_ATTR = 'rep_count'
+    FEEDBACK_ATTR = 'last_feedback'
+
     def __init__(self, cfg: Config):
         self.cfg = cfg
-        self.left_knee_hist = deque(maxlen=cfg.smoothing_win)
-        self.right_knee_hist = deque(maxlen=cfg.smoothing_win)
-        self.hip_center_y_hist = deque(maxlen=cfg.smoothing_win)
-        self.shoulder_line_hist = deque(maxlen=cfg.smoothing_win)
+        self.left_knee_f = make_filter(cfg.smoothing, cfg.smoothing_win)
+        self.right_knee_f = make_filter(cfg.smoothing, cfg.smoothing_win)
+        self.hip_center_y_f = make_filter(cfg.smoothing, cfg.smoothing_win)
+        self.shoulder_line_f = make_filter(cfg.smoothing, cfg.smoothing_win)
         self.rep_count = 0
-        self.state = 'up'  # 'up' -> 'bottom_candidate' -> 'bottom' -> 'up'
-        self.bottom_timestamp = 0
+        self.stage = 'up'  # 'up' -> 'bottom_candidate' -> 'bottom' -> 'up'
+        # Mean knee angle enters the depth band, holds there, then both knees straighten
+        self.segmenter = RepSegmenter(enter=cfg.knee_green_max, rest=cfg.min_stand_knee_angle,
+                                      start=cfg.knee_green_max, min_hold_s=cfg.bottom_hold_ms / 1000.0,
+                                      hold_range=(cfg.knee_green_min, cfg.knee_green_max))
         self.last_feedback = ""
-        self.fps_hist = deque(maxlen=cfg.fps_smoothing)
+        self.fps_f = MovingAverage(cfg.fps_smoothing)
+        # Rendering state reused across frames
+        self.skeleton = SkeletonRenderer((255, 255, 255), (180, 180, 180), thickness=2, radius=2)
+        self.canvas = PanelCanvas(PANEL_HEIGHT, (25, 25, 25), _draw_static_panel)
 
     def update_fps(self, fps):
-        self.fps_hist.append(fps)
+        self.fps_f.update(fps)
 
-    def eval_and_draw(self, frame, landmarks):
-        h, w = frame.shape[:2]
+    def reset(self):
+        self.rep_count = 0
+        self.stage = 'up'
+        self.segmenter.reset()
+        self.last_feedback = ""
+        for f in (self.left_knee_f, self.right_knee_f, self.hip_center_y_f, self.shoulder_line_f,
+                  self.fps_f):
+            f.reset()
+        super().reset()
 
+    def evaluate(self, landmarks, w, h, t=None) -> EvalResult:
+        """Form checks + rep state machine only; t is the frame time in seconds (wall clock if None)"""
         # Extract key points
         pts = {}
         for k in KEYS.keys():
@@ -94,17 +128,19 @@ class SquatEvaluator:
         # Visibility gate
         needed = ['l_shoulder','r_shoulder','l_hip','r_hip','l_knee','r_knee','l_ankle','r_ankle']
         if any(pts[k][2] < 0.5 for k in needed):
-            cv2.putText(frame, 'Low visibility: step back / adjust camera',
-                        (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-            return frame
+            return EvalResult(reps=self.rep_count, state=self.stage,
+                              feedback='Low visibility: step back / adjust camera',
+                              good=False, visible=False, t=t)
 
         # xy only
         P = {k:(pts[k][0], pts[k][1]) for k in pts}
+        now = time.time() if t is None else t  # filters and segmentation run on frame time
 
         # Shoulder checks
         shoulder_angle = line_angle_deg(P['l_shoulder'], P['r_shoulder'])  # ~0 if level
-        self.shoulder_line_hist.append(shoulder_angle)
-        sh_ang_smooth = moving_average(self.shoulder_line_hist) or 0.0
+        if shoulder_angle is not None:
+            self.shoulder_line_f.update(shoulder_angle, now)
+        sh_ang_smooth = self.shoulder_line_f.value or 0.0
 
         # Torso parallel = shoulder line ~ horizontal
         torso_ok = abs(sh_ang_smooth) <= self.cfg.torso_tol_deg
@@ -117,11 +153,11 @@ class SquatEvaluator:
         lk = angle_3pts(P['l_hip'], P['l_knee'], P['l_ankle'])
         rk = angle_3pts(P['r_hip'], P['r_knee'], P['r_ankle'])
         if lk is not None:
-            self.left_knee_hist.append(lk)
+            self.left_knee_f.update(lk, now)
         if rk is not None:
-            self.right_knee_hist.append(rk)
-        lk_s = moving_average(self.left_knee_hist)
-        rk_s = moving_average(self.right_knee_hist)
+            self.right_knee_f.update(rk, now)
+        lk_s = self.left_knee_f.value
+        rk_s = self.right_knee_f.value
 
         # Shoulder symmetry (vertical travel similarity to "ground" = frame bottom)
         left_shoulder_to_ground = h - P['l_shoulder'][1]
@@ -130,8 +166,7 @@ class SquatEvaluator:
 
         # Hip center depth for rep logic (use hips for center)
         hip_center_y = int((P['l_hip'][1] + P['r_hip'][1]) / 2)
-        self.hip_center_y_hist.append(hip_center_y)
-        _ = moving_average(self.hip_center_y_hist)  # reserved if you expand depth logic
+        self.hip_center_y_f.update(hip_center_y, now)  # reserved if you expand depth logic
 
         # Depth quality from knees
         depth_good = (
@@ -152,22 +187,14 @@ class SquatEvaluator:
             knee_diff = abs(lk_s - rk_s)
         knees_balanced = (knee_diff is not None and knee_diff <= self.cfg.knee_diff_warn_deg)
 
-        # Rep state machine
-        now = int(time.time() * 1000)
-        if self.state == 'up':
-            if depth_good:
-                self.state = 'bottom_candidate'
-                self.bottom_timestamp = now
-        elif self.state == 'bottom_candidate':
-            if depth_good and (now - self.bottom_timestamp) >= self.cfg.bottom_hold_ms:
-                self.state = 'bottom'
-        elif self.state == 'bottom':
-            if (lk_s is not None and rk_s is not None and
-                lk_s >= self.cfg.min_stand_knee_angle and rk_s >= self.cfg.min_stand_knee_angle):
-                self.rep_count += 1
-                self.state = 'up'
+        # Rep segmentation on frame timestamps
+        if lk_s is not None and rk_s is not None:
+            if self.segmenter.update((lk_s + rk_s) / 2, now, rest_value=min(lk_s, rk_s)):
+                self.rep_count = self.segmenter.reps
         else:
-            self.state = 'up'
+            self.segmenter.update(None, now)
+        phase = self.segmenter.phase
+        self.stage = 'bottom' if phase == TURNED else 'bottom_candidate' if phase == ACTIVE else 'up'
 
         # Feedback
         feedback = []
@@ -190,27 +217,41 @@ class SquatEvaluator:
 
         if not feedback:
             feedback_text = "Perfect Squat"
-            feedback_color = (0, 200, 0)
         else:
             feedback_text = " | ".join(feedback)
-            feedback_color = (0, 0, 255)
         self.last_feedback = feedback_text
 
-        # ============== Drawing ==============
-        # Skeleton (build pb2 list so it's robust to future edits)
-        mp_drawing.draw_landmarks(
-            image=frame,
-            landmark_list=landmark_pb2.NormalizedLandmarkList(
-                landmark=[
-                    landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility)
-                    for lm in landmarks
-                ]
-            ),
-            connections=mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=2, circle_radius=2),
-            connection_drawing_spec=mp_drawing.DrawingSpec(color=(180, 180, 180), thickness=2)
+        return EvalResult(
+            reps=self.rep_count, state=self.stage, feedback=feedback_text,
+            good=not feedback, visible=True, t=t,
+            angles={'l_knee': lk_s, 'r_knee': rk_s, 'shoulder_line': sh_ang_smooth,
+                    'knee_diff': knee_diff},
+            flags={'shoulder_ok': shoulder_ok, 'torso_ok': torso_ok, 'depth_good': depth_good,
+                   'too_shallow': too_shallow, 'too_deep': too_deep,
+                   'knees_balanced': knees_balanced, 'shoulder_sym_ok': shoulder_sym_ok},
+            points=P, extra={'fps': self.fps_f.value},
         )
 
+    def render(self, frame, landmarks, result: EvalResult):
+        """Draw skeleton, joint overlays and the status panel for an evaluate() result"""
+        h, w = frame.shape[:2]
+        if not result.visible:
+            return self._render_status(frame, result.feedback, result.reps)
+
+        P = result.points
+        lk_s, rk_s = result.angles['l_knee'], result.angles['r_knee']
+        sh_ang_smooth = result.angles['shoulder_line']
+        knee_diff = result.angles['knee_diff']
+        shoulder_ok = result.flags['shoulder_ok']
+        knees_balanced = result.flags['knees_balanced']
+        shoulder_sym_ok = result.flags['shoulder_sym_ok']
+
+        # Panel + frame share one reused buffer; everything below draws into its views
+        out, panel, frame = self.canvas.compose(frame)
+
+        # Skeleton straight from the landmarks (no pb2 list / DrawingSpec per frame)
+        self.skeleton.draw(frame, landmarks)
+
         # Shoulder line & horizontal ref
         sh_col = (0,200,0) if shoulder_ok else (0,0,255)
         cv2.line(frame, P['l_shoulder'], P['r_shoulder'], sh_col, 3)
@@ -226,9 +267,9 @@ class SquatEvaluator:
             if ang_val is None:
                 color = (0,0,255)
             else:
-                if ang_val > CFG.knee_green_max:
+                if ang_val > self.cfg.knee_green_max:
                     color = (0,165,255)  # shallow = orange
-                elif ang_val < CFG.max_deep_knee_angle:
+                elif ang_val < self.cfg.max_deep_knee_angle:
                     color = (0,0,255)    # too deep = red
                 else:
                     color = (0,200,0)    # good depth
@@ -256,107 +297,54 @@ class SquatEvaluator:
         cv2.putText(frame, "Shoulder symmetry", (w-240, h-40),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, l_col, 2)
 
-        # Status panel
-        panel = np.zeros((110, w, 3), dtype=np.uint8)
-        panel[:] = (25,25,25)
-        ok = (0,200,0); bad=(0,0,255); white=(255,255,255)
-
-        def flag(x, y, text, good=True):
-            col = ok if good else bad
-            cv2.circle(panel, (x, y), 8, col, -1)
-            cv2.putText(panel, text, (x+15, y+5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, white, 2)
-
-        flag(20, 25, 'Shoulders level', shoulder_ok)
-        flag(20, 55, 'Torso parallel', torso_ok)
-        good_knees = False
-        if lk_s is not None and rk_s is not None:
-            good_knees = (CFG.knee_green_min <= (lk_s+rk_s)/2 <= CFG.knee_green_max)
-        flag(240, 25, 'Depth ~90°', good_knees)
-        flag(240, 55, 'Knees balanced', knees_balanced)
-        flag(460, 25, 'Shoulders symmetric', shoulder_sym_ok)
-        cv2.putText(panel, f"Reps: {self.rep_count}", (460, 60),
+        # Status panel (labels come from the cached static panel)
+        ok = (0,200,0); bad=(0,0,255)
+        for x, y, _, key in PANEL_FLAGS:
+            cv2.circle(panel, (x, y), 8, ok if result.flags[key] else bad, -1)
+        cv2.putText(panel, f"Reps: {result.reps}", (460, 60),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180,255,180), 2)
 
         # Feedback text
-        cv2.putText(panel, self.last_feedback, (20, 95),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,200,0) if not feedback else (0,0,255), 2)
+        cv2.putText(panel, result.feedback, (20, 95),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,200,0) if result.good else (0,0,255), 2)
 
         # FPS
-        fps_avg = moving_average(self.fps_hist)
+        fps_avg = result.extra.get('fps')
         if fps_avg is not None:
             cv2.putText(panel, f"FPS: {fps_avg:.1f}", (w-120, 25),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (180,180,255), 2)
 
-        frame = np.vstack([panel, frame])
-        return frame
-
+        return out
 
-# =========================
-# Globals for web callback
-# =========================
-# Pose instance shared across frames (keeps tracking)
-pose = mp_pose.Pose(min_detection_confidence=0.6,
-                    min_tracking_confidence=0.6,
-                    model_complexity=1,
-                    smooth_landmarks=True)
+    def render_missing(self, frame, result: EvalResult):
+        return self._render_status(frame, self.MISSING_TEXT, result.reps)
 
-drawer = mp_drawing
-squat_evaluator = SquatEvaluator(CFG)
-_prev_time = time.time()
+    def _render_status(self, frame, text, reps):
+        # Frames without a usable pose keep the panel, so every output frame has the same size
+        out, panel, frame = self.canvas.compose(frame)
+        cv2.putText(frame, text, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
+        cv2.putText(panel, f"Reps: {reps}", (460, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180,255,180), 2)
+        return out
 
 
 # =========================
-# Runner (desktop) - unchanged behaviour
+# Runner (desktop)
 # =========================
-def run(src=0):
-    cap = cv2.VideoCapture(src)
-    if not cap.isOpened():
-        raise SystemExit(f"Cannot open video source: {src}")
-
-    evaluator = SquatEvaluator(CFG)
-    prev_time = time.time()
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Keep a reasonable width
-        new_w = 960
-        frame = cv2.resize(frame, (new_w, int(new_w * (frame.shape[0]/frame.shape[1]))))
-
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        res = pose.process(rgb)
-
-        if res.pose_landmarks:
-            landmarks = res.pose_landmarks.landmark
-            frame = evaluator.eval_and_draw(frame, landmarks)
-        else:
-            cv2.putText(frame, 'No person detected', (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-
-        # FPS
-        now = time.time()
-        fps = 1.0 / max(1e-6, (now - prev_time))
-        prev_time = now
-        evaluator.update_fps(fps)
-
-        cv2.imshow('Visual Squat AI Trainer', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
-    gc.collect()
+def run(src=0, profiler=None, roi_size=None):
+    """Desktop loop (exercises.runner); roi_size infers on a tracked crop of the full-resolution frame"""
+    from exercises.runner import run as run_exercise
+    run_exercise('squat', src, profiler=profiler, roi_size=roi_size)
 
 
 # If you want to run as a script locally:
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--src', default='0', help="0 for webcam, or path/URL to video")
+    parser.add_argument('--roi', type=int, default=None, help="Infer on a tracked person crop of this size")
     args = parser.parse_args()
     try:
         src = int(args.src)
     except ValueError:
         src = args.src
-    run(src)
+    run(src, roi_size=args.roi)
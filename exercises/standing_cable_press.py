@@ -1,64 +1,50 @@
+import time
 import cv2
 import mediapipe as mp
-import numpy as np
+from exercises.base import EvalResult, StreamingEvaluator
+from utils.angle_calculator import angle_3pts
+from utils.filters import MovingAverage, make_filter
+from utils.overlay import SkeletonRenderer
+from utils.pose_backend import create_pose
+from utils.segmentation import IDLE, TURNED, RepSegmenter
 import argparse
-import time
-import gc
-from collections import deque
-
-# =========================
-# Helper functions
-# =========================
-def angle_3pts(a, b, c):
-    """Calculate angle between three points a-b-c (in degrees)."""
-    try:
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-
-        ba = a - b
-        bc = c - b
-
-        cosine = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
-        angle = np.arccos(np.clip(cosine, -1.0, 1.0))
-        return np.degrees(angle)
-    except Exception:
-        return None
-
-
-def moving_average(values):
-    if not values:
-        return None
-    return sum(values) / len(values)
-
 
 # =========================
 # Standing Cable Press Evaluator
 # =========================
-class StandingCablePressEvaluator:
-    def __init__(self, min_chest=40, max_chest=120, elbow_tolerance=30, cooldown_frames=10):
+class StandingCablePressEvaluator(StreamingEvaluator):
+    REP_ATTR = 'counter'
+
+    def __init__(self, min_chest=40, max_chest=120, elbow_tolerance=0.05, cooldown_s=0.35,
+                 smoothing='sma'):
         # thresholds
         self.min_chest = min_chest
         self.max_chest = max_chest
-        self.elbow_tol = elbow_tolerance
-        self.cooldown = cooldown_frames
+        self.elbow_tol = elbow_tolerance  # elbow vs shoulder height, as a fraction of frame height
+        self.cooldown = cooldown_s  # seconds after a counted press before the next one / feedback
 
         # state
         self.stage = "start"
         self.counter = 0
         self.feedback = "Assume starting position"
         self.feedback_color = (0, 165, 255)  # Orange for neutral
-        self.cooldown_timer = 0
-        self.angle_hist = deque(maxlen=5)
+        # Chest angle peaks at full extension: counted as soon as it passes max_chest + 5,
+        # re-armed once it comes back below min_chest - 5
+        self.segmenter = RepSegmenter(enter=max_chest + 5, rest=min_chest - 5, mode='peak',
+                                      count_at='turn', min_rep_s=cooldown_s)
+        self.last_rep_time = float('-inf')
+        self.angle_f = make_filter(smoothing, 5)
         self.posture_ok = False
         self.elbow_alignment_ok = False
 
         # mediapipe
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(min_detection_confidence=0.7,
-                                      min_tracking_confidence=0.7)
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        self.pose = None  # built on first process(); eval_and_draw() callers bring their own
+        self.skeleton = SkeletonRenderer(thickness=3, radius=4)
+        self.fps_f = MovingAverage(10)
+
+    def update_fps(self, fps):
+        self.fps_f.update(fps)
 
     def check_posture(self, landmarks, side):
         """Check if user has proper posture"""
@@ -90,135 +76,153 @@ class StandingCablePressEvaluator:
         except:
             return False
 
-    def check_elbow_alignment(self, shoulder, elbow, wrist):
-        """Check if elbows are at correct height (shoulder level)"""
+    def check_elbow_alignment(self, shoulder, elbow):
+        """Check if elbows are at correct height (shoulder level); landmarks in normalised coords"""
         try:
             # Elbow should be at approximately the same height as shoulder
-            vertical_diff = abs(elbow[1] - shoulder[1])
-            return vertical_diff < 0.05  # Tolerance for alignment
+            vertical_diff = abs(elbow.y - shoulder.y)
+            return vertical_diff < self.elbow_tol
         except:
             return False
 
     def process(self, frame):
+        if self.pose is None:
+            self.pose = create_pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
         img = frame.copy()
-        h, w = img.shape[:2]
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         res = self.pose.process(rgb)
 
         if res.pose_landmarks:
-            lm = res.pose_landmarks.landmark
-
-            # pick side with better visibility
-            side = 'LEFT' if (lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility >
-                              lm[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility) else 'RIGHT'
-
-            s = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_SHOULDER").value]
-            e = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_ELBOW").value]
-            w_ = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_WRIST").value]
-            hip = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_HIP").value]
-
-            # Convert to pixel coordinates
-            coords = [
-                (s.x * w, s.y * h),
-                (e.x * w, e.y * h),
-                (w_.x * w, w_.y * h),
-                (hip.x * w, hip.y * h)
-            ]
-            
-            # Calculate angles
-            angle_elbow = angle_3pts(*coords[:3])
-            angle_chest = angle_3pts(coords[0], coords[3], coords[2])  # shoulder-hip-wrist
-
-            # Check posture and alignment
-            self.posture_ok = self.check_posture(lm, side)
-            self.elbow_alignment_ok = self.check_elbow_alignment(coords[0], coords[1], coords[2])
+            img = self.eval_and_draw(img, res.pose_landmarks.landmark)
+        else:
+            cv2.putText(img, "No person detected - Stand in frame", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
-            if angle_chest:
-                self.angle_hist.append(angle_chest)
-            ch_smooth = np.mean(self.angle_hist) if self.angle_hist else None
+        return img
 
-            # Exercise logic
-            if self.cooldown_timer > 0:
-                self.cooldown_timer -= 1
-                show_feedback = self.feedback
-                feedback_color = self.feedback_color
+    def evaluate(self, lm, w, h, t=None) -> EvalResult:
+        """Posture/alignment checks + rep logic only (no drawing); t is the frame time in seconds"""
+        # pick side with better visibility
+        side = 'LEFT' if (lm[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].visibility >
+                          lm[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].visibility) else 'RIGHT'
+
+        s = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_SHOULDER").value]
+        e = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_ELBOW").value]
+        w_ = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_WRIST").value]
+        hip = lm[getattr(self.mp_pose.PoseLandmark, f"{side}_HIP").value]
+
+        # Convert to pixel coordinates
+        coords = [
+            (s.x * w, s.y * h),
+            (e.x * w, e.y * h),
+            (w_.x * w, w_.y * h),
+            (hip.x * w, hip.y * h)
+        ]
+        
+        # Calculate angles
+        angle_elbow = angle_3pts(*coords[:3])
+        angle_chest = angle_3pts(coords[0], coords[3], coords[2])  # shoulder-hip-wrist
+
+        # Check posture and alignment
+        self.posture_ok = self.check_posture(lm, side)
+        self.elbow_alignment_ok = self.check_elbow_alignment(s, e)
+
+        now = time.time() if t is None else t
+        if angle_chest:
+            self.angle_f.update(angle_chest, now)  # time-aware filters follow the real frame interval
+        ch_smooth = self.angle_f.value
+
+        # Rep logic: only bad posture stops counting; alignment and cooldown gate the feedback
+        event = None
+        if not self.posture_ok:
+            self.segmenter.update(None, now)
+        elif ch_smooth:
+            event = self.segmenter.update(ch_smooth, now)
+
+        if event is not None:
+            self.counter = event.n
+            self.last_rep_time = now
+            self.feedback = "✅ Good press! Now control the return"
+            self.feedback_color = (0, 255, 0)  # Green for good rep
+        elif now - self.last_rep_time < self.cooldown:
+            pass  # keep the "Good press" feedback up for the cooldown
+        else:
+            if not self.posture_ok:
+                self.feedback = "⚠️ Stand straight, knees slightly bent"
+                self.feedback_color = (0, 0, 255)  # Red for bad posture
+            elif not self.elbow_alignment_ok and ch_smooth and ch_smooth < self.min_chest:
+                self.feedback = "⚠️ Keep elbows at shoulder level"
+                self.feedback_color = (0, 0, 255)  # Red for bad alignment
+            elif ch_smooth and ch_smooth > self.max_chest + 5:
+                self.feedback = "↗ Press forward fully"
+                self.feedback_color = (0, 165, 255)  # Orange for guidance
+            elif ch_smooth and ch_smooth < self.min_chest - 5:
+                self.feedback = "⬅ Control your return"
+                self.feedback_color = (0, 165, 255)  # Orange for guidance
             else:
-                # Check if posture is correct before counting reps
-                if not self.posture_ok:
-                    self.feedback = "⚠️ Stand straight, knees slightly bent"
-                    self.feedback_color = (0, 0, 255)  # Red for bad posture
-                elif not self.elbow_alignment_ok and ch_smooth and ch_smooth < self.min_chest:
-                    self.feedback = "⚠️ Keep elbows at shoulder level"
-                    self.feedback_color = (0, 0, 255)  # Red for bad alignment
-                elif ch_smooth and ch_smooth > self.max_chest + 5:
-                    if self.stage == 'returning':
-                        self.stage = 'pressing'
-                        self.counter += 1
-                        self.feedback = "✅ Good press! Now control the return"
-                        self.feedback_color = (0, 255, 0)  # Green for good rep
-                        self.cooldown_timer = self.cooldown
-                    else:
-                        self.feedback = "↗ Press forward fully"
-                        self.feedback_color = (0, 165, 255)  # Orange for guidance
-                elif ch_smooth and ch_smooth < self.min_chest - 5:
-                    self.stage = 'returning'
-                    self.feedback = "⬅ Control your return"
-                    self.feedback_color = (0, 165, 255)  # Orange for guidance
+                if ch_smooth and ch_smooth < self.min_chest:
+                    self.feedback = "✅ Ready to press"
+                    self.feedback_color = (0, 255, 0)  # Green for good position
                 else:
-                    if ch_smooth and ch_smooth < self.min_chest:
-                        self.feedback = "✅ Ready to press"
-                        self.feedback_color = (0, 255, 0)  # Green for good position
-                    else:
-                        self.feedback = "↔ Maintain control"
-                        self.feedback_color = (0, 165, 255)  # Orange for neutral
-
-                show_feedback = self.feedback
-                feedback_color = self.feedback_color
-
-            # Draw landmarks with color coding based on form
-            landmark_color = (0, 255, 0) if (self.posture_ok and self.elbow_alignment_ok) else (0, 0, 255)
-            connection_color = (0, 255, 0) if (self.posture_ok and self.elbow_alignment_ok) else (0, 0, 255)
-            
-            self.mp_drawing.draw_landmarks(
-                img, res.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
-                self.mp_drawing.DrawingSpec(color=landmark_color, thickness=3, circle_radius=4),
-                self.mp_drawing.DrawingSpec(color=connection_color, thickness=3, circle_radius=2),
-            )
-
-            # Draw angle text
-            if ch_smooth:
-                cv2.putText(img, f"Chest Angle: {int(ch_smooth)}°", (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            if angle_elbow:
-                cv2.putText(img, f"Elbow Angle: {int(angle_elbow)}°", (10, 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-            # Draw status box
-            cv2.rectangle(img, (0, h - 100), (w, h), (0, 0, 0), -1)
-            cv2.putText(img, f"Reps: {self.counter}", (10, h - 70),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-            cv2.putText(img, f"Stage: {self.stage}", (10, h - 40),
+                    self.feedback = "↔ Maintain control"
+                    self.feedback_color = (0, 165, 255)  # Orange for neutral
+
+        phase = self.segmenter.phase
+        self.stage = 'start' if phase == IDLE else 'pressing' if phase == TURNED else 'returning'
+
+        return EvalResult(
+            reps=self.counter, state=self.stage, feedback=self.feedback,
+            good=self.feedback_color != (0, 0, 255), visible=True, t=t,
+            angles={'chest': ch_smooth, 'elbow': angle_elbow},
+            flags={'posture_ok': self.posture_ok, 'elbow_alignment_ok': self.elbow_alignment_ok},
+            extra={'side': side, 'feedback_color': self.feedback_color, 'fps': self.fps_f.value},
+        )
+
+    def render(self, img, lm, result: EvalResult):
+        """Colour-coded skeleton, angle readouts and status box for an evaluate() result"""
+        h, w = img.shape[:2]
+        posture_ok = result.flags['posture_ok']
+        elbow_alignment_ok = result.flags['elbow_alignment_ok']
+        ch_smooth = result.angles['chest']
+        angle_elbow = result.angles['elbow']
+
+        # Draw landmarks with color coding based on form
+        form_color = (0, 255, 0) if (posture_ok and elbow_alignment_ok) else (0, 0, 255)
+        self.skeleton.draw(img, lm, form_color, form_color)
+
+        # Draw angle text
+        if ch_smooth:
+            cv2.putText(img, f"Chest Angle: {int(ch_smooth)}°", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        
+        if angle_elbow:
+            cv2.putText(img, f"Elbow Angle: {int(angle_elbow)}°", (10, 60),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.putText(img, show_feedback, (10, h - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, feedback_color, 2)
-
-            # Draw posture indicator
-            posture_status = "Good Posture" if self.posture_ok else "Fix Posture"
-            posture_color = (0, 255, 0) if self.posture_ok else (0, 0, 255)
-            cv2.putText(img, posture_status, (w - 200, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, posture_color, 2)
-
-            # Draw elbow alignment indicator
-            elbow_status = "Good Elbow Position" if self.elbow_alignment_ok else "Fix Elbow Position"
-            elbow_color = (0, 255, 0) if self.elbow_alignment_ok else (0, 0, 255)
-            cv2.putText(img, elbow_status, (w - 250, 60),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, elbow_color, 2)
-
-        else:
-            cv2.putText(img, "No person detected - Stand in frame", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
+        # Draw status box
+        cv2.rectangle(img, (0, h - 100), (w, h), (0, 0, 0), -1)
+        cv2.putText(img, f"Reps: {result.reps}", (10, h - 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        cv2.putText(img, f"Stage: {result.state}", (10, h - 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        cv2.putText(img, result.feedback, (10, h - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, result.extra['feedback_color'], 2)
+
+        # Draw posture indicator
+        posture_status = "Good Posture" if posture_ok else "Fix Posture"
+        posture_color = (0, 255, 0) if posture_ok else (0, 0, 255)
+        cv2.putText(img, posture_status, (w - 200, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, posture_color, 2)
+
+        # Draw elbow alignment indicator
+        elbow_status = "Good Elbow Position" if elbow_alignment_ok else "Fix Elbow Position"
+        elbow_color = (0, 255, 0) if elbow_alignment_ok else (0, 0, 255)
+        cv2.putText(img, elbow_status, (w - 250, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, elbow_color, 2)
+
+        if result.extra.get('fps'):
+            cv2.putText(img, f"FPS: {result.extra['fps']:.1f}", (10, 90),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
         return img
 
     def reset(self):
@@ -226,63 +230,22 @@ class StandingCablePressEvaluator:
         self.stage = "start"
         self.feedback = "Assume starting position"
         self.feedback_color = (0, 165, 255)
-        self.angle_hist.clear()
+        self.segmenter.reset()
+        self.last_rep_time = float('-inf')
+        self.angle_f.reset()
+        self.fps_f.reset()
         self.posture_ok = False
         self.elbow_alignment_ok = False
+        super().reset()
 
 
 # =========================
 # Runner
 # =========================
-def run(src=0):
-    cap = cv2.VideoCapture(src)
-    if not cap.isOpened():
-        raise SystemExit(f"Cannot open video source: {src}")
-
-    evaluator = StandingCablePressEvaluator()
-    prev_time = time.time()
-    fps_hist = deque(maxlen=10)
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Resize for consistent view
-        new_w = 960
-        aspect_ratio = frame.shape[0] / frame.shape[1]
-        frame = cv2.resize(frame, (new_w, int(new_w * aspect_ratio)))
-
-        frame = evaluator.process(frame)
-
-        # Calculate FPS
-        now = time.time()
-        fps = 1.0 / max(1e-6, (now - prev_time))
-        prev_time = now
-        fps_hist.append(fps)
-        avg_fps = moving_average(fps_hist) if fps_hist else fps
-        
-        # Display FPS
-        cv2.putText(frame, f"FPS: {avg_fps:.1f}" if avg_fps else f"FPS: {fps:.1f}", 
-                    (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 2)
-
-        # Display instructions
-        cv2.putText(frame, "Press 'r' to reset counter", (frame.shape[1] - 250, frame.shape[0] - 70),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-        cv2.putText(frame, "Press 'q' to quit", (frame.shape[1] - 250, frame.shape[0] - 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-
-        cv2.imshow('Standing Cable Press AI Trainer', frame)
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('r'):
-            evaluator.reset()
-
-    cap.release()
-    cv2.destroyAllWindows()
-    gc.collect()
+def run(src=0, profiler=None):
+    """Desktop loop (exercises.runner); 'r' resets the counter"""
+    from exercises.runner import run as run_exercise
+    run_exercise('press', src, profiler=profiler)
 
 
 # If run as script
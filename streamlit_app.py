@@ -1,4 +1,5 @@
 # reanmed from app.py to streamlit_app.py
+from utils import startup  # first, so the startup report covers the imports below
 import cv2
 import av
 import time
@@ -6,12 +7,9 @@ import streamlit as st
 from streamlit_webrtc import webrtc_streamer, VideoProcessorBase, WebRtcMode
 import logging
 import gc
+import os
 import random
-from typing import List, Dict, Any, Tuple, Optional
-import math
-from collections import deque
-import numpy as np
-from dataclasses import dataclass
+from typing import Dict, Tuple
 
 # Configure logging to reduce memory usage
 logging.getLogger("streamlit").setLevel(logging.WARNING)
@@ -486,28 +484,6 @@ MOTIVATIONAL_QUOTES = [
 ]
 
 # ----------------- Utility Functions -----------------
-def angle_3pts(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> Optional[float]:
-    """Calculate angle between three points (b as vertex)"""
-    try:
-        ang = math.degrees(math.atan2(c[1]-b[1], c[0]-b[0]) - 
-                          math.atan2(a[1]-b[1], a[0]-b[0]))
-        return ang + 360 if ang < 0 else ang
-    except:
-        return None
-
-def line_angle_deg(a: Tuple[float, float], b: Tuple[float, float]) -> float:
-    """Calculate angle of line between two points relative to horizontal"""
-    try:
-        return math.degrees(math.atan2(b[1]-a[1], b[0]-a[0]))
-    except:
-        return 0.0
-
-def moving_average(deque_obj: deque) -> Optional[float]:
-    """Calculate moving average of deque object"""
-    if not deque_obj:
-        return None
-    return sum(deque_obj) / len(deque_obj)
-
 def optimized_gc():
     """Optimized garbage collection for long-running sessions"""
     if gc.isenabled():
@@ -518,272 +494,61 @@ def calculate_calories(reps: int, duration_min: int) -> int:
     """Calculate estimated calories burned for squats"""
     return int(reps * 0.5 + duration_min * 2)
 
-# ----------------- Configuration -----------------
-@dataclass
-class Config:
-    shoulder_tol_deg: float = 5.0
-    shoulder_tol_pixels: int = 20
-    torso_tol_deg: float = 8.0
-    knee_green_min: float = 70.0
-    knee_green_max: float = 100.0
-    knee_diff_warn_deg: float = 10.0
-    shoulder_sym_tol_px: int = 25
-    bottom_hold_ms: int = 150
-    min_stand_knee_angle: float = 150.0
-    max_deep_knee_angle: float = 60.0
-    smoothing_win: int = 5
-    draw_scale: float = 1.0
-    fps_smoothing: int = 20
-
-CFG = Config()
-
-# ----------------- MediaPipe Setup -----------------
-import mediapipe as mp
-from mediapipe.framework.formats import landmark_pb2
-
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
-
-LMS = mp_pose.PoseLandmark
-
-KEYS = {
-    'l_shoulder': LMS.LEFT_SHOULDER,
-    'r_shoulder': LMS.RIGHT_SHOULDER,
-    'l_hip': LMS.LEFT_HIP,
-    'r_hip': LMS.RIGHT_HIP,
-    'l_knee': LMS.LEFT_KNEE,
-    'r_knee': LMS.RIGHT_KNEE,
-    'l_ankle': LMS.LEFT_ANKLE,
-    'r_ankle': LMS.RIGHT_ANKLE,
-}
-
-def get_point(landmarks, name: str, w: int, h: int) -> Tuple[int, int, float]:
-    lid = KEYS[name].value
-    lm = landmarks[lid]
-    return int(lm.x * w), int(lm.y * h), lm.visibility
-
 # ----------------- Squat Evaluator -----------------
-class SquatEvaluator:
-    def __init__(self, cfg: Config):
-        self.cfg = cfg
-        self.left_knee_hist = deque(maxlen=cfg.smoothing_win)
-        self.right_knee_hist = deque(maxlen=cfg.smoothing_win)
-        self.hip_center_y_hist = deque(maxlen=cfg.smoothing_win)
-        self.shoulder_line_hist = deque(maxlen=cfg.smoothing_win)
-        self.rep_count = 0
-        self.state = 'up'
-        self.bottom_timestamp = 0
-        self.last_feedback = ""
-        self.fps_hist = deque(maxlen=cfg.fps_smoothing)
-
-    def update_fps(self, fps: float):
-        self.fps_hist.append(fps)
-
-    def eval_and_draw(self, frame: np.ndarray, landmarks) -> np.ndarray:
-        h, w = frame.shape[:2]
-
-        # Extract key points
-        pts = {}
-        for k in KEYS.keys():
-            x, y, vis = get_point(landmarks, k, w, h)
-            pts[k] = (x, y, vis)
-
-        # Visibility gate
-        needed = ['l_shoulder','r_shoulder','l_hip','r_hip','l_knee','r_knee','l_ankle','r_ankle']
-        if any(pts[k][2] < 0.5 for k in needed):
-            cv2.putText(frame, 'Low visibility: step back / adjust camera',
-                        (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-            return frame
-
-        # xy only
-        P = {k:(pts[k][0], pts[k][1]) for k in pts}
-
-        # Shoulder checks
-        shoulder_angle = line_angle_deg(P['l_shoulder'], P['r_shoulder'])
-        self.shoulder_line_hist.append(shoulder_angle)
-        sh_ang_smooth = moving_average(self.shoulder_line_hist) or 0.0
-
-        # Torso parallel = shoulder line ~ horizontal
-        torso_ok = abs(sh_ang_smooth) <= self.cfg.torso_tol_deg
-
-        # Shoulder level fallback via y diff
-        shoulder_y_diff = abs(P['l_shoulder'][1] - P['r_shoulder'][1])
-        shoulder_ok = torso_ok or (shoulder_y_diff <= self.cfg.shoulder_tol_pixels)
-
-        # Knee angles
-        lk = angle_3pts(P['l_hip'], P['l_knee'], P['l_ankle'])
-        rk = angle_3pts(P['r_hip'], P['r_knee'], P['r_ankle'])
-        if lk is not None:
-            self.left_knee_hist.append(lk)
-        if rk is not None:
-            self.right_knee_hist.append(rk)
-        lk_s = moving_average(self.left_knee_hist)
-        rk_s = moving_average(self.right_knee_hist)
-
-        # Shoulder symmetry
-        left_shoulder_to_ground = h - P['l_shoulder'][1]
-        right_shoulder_to_ground = h - P['r_shoulder'][1]
-        shoulder_sym_ok = abs(left_shoulder_to_ground - right_shoulder_to_ground) <= self.cfg.shoulder_sym_tol_px
-
-        # Hip center depth for rep logic
-        hip_center_y = int((P['l_hip'][1] + P['r_hip'][1]) / 2)
-        self.hip_center_y_hist.append(hip_center_y)
-
-        # Depth quality from knees
-        depth_good = (
-            lk_s is not None and rk_s is not None and
-            self.cfg.knee_green_min <= (lk_s + rk_s)/2 <= self.cfg.knee_green_max
-        )
-        too_shallow = (
-            (lk_s is not None and lk_s > self.cfg.knee_green_max) and
-            (rk_s is not None and rk_s > self.cfg.knee_green_max)
-        )
-        too_deep = (
-            (lk_s is not None and lk_s < self.cfg.max_deep_knee_angle) or
-            (rk_s is not None and rk_s < self.cfg.max_deep_knee_angle)
-        )
-
-        knee_diff = None
-        if lk_s is not None and rk_s is not None:
-            knee_diff = abs(lk_s - rk_s)
-        knees_balanced = (knee_diff is not None and knee_diff <= self.cfg.knee_diff_warn_deg)
-
-        # Rep state machine
-        now = int(time.time() * 1000)
-        if self.state == 'up':
-            if depth_good:
-                self.state = 'bottom_candidate'
-                self.bottom_timestamp = now
-        elif self.state == 'bottom_candidate':
-            if depth_good and (now - self.bottom_timestamp) >= self.cfg.bottom_hold_ms:
-                self.state = 'bottom'
-        elif self.state == 'bottom':
-            if (lk_s is not None and rk_s is not None and
-                lk_s >= self.cfg.min_stand_knee_angle and rk_s >= self.cfg.min_stand_knee_angle):
-                self.rep_count += 1
-                self.state = 'up'
-        else:
-            self.state = 'up'
-
-        # Feedback
-        feedback = []
-        if not shoulder_ok:
-            side = 'Left' if P['l_shoulder'][1] > P['r_shoulder'][1] else 'Right'
-            feedback.append(f"Raise {side} shoulder")
-        if not torso_ok:
-            feedback.append("Keep shoulders parallel to ground")
-        if lk_s is None or rk_s is None:
-            feedback.append("Move into frame fully")
-        else:
-            if too_shallow:
-                feedback.append("Go deeper")
-            if too_deep:
-                feedback.append("Too deep; reduce depth")
-            if not knees_balanced:
-                feedback.append("Balance both knees (align)")
-        if not shoulder_sym_ok:
-            feedback.append("Keep shoulders level")
-
-        if not feedback:
-            feedback_text = "Perfect Squat"
-            feedback_color = (0, 200, 0)
-        else:
-            feedback_text = " | ".join(feedback)
-            feedback_color = (0, 0, 255)
-        self.last_feedback = feedback_text
-
-        # Drawing
-        mp_drawing.draw_landmarks(
-            image=frame,
-            landmark_list=landmark_pb2.NormalizedLandmarkList(
-                landmark=[
-                    landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z, visibility=lm.visibility)
-                    for lm in landmarks
-                ]
-            ),
-            connections=mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=mp_drawing.DrawingSpec(color=(255, 255, 255), thickness=2, circle_radius=2),
-            connection_drawing_spec=mp_drawing.DrawingSpec(color=(180, 180, 180), thickness=2)
-        )
-
-        # Shoulder line & horizontal ref
-        sh_col = (0,200,0) if shoulder_ok else (0,0,255)
-        cv2.line(frame, P['l_shoulder'], P['r_shoulder'], sh_col, 3)
-        mid_sh = ((P['l_shoulder'][0]+P['r_shoulder'][0])//2,
-                  (P['l_shoulder'][1]+P['r_shoulder'][1])//2)
-        cv2.line(frame, (mid_sh[0]-60, mid_sh[1]), (mid_sh[0]+60, mid_sh[1]), (200,200,200), 1)
-        cv2.putText(frame, f"Shoulder ang {sh_ang_smooth:.1f}deg",
-                    (mid_sh[0]-100, mid_sh[1]-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, sh_col, 2)
-
-        # Knee angles + coloring
-        def draw_knee(label, hip, knee, ankle, ang_val, is_left=True):
-            color = (0,200,0)
-            if ang_val is None:
-                color = (0,0,255)
-            else:
-                if ang_val > CFG.knee_green_max:
-                    color = (0,165,255)
-                elif ang_val < CFG.max_deep_knee_angle:
-                    color = (0,0,255)
-                else:
-                    color = (0,200,0)
-            cv2.line(frame, hip, knee, color, 3)
-            cv2.line(frame, knee, ankle, color, 3)
-            tx = knee[0] - (60 if is_left else -10)
-            ty = knee[1] - 10
-            txt = f"{label}: --" if ang_val is None else f"{label}: {ang_val:.0f}"
-            cv2.putText(frame, txt, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-        draw_knee('L_knee', P['l_hip'], P['l_knee'], P['l_ankle'], lk_s, is_left=True)
-        draw_knee('R_knee', P['r_hip'], P['r_knee'], P['r_ankle'], rk_s, is_left=False)
-
-        # Knee diff
-        if knee_diff is not None:
-            kd_col = (0,200,0) if knees_balanced else (0,0,255)
-            cv2.putText(frame, f"Knee diff {knee_diff:.0f}deg", (20, h-40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, kd_col, 2)
-
-        # Shoulder symmetry lines to ground
-        l_col = (0,200,0) if shoulder_sym_ok else (0,0,255)
-        for side in ['l_shoulder','r_shoulder']:
-            x, y = P[side]
-            cv2.line(frame, (x, y), (x, h), l_col, 2)
-        cv2.putText(frame, "Shoulder symmetry", (w-240, h-40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, l_col, 2)
-
-        # Status panel
-        panel = np.zeros((110, w, 3), dtype=np.uint8)
-        panel[:] = (25,25,25)
-        ok = (0,200,0); bad=(0,0,255); white=(255,255,255)
-
-        def flag(x, y, text, good=True):
-            col = ok if good else bad
-            cv2.circle(panel, (x, y), 8, col, -1)
-            cv2.putText(panel, text, (x+15, y+5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, white, 2)
-
-        flag(20, 25, 'Shoulders level', shoulder_ok)
-        flag(20, 55, 'Torso parallel', torso_ok)
-        good_knees = False
-        if lk_s is not None and rk_s is not None:
-            good_knees = (CFG.knee_green_min <= (lk_s+rk_s)/2 <= CFG.knee_green_max)
-        flag(240, 25, 'Depth ~90°', good_knees)
-        flag(240, 55, 'Knees balanced', knees_balanced)
-        flag(460, 25, 'Shoulders symmetric', shoulder_sym_ok)
-        cv2.putText(panel, f"Reps: {self.rep_count}", (460, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180,255,180), 2)
-
-        # Feedback text
-        cv2.putText(panel, self.last_feedback, (20, 95),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,200,0) if not feedback else (0,0,255), 2)
-
-        # FPS
-        fps_avg = moving_average(self.fps_hist)
-        if fps_avg is not None:
-            cv2.putText(panel, f"FPS: {fps_avg:.1f}", (w-120, 25),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (180,180,255), 2)
-
-        frame = np.vstack([panel, frame])
-        return frame
+# Shared with the desktop runner so both score squats identically
+from exercises.registry import get_exercise
+from dataclasses import replace
+from utils import pose_backend
+from utils.pose_backend import create_pose
+from utils.analytics import AnalyticsStore
+from utils.async_infer import LatestFrameWorker
+from utils.clock import av_frame_time
+from utils.landmark_cache import array_to_landmarks
+from utils.profiling import StageProfiler, get_profiler
+from utils.roi import RoiTracker
+from utils.scheduler import AdaptiveScheduler
+from utils.sessions import SessionLimitError, SessionManager
+from utils.web_frame import (decode_web_frame, evaluate_web_landmarks, infer_web_frame, process_web_frame,
+                             redraw_web_frame)
+startup.once("imports")  # modules are cached: later script reruns import nothing
+
+# ----------------- Session Manager -----------------
+# Concurrent trainees admitted per server process (see benchmarks/load_test.py)
+MAX_SESSIONS = int(os.environ.get("SQUAT_MAX_SESSIONS", "4"))
+STREAM_FPS = 10  # matches the frameRate asked of the browser below
+# Run inference on a per-session worker thread (latest frame wins) instead of inside recv()
+ASYNC_INFERENCE = os.environ.get("SQUAT_ASYNC_INFERENCE", "1") != "0"
+# Infer on a tracked person crop of this size (0 = whole frame); pays off on wide camera views
+ROI_SIZE = int(os.environ.get("SQUAT_ROI_SIZE", "0"))
+# Run each connection's pose graph in a child process fed through shared memory (multi-core hosts;
+# ignored with SQUAT_ROI_SIZE, whose crop needs the session's tracker)
+POSE_PROCESSES = os.environ.get("SQUAT_POSE_PROCESSES", "0") != "0" and not ROI_SIZE
+EXERCISE = get_exercise("squat")  # evaluator factory shared with app.py and the batch pipeline
+# Per-frame session logs for the history charts ("" = don't log)
+ANALYTICS_DIR = os.environ.get("SQUAT_ANALYTICS_DIR", "")
+
+@st.cache_resource
+def get_analytics_store():
+    """One store (and writer thread) per server process; None when logging is off"""
+    return AnalyticsStore(ANALYTICS_DIR) if ANALYTICS_DIR else None
+
+@st.cache_resource
+def get_session_manager() -> SessionManager:
+    """
+    One manager per server process, shared by every browser session
+
+    Cached across script reruns, so Pose graphs are built once per process;
+    the first one is built here, on the first page load, not on the first connect.
+    """
+    store = get_analytics_store()
+    manager = SessionManager(EXERCISE.factory, create_pose, max_sessions=MAX_SESSIONS,
+                             roi_factory=(lambda: RoiTracker(ROI_SIZE)) if ROI_SIZE else None,
+                             log_factory=(lambda sid: store.open(sid, EXERCISE.name)) if store else None)
+    manager.pool.warm(1)
+    startup.mark("session manager")
+    if startup.enabled():
+        startup.print_report()
+    return manager
 
 # ----------------- Session State Management -----------------
 def init_session_state():
@@ -804,51 +569,21 @@ def init_session_state():
 init_session_state()
 
 # ----------------- Squat Callback -----------------
-_prev_time = time.time()
-pose = mp_pose.Pose(min_detection_confidence=0.6,
-                    min_tracking_confidence=0.6,
-                    model_complexity=1,
-                    smooth_landmarks=True)
-
-squat_evaluator = SquatEvaluator(CFG)
-
-def squat_callback(frame: av.VideoFrame) -> Tuple[av.VideoFrame, Dict]:
-    """Process frame for squat exercise"""
-    global _prev_time
+def squat_callback(frame: av.VideoFrame, session, profiler=None) -> Tuple[av.VideoFrame, Dict]:
+    """Process frame for squat exercise with this connection's Pose and evaluator"""
+    prof = get_profiler(profiler)
     
     try:
-        # Convert to OpenCV format
-        img = frame.to_ndarray(format="bgr24")
-        h, w = img.shape[:2]
-        
-        # Resize for performance
-        new_w = 640
-        img = cv2.resize(img, (new_w, int(new_w * (h/w))))
+        # Convert to OpenCV format, already at processing size
+        img = decode_web_frame(session, frame)
+        prof.mark('decode')
         
-        # Process with MediaPipe
-        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb)
+        img, metrics = process_web_frame(session, img, prof, t=av_frame_time(frame))
         
-        # Calculate FPS
-        now = time.time()
-        fps = 1.0 / max(1e-6, (now - _prev_time))
-        _prev_time = now
-        squat_evaluator.update_fps(fps)
-        
-        metrics = {
-            "reps": squat_evaluator.rep_count,
-            "feedback": squat_evaluator.last_feedback,
-            "fps": fps
-        }
-        
-        if results.pose_landmarks:
-            img = squat_evaluator.eval_and_draw(img, results.pose_landmarks.landmark)
-        else:
-            cv2.putText(img, 'No person detected', (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-            metrics["feedback"] = "Awaiting pose detection..."
-        
-        return av.VideoFrame.from_ndarray(img, format="bgr24"), metrics
+        prof.draw(img)
+        out = av.VideoFrame.from_ndarray(img, format="bgr24")
+        prof.mark('encode')
+        return out, metrics
         
     except Exception as e:
         logging.error(f"Squat callback error: {e}")
@@ -867,39 +602,124 @@ class SquatProcessor(VideoProcessorBase):
         super().__init__()
         self.latest_metrics = {"reps": 0, "feedback": "Neural Link Initializing...", "fps": 0}
         self.frame_count = 0
-        self.skip_frames = 3  # Process every 4th frame
+        # Inference cadence follows measured latency (inline or on the worker); skipped frames
+        # get the last overlay
+        self.scheduler = AdaptiveScheduler(target_fps=STREAM_FPS, max_load=0.8, max_interval=6)
+        self._scheduled = 0  # worker results already fed back to the scheduler
         self.last_gc = time.time()
         self.last_feedback_time = 0
         self.feedback_cooldown = 3
+        # Per-stage latency, recorded only by the thread that infers (recv, the worker or the
+        # pose-process result thread); recv and the UI just read it. Overlay toggled from the UI
+        self.profiler = StageProfiler()
+        self.worker = None
+        self.pose_process = None
+        # Own Pose + evaluator for this connection (None when the server is full)
+        self.manager = get_session_manager()
+        try:
+            self.session = self.manager.open()
+        except SessionLimitError as e:
+            self.session = None
+            self.latest_metrics["feedback"] = str(e)
+            logging.warning(str(e))
+            return
+        if POSE_PROCESSES:
+            # Pose runs on another core; this process only evaluates, draws and encodes
+            from utils.shm_ring import PoseProcess
+            self.pose_process = PoseProcess(replace(pose_backend.DEFAULT, **EXERCISE.pose_overrides),
+                                            self._on_pose, name=f"pose-{self.session.id}")
+        elif ASYNC_INFERENCE:
+            # recv() never waits on MediaPipe: the worker takes the newest frame, drops stale ones
+            self.worker = LatestFrameWorker(self._infer, name=f"pose-{self.session.id}")
+
+    def on_ended(self):
+        if self.worker is not None:
+            self.worker.close()
+        if self.pose_process is not None:
+            self.pose_process.close()
+        if self.session is not None:
+            self.manager.close(self.session)
+
+    def _update_metrics(self, metrics: Dict):
+        current_time = time.time()
+        if ("feedback" in metrics and 
+            (current_time - self.last_feedback_time > self.feedback_cooldown or 
+             "good" not in metrics["feedback"].lower())):
+            self.latest_metrics.update(metrics)
+            self.last_feedback_time = current_time
+        else:
+            reps = metrics.get("reps", self.latest_metrics["reps"])
+            fps = metrics.get("fps", self.latest_metrics["fps"])
+            self.latest_metrics.update({"reps": reps, "fps": fps})
+
+        # Garbage collection
+        if current_time - self.last_gc > 5:
+            optimized_gc()
+            self.last_gc = current_time
+
+    def _infer(self, item):
+        """Worker thread: pose + evaluation on the newest (frame, PTS) (drawing happens in recv)"""
+        img, t = item
+        self.profiler.start()
+        _, metrics = infer_web_frame(self.session, img, self.profiler, t=t)
+        self._update_metrics(metrics)
+        self.profiler.mark('metrics')
+        self.profiler.end()
+
+    def _on_pose(self, img, landmarks, t):
+        """Result thread of the pose process: evaluate its landmarks (the frame is still in its slot)"""
+        self.profiler.start()
+        if landmarks is not None:
+            landmarks = array_to_landmarks(landmarks)
+        metrics = evaluate_web_landmarks(self.session, img.shape[1], img.shape[0], landmarks, t,
+                                         self.profiler)
+        self._update_metrics(metrics)
+        self.profiler.mark('metrics')
+        self.profiler.end()
         
     def recv(self, frame: av.VideoFrame) -> av.VideoFrame:
+        if self.session is None:
+            img = frame.to_ndarray(format="bgr24")
+            cv2.putText(img, "Server busy - try again shortly", (20, 40),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return av.VideoFrame.from_ndarray(img, format="bgr24")
         try:
-            # Skip frames for performance
             self.frame_count += 1
-            if self.frame_count % self.skip_frames != 0:
-                return frame
+            if self.pose_process is not None:
+                # submit() copies into shared memory (or drops the frame when all slots are busy)
+                img = decode_web_frame(self.session, frame)
+                self.pose_process.submit(img, av_frame_time(frame))
+                img = self.profiler.draw(redraw_web_frame(self.session, img))
+                return av.VideoFrame.from_ndarray(img, format="bgr24")
+            if self.worker is not None:
+                # Hand the frame to the worker at the scheduled cadence and composite the most
+                # recent result now; the scheduler only runs on this thread
+                if self.worker.processed != self._scheduled:
+                    self._scheduled = self.worker.processed
+                    self.scheduler.record(self.worker.last_latency_s)
+                img = decode_web_frame(self.session, frame)
+                if self.scheduler.should_process():
+                    self.worker.submit((img, av_frame_time(frame)))
+                    img = img.copy()  # the worker reads img meanwhile, so draw on a copy
+                img = self.profiler.draw(redraw_web_frame(self.session, img))
+                return av.VideoFrame.from_ndarray(img, format="bgr24")
+
+            # Skip frames when inference can't keep up, re-drawing the last overlay
+            if not self.scheduler.should_process():
+                img = redraw_web_frame(self.session, decode_web_frame(self.session, frame))
+                return av.VideoFrame.from_ndarray(img, format="bgr24")
             
             # Process frame with squat callback
-            processed_frame, metrics = squat_callback(frame)
+            self.profiler.start()
+            started = time.perf_counter()
+            processed_frame, metrics = squat_callback(frame, self.session, self.profiler)
+            self.scheduler.record(time.perf_counter() - started)
             
             # Update metrics
             if metrics:
-                current_time = time.time()
-                if ("feedback" in metrics and 
-                    (current_time - self.last_feedback_time > self.feedback_cooldown or 
-                     "good" not in metrics["feedback"].lower())):
-                    self.latest_metrics.update(metrics)
-                    self.last_feedback_time = current_time
-                else:
-                    reps = metrics.get("reps", self.latest_metrics["reps"])
-                    fps = metrics.get("fps", self.latest_metrics["fps"])
-                    self.latest_metrics.update({"reps": reps, "fps": fps})
-            
-            # Garbage collection
-            current_time = time.time()
-            if current_time - self.last_gc > 5:
-                optimized_gc()
-                self.last_gc = current_time
+                self._update_metrics(metrics)
+            self.profiler.mark('metrics')
+            self.profiler.end()
                 
             return processed_frame
             
@@ -935,7 +755,7 @@ webrtc_ctx = webrtc_streamer(
         "video": {
             "width": {"ideal": 320},
             "height": {"ideal": 240},
-            "frameRate": {"ideal": 10, "max": 15}
+            "frameRate": {"ideal": STREAM_FPS, "max": 15}
         },
         "audio": False
     },
@@ -1006,6 +826,56 @@ with col2:
         st.rerun()
 
 # ----------------- Instructions & Tips -----------------
+with st.expander("🛠 DIAGNOSTICS"):
+    show_overlay = st.checkbox("Latency overlay on video", value=False)
+    if webrtc_ctx.video_processor:
+        webrtc_ctx.video_processor.profiler.overlay = show_overlay
+        stage_stats = webrtc_ctx.video_processor.profiler.summary()
+        if stage_stats:
+            st.table([{"stage": stage, **stats} for stage, stats in stage_stats.items()])
+            worker = webrtc_ctx.video_processor.worker
+            if worker is not None:
+                st.caption("Async inference: {processed} processed, {dropped} stale frames dropped, "
+                           "last {latency_ms} ms".format(**worker.stats()))
+            if webrtc_ctx.video_processor.pose_process is None:
+                sched = webrtc_ctx.video_processor.scheduler.stats()
+                st.caption("Inference every {interval} frame(s): {cost_ms} ms per frame vs {budget_ms} ms budget "
+                           "({processed} processed, {skipped} redrawn)".format(**sched))
+        else:
+            st.caption("No frames processed yet.")
+    else:
+        st.caption("Start the camera to collect per-stage latency.")
+    st.caption("Sessions: {active}/{max_sessions} active, {admitted} admitted, {rejected} rejected".format(
+        **get_session_manager().stats()))
+    st.caption("Startup: " + ", ".join(f"{name} {ms:.0f} ms"
+                                       for name, ms in startup.report()['stages_ms'].items()))
+
+with st.expander("📈 WORKOUT HISTORY"):
+    store = get_analytics_store()
+    processor = webrtc_ctx.video_processor
+    session = getattr(processor, "session", None) if processor else None
+    if session is not None and session.log is not None and session.log.id not in st.session_state.workout_history:
+        st.session_state.workout_history.append(session.log.id)
+    if store is None:
+        st.caption("Session logging is off (set SQUAT_ANALYTICS_DIR to enable it).")
+    elif not st.session_state.workout_history:
+        st.caption("Start the camera to record this workout.")
+    else:
+        mine = set(st.session_state.workout_history)
+        history = [m for m in store.sessions() if m["id"] in mine]
+        st.table([{"started": time.strftime("%H:%M:%S", time.localtime(m["started"])),
+                   "reps": m["reps"], "frames": m["frames"],
+                   "minutes": round(((m["closed"] or time.time()) - m["started"]) / 60.0, 1)}
+                  for m in history])
+        # Knee angles over the last two minutes of the latest workout (only those segments are read)
+        latest = st.session_state.workout_history[-1]
+        data = store.query(latest, t0=time.time() - 120, max_points=300)
+        if len(data["t"]):
+            chart = {"seconds": data["t"] - data["t"][0]}
+            chart.update({name: values for name, values in data["angles"].items() if name.endswith("knee")})
+            st.line_chart(chart, x="seconds")
+            st.caption(f"{len(data['rep_t'])} reps in this window")
+
 with st.expander("📱 OPTIMIZATION PROTOCOLS"):
     st.markdown("""
     **SYSTEM REQUIREMENTS:**
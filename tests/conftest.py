@@ -0,0 +1,21 @@
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def make_video(tmp_path):
+    """make_video(frames, size=(w, h), fps) -> path of an MJPG clip whose frame i is grey level 2 * i"""
+    def make(frames=60, size=(160, 90), fps=30.0):
+        path = str(tmp_path / f'clip-{frames}.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+        for i in range(frames):
+            writer.write(np.full((size[1], size[0], 3), 2 * i, dtype=np.uint8))
+        writer.release()
+        return path
+    return make
+
+
+def frame_index(frame) -> int:
+    """Inverse of make_video's grey level"""
+    return int(round(float(frame.mean()) / 2.0))
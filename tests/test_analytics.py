@@ -0,0 +1,103 @@
+"""
+Analytics store: every logged frame comes back exactly once, whether it is
+on disk or still buffered, and range queries only open the segments in range.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from exercises.base import EvalResult
+from utils import analytics
+from utils.analytics import AnalyticsStore
+
+T0 = 1_760_000_000.0
+
+
+def result(i, reps=None):
+    return EvalResult(reps=i // 10 if reps is None else reps, state='down' if i % 2 else 'up',
+                      feedback='Go lower' if i % 3 else '', good=i % 3 == 0, t=T0 + i * 0.1,
+                      angles={'l_knee': 90.0 + i, 'r_knee': None}, flags={'depth_good': i % 2 == 0})
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalyticsStore(str(tmp_path), chunk_rows=16)
+    yield store
+    store.close()
+
+
+def log_frames(store, n, session_id='s1'):
+    log = store.open(session_id, 'squat', src='test')
+    for i in range(n):
+        log.append(result(i))
+    return log
+
+
+def segments(log):
+    return sorted(name for name in os.listdir(log.path) if name.endswith('.npz'))
+
+
+def test_query_returns_every_frame_once(store):
+    log = log_frames(store, 100)  # 6 full segments written, 4 rows still buffered
+    data = store.query(log.id)
+    assert np.allclose(data['t'], T0 + np.arange(100) * 0.1)
+    assert data['reps'].tolist() == [i // 10 for i in range(100)]
+    assert data['state'][:2].tolist() == ['up', 'down']
+    assert data['feedback'][:4].tolist() == ['', 'Go lower', 'Go lower', '']
+    assert np.allclose(data['angles']['l_knee'], 90.0 + np.arange(100))
+    assert 'r_knee' not in data['angles']  # never had a value
+    assert data['flags']['depth_good'][:4].tolist() == [1, 0, 1, 0]
+    assert data['rep_n'].tolist() == list(range(1, 10))
+    assert np.allclose(data['rep_t'], T0 + np.arange(10, 100, 10) * 0.1)
+
+    store.close()  # closes the log and waits for the writer
+    reread = AnalyticsStore(store.root)
+    assert np.array_equal(reread.query(log.id)['t'], data['t'])
+    reread.close()
+
+
+def test_range_query_reads_only_overlapping_segments(store, monkeypatch):
+    log = log_frames(store, 96)
+    log.close()
+    store.close()  # drains the writer: all 6 segments are on disk
+    assert len(segments(log)) == 6
+
+    opened = []
+    load = np.load
+    monkeypatch.setattr(analytics.np, 'load', lambda path, *a, **k: opened.append(path) or load(path, *a, **k))
+    reader = AnalyticsStore(store.root)
+    data = reader.query(log.id, t0=T0 + 2.0, t1=T0 + 4.0)
+    reader.close()
+    assert np.allclose(data['t'], T0 + np.arange(20, 41) * 0.1)
+    assert len(opened) == 2  # the segments of rows 16-31 and 32-47, not all six
+
+
+def test_new_key_mid_session(store):
+    log = store.open('s1', 'squat')
+    for i in range(20):
+        r = result(i)
+        if i >= 10:
+            r.angles['hip'] = float(i)
+        log.append(r)
+    data = store.query(log.id)
+    assert np.isnan(data['angles']['hip'][:10]).all()
+    assert data['angles']['hip'][10:].tolist() == list(range(10, 20))
+
+
+def test_max_points_keeps_rep_events(store):
+    log = log_frames(store, 100)
+    data = store.query(log.id, max_points=10)
+    assert len(data['t']) == 10
+    assert len(data['rep_t']) == 9
+
+
+def test_sessions_meta(store):
+    a = log_frames(store, 30, 'a')
+    b = log_frames(store, 5, 'b')
+    b.close()
+    metas = {m['id']: m for m in store.sessions()}
+    assert metas[a.id]['frames'] == 30 and metas[a.id]['reps'] == 2 and metas[a.id]['closed'] is None
+    assert metas[b.id]['exercise'] == 'squat' and metas[b.id]['src'] == 'test'
+    assert store.open('a', 'squat').id != a.id  # ids never collide
@@ -0,0 +1,66 @@
+"""
+Scalar angle kernels: the pure-math path must agree with the NumPy formula
+it replaced, including near 0 and 180 degrees.
+"""
+
+import math
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from utils.angle_calculator import angle_3pts, angle_deg, line_angle_deg, moving_average
+
+
+def reference(a, b, c):
+    # The NumPy implementation angle_3pts() used before the fast path
+    ba, bc = np.array(a) - np.array(b), np.array(c) - np.array(b)
+    cosang = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
+    return float(np.degrees(np.arccos(np.clip(cosang, -1.0, 1.0))))
+
+
+def test_known_angles():
+    assert angle_deg(1, 0, 0, 0, 0, 1) == pytest.approx(90.0)
+    assert angle_deg(-1, 0, 0, 0, 1, 0) == pytest.approx(180.0)
+    assert angle_deg(1, 0, 0, 0, 2, 0) == pytest.approx(0.0)
+    assert angle_deg(1, 0, 0, 0, 1, 1) == pytest.approx(45.0)
+
+
+def test_matches_numpy_reference():
+    rng = random.Random(0)
+    for _ in range(1000):
+        a, b, c = ([rng.uniform(0, 960), rng.uniform(0, 540)] for _ in range(3))
+        if math.dist(a, b) < 1 or math.dist(b, c) < 1:
+            continue
+        assert angle_3pts(a, b, c) == pytest.approx(reference(a, b, c), abs=1e-6)
+
+
+def test_precise_near_straight():
+    # acos loses about half the digits here; a locked-out knee is exactly this case
+    assert angle_deg(0, 0, 1, 1e-7, 2, 0) == pytest.approx(180.0 - math.degrees(2e-7), abs=1e-9)
+
+
+def test_degenerate_and_bad_input():
+    assert angle_deg(1, 1, 1, 1, 2, 2) is None  # zero-length segment
+    assert angle_3pts([0, 0], [0, 0], [1, 1]) is None
+    assert angle_3pts(None, [0, 0], [1, 1]) is None
+    assert angle_3pts([0], [0, 0], [1, 1]) is None
+
+
+def test_accepts_points_with_extra_coordinates():
+    assert angle_3pts((1, 0, 5), (0, 0, 5), (0, 1, 5)) == pytest.approx(90.0)
+
+
+def test_line_angle():
+    assert line_angle_deg((0, 0), (1, 0)) == pytest.approx(0.0)
+    assert line_angle_deg((0, 0), (1, 1)) == pytest.approx(45.0)
+    assert line_angle_deg((0, 0), (0, 1)) == 90.0
+    assert line_angle_deg((0, 0), (0, -1)) == -90.0
+
+
+def test_moving_average_window():
+    d = deque([1.0, 2.0, 3.0, 4.0])
+    assert moving_average(d) == 2.5
+    assert moving_average(d, 2) == 3.5
+    assert moving_average(deque()) is None
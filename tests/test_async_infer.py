@@ -0,0 +1,104 @@
+"""
+LatestFrameWorker: the newest submitted frame wins, superseded ones are
+dropped, and a snapshot result can be drawn while the evaluator moves on.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from exercises.registry import create_evaluator
+from utils.async_infer import LatestFrameWorker
+from utils.landmark_cache import array_to_landmarks
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+
+def wait_for(predicate, timeout=2.0):
+    end = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > end:
+            raise AssertionError("timed out")
+        time.sleep(0.001)
+
+
+def test_newest_item_wins():
+    gate = threading.Event()
+    seen = []
+
+    def process(item):
+        gate.wait(2.0)
+        seen.append(item)
+        return item * 10
+
+    worker = LatestFrameWorker(process)
+    worker.submit(0)
+    wait_for(lambda: worker.submitted == 1 and not worker._has_pending)  # 0 is in progress
+    for i in range(1, 6):
+        worker.submit(i)  # 1-4 are superseded while the worker is busy
+    gate.set()
+    wait_for(lambda: worker.processed == 2)
+    assert seen == [0, 5] and worker.latest() == 50
+    assert worker.stats()['dropped'] == 4
+    worker.close()
+    assert not worker.alive
+
+
+def test_submit_never_blocks():
+    worker = LatestFrameWorker(lambda item: time.sleep(0.2))
+    start = time.perf_counter()
+    for i in range(100):
+        worker.submit(i)
+    assert time.perf_counter() - start < 0.1
+    worker.close()
+
+
+def test_a_failing_frame_does_not_stop_the_worker():
+    def process(item):
+        if item == 'bad':
+            raise ValueError(item)
+        return item
+
+    worker = LatestFrameWorker(process)
+    worker.submit('bad')
+    wait_for(lambda: worker.errors == 1)
+    worker.submit('good')
+    wait_for(lambda: worker.latest() == 'good')
+    assert worker.alive and worker.processed == 2
+    assert worker.last_latency_s >= 0.0
+    worker.close()
+
+
+def test_close_discards_pending_and_ignores_late_submits():
+    gate = threading.Event()
+    worker = LatestFrameWorker(lambda item: gate.wait(2.0))
+    worker.submit(1)
+    wait_for(lambda: not worker._has_pending)
+    worker.submit(2)
+    threading.Timer(0.05, gate.set).start()
+    worker.close()
+    worker.submit(3)
+    assert not worker.alive
+    assert worker.processed == 1 and worker.submitted == 2
+
+
+@pytest.mark.parametrize('exercise', ['squat', 'pushup', 'press', 'curl'])
+def test_render_from_snapshot(exercise):
+    """A (landmarks, result) pair draws the same after the evaluator has moved on"""
+    frames, timestamps_ms = synthetic_session(exercise, reps=2)
+    evaluator = create_evaluator(exercise)
+    evaluator.frame_size = FRAME_SIZE
+    blank = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+
+    half = len(frames) // 2
+    for i in range(half):
+        landmarks = array_to_landmarks(frames[i])
+        result = evaluator.update(landmarks, timestamps_ms[i] / 1000.0)
+    expected = evaluator.render(blank.copy(), landmarks, result)
+    snapshot = (landmarks, result)
+
+    for i in range(half, len(frames)):
+        evaluator.update(array_to_landmarks(frames[i]), timestamps_ms[i] / 1000.0)
+    assert result.reps < evaluator.state()['reps'] == 2
+    assert np.array_equal(evaluator.render(blank.copy(), *snapshot), expected)
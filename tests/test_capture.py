@@ -0,0 +1,71 @@
+"""
+ThreadedCapture: files are delivered whole and in order while the decoder
+runs ahead; live sources only ever hand out the newest frame.
+"""
+
+import time
+
+import cv2
+import pytest
+
+from tests.conftest import frame_index
+from utils.capture import ThreadedCapture
+
+
+def test_file_mode_delivers_every_frame_in_order(make_video):
+    with ThreadedCapture(make_video(60)) as cap:
+        assert cap.mode == 'all' and not cap.live
+        indices, times = [], []
+        while True:
+            ok, frame = cap.read(timeout=5.0)
+            if not ok:
+                break
+            indices.append(frame_index(frame))
+            times.append(cap.frame_time())
+            time.sleep(0.002)  # a consumer slower than the decoder: it must wait, not drop
+        assert indices == list(range(60))
+        assert times == pytest.approx([i / 30.0 for i in range(60)], abs=1e-3)
+        assert cap.get(cv2.CAP_PROP_POS_MSEC) == pytest.approx(59 / 30.0 * 1000.0, abs=1.0)
+        assert cap.stats()['dropped'] == 0 and cap.delivered == 60
+
+
+def test_latest_mode_drops_stale_frames(make_video):
+    with ThreadedCapture(make_video(90), mode='latest', buffers=3) as cap:
+        indices = []
+        while True:
+            ok, frame = cap.read(timeout=5.0)
+            if not ok:
+                break
+            indices.append(frame_index(frame))
+            time.sleep(0.02)  # decoding outpaces this consumer
+        assert indices == sorted(set(indices))  # never an older frame after a newer one
+        assert len(indices) < 90 and cap.dropped > 0
+        assert cap.decoded == 90 and cap.delivered + cap.dropped == 90
+
+
+def test_read_slot_is_valid_until_the_next_read(make_video):
+    with ThreadedCapture(make_video(30), buffers=3) as cap:
+        ok, first = cap.read()
+        time.sleep(0.1)  # the decoder fills every other slot meanwhile
+        assert ok and frame_index(first) == 0
+
+
+def test_unopenable_source(tmp_path):
+    cap = ThreadedCapture(str(tmp_path / 'missing.mp4'))
+    assert not cap.isOpened()
+    assert cap.read(timeout=0.1) == (False, None)
+    cap.release()
+
+
+def test_release_stops_a_blocked_decoder(make_video):
+    cap = ThreadedCapture(make_video(60), buffers=3)
+    cap.read()
+    time.sleep(0.05)  # the decoder is now waiting for a free slot
+    cap.release()
+    assert not cap._thread.is_alive()
+    assert cap.read(timeout=0.1) == (False, None)
+
+
+def test_rejects_unknown_mode(make_video):
+    with pytest.raises(ValueError):
+        ThreadedCapture(make_video(1), mode='newest')
@@ -0,0 +1,84 @@
+"""
+FrameClock: media times onto one monotonic timeline, and evaluators timed
+through it when a source's timestamps restart or stall.
+"""
+
+import time
+
+import pytest
+
+from exercises.registry import create_evaluator
+from utils.clock import FrameClock
+from utils.landmark_cache import array_to_landmarks
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+
+def test_media_times_pass_through_from_origin():
+    clock = FrameClock(origin=0.0)
+    assert [clock.stamp(t) for t in (10.0, 10.1, 10.2)] == pytest.approx([0.0, 0.1, 0.2])
+    assert clock.fps == pytest.approx(10.0)
+    assert clock.frames == 3
+
+
+def test_live_origin_is_wall_clock():
+    clock = FrameClock()
+    before = time.time()
+    t = clock.stamp(123.0)
+    assert before <= t <= time.time()
+    assert clock.stamp(123.5) == pytest.approx(t + 0.5)
+
+
+@pytest.mark.parametrize('jump', [-3.0, 0.0, 60.0])
+def test_discontinuity_reanchors(jump):
+    # Looping file (back), repeated PTS (same), restarted stream (far ahead)
+    clock = FrameClock(origin=0.0, max_gap_s=5.0)
+    for t in (0.0, 0.1, 0.2):
+        clock.stamp(t)
+    t = clock.stamp(0.2 + jump if jump else 0.2)
+    assert t == pytest.approx(0.3)  # one frame interval after the previous frame
+    assert clock.stamp((0.2 + jump if jump else 0.2) + 0.1) == pytest.approx(0.4)
+
+
+def test_small_gap_is_kept():
+    clock = FrameClock(origin=0.0, max_gap_s=5.0)
+    clock.stamp(0.0)
+    assert clock.stamp(2.0) == pytest.approx(2.0)  # dropped frames, not a discontinuity
+
+
+def test_nominal_fps_without_media_times():
+    clock = FrameClock(origin=0.0, fps=25.0)
+    assert [clock.stamp() for _ in range(3)] == pytest.approx([0.0, 0.04, 0.08])
+    assert clock.fps == pytest.approx(25.0)
+
+
+def test_wall_clock_without_media_times():
+    clock = FrameClock(origin=0.0)
+    clock.stamp()
+    time.sleep(0.02)
+    assert clock.stamp() >= 0.02
+
+
+def test_reset():
+    clock = FrameClock(origin=0.0)
+    clock.stamp(5.0)
+    clock.stamp(5.1)
+    clock.reset()
+    assert clock.t is None and clock.fps == 0.0 and clock.frames == 0
+    assert clock.stamp(9.0) == 0.0
+
+
+@pytest.mark.parametrize('fps', [10, 30, 60])
+def test_looping_source_keeps_counting(fps):
+    # The same 3-rep recording played twice: media time restarts at 0 on the second loop
+    landmarks, timestamps_ms = synthetic_session('squat', reps=3, fps=fps, noise_px=1.0)
+    evaluator = create_evaluator('squat')
+    evaluator.frame_size = FRAME_SIZE
+    clock = FrameClock(origin=0.0, fps=fps)
+    last = None
+    for _ in range(2):
+        for lms, t_ms in zip(landmarks, timestamps_ms):
+            t = clock.stamp(t_ms / 1000.0)
+            assert last is None or t > last
+            last = t
+            evaluator.update(array_to_landmarks(lms), t)
+    assert evaluator.state()['reps'] == 6
@@ -0,0 +1,97 @@
+"""
+Streaming filters: each must match the windowed statistic it replaces, and
+the time-aware one-euro filter must smooth alike at any frame rate.
+"""
+
+import random
+import statistics
+
+import pytest
+
+from utils.filters import (FILTERS, ExponentialMovingAverage, MedianFilter, MovingAverage,
+                           OneEuroFilter, make_filter)
+
+
+def stream(n=500, seed=0):
+    rng = random.Random(seed)
+    return [rng.uniform(-180.0, 180.0) for _ in range(n)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 5, 16])
+def test_moving_average_is_the_window_mean(size):
+    f = MovingAverage(size)
+    xs = stream()
+    for i, x in enumerate(xs):
+        assert f.update(x) == pytest.approx(statistics.fmean(xs[max(0, i - size + 1):i + 1]))
+    assert len(f) == size and f.value == pytest.approx(statistics.fmean(xs[-size:]))
+
+
+def test_moving_average_does_not_drift():
+    # Large offsets would leave float error in a running sum that is never re-summed
+    f = MovingAverage(7)
+    for i in range(100_000):
+        f.update(1e9 + (i % 7))
+    assert f.value == 1e9 + 3.0
+
+
+def test_ema():
+    f = ExponentialMovingAverage(alpha=0.5)
+    assert f.value is None
+    assert f.update(10.0) == 10.0  # the first sample seeds it
+    assert f.update(20.0) == 15.0
+    assert f.update(20.0) == 17.5
+    assert len(f) == 3
+
+
+@pytest.mark.parametrize('size', [1, 4, 5, 9])
+def test_median_is_the_window_median(size):
+    f = MedianFilter(size)
+    xs = stream()
+    for i, x in enumerate(xs):
+        assert f.update(x) == pytest.approx(statistics.median(xs[max(0, i - size + 1):i + 1]))
+
+
+def test_median_rejects_a_single_frame_glitch():
+    f = MedianFilter(5)
+    for x in (90.0, 91.0, 179.0, 92.0, 93.0):  # one landmark jump
+        f.update(x)
+    assert f.value == 92.0
+
+
+def test_one_euro_holds_a_still_signal():
+    f = OneEuroFilter()
+    assert [f.update(42.0, i / 30.0) for i in range(30)] == [42.0] * 30
+
+
+def test_one_euro_is_frame_rate_independent():
+    # The same step, sampled at different rates: after 0.5 s the output has moved alike
+    ends = []
+    for fps in (15, 30, 60):
+        f = OneEuroFilter(min_cutoff=1.0, beta=0.0)
+        f.update(0.0, 0.0)
+        for i in range(1, int(0.5 * fps) + 1):
+            f.update(100.0, i / fps)
+        ends.append(f.value)
+    assert max(ends) - min(ends) < 5.0
+    assert 50.0 < min(ends) < 100.0
+
+
+def test_one_euro_without_timestamps_uses_freq():
+    timed, untimed = OneEuroFilter(freq=30.0), OneEuroFilter(freq=30.0)
+    for i, x in enumerate(stream(100)):
+        assert untimed.update(x) == pytest.approx(timed.update(x, i / 30.0))
+
+
+@pytest.mark.parametrize('kind', FILTERS)
+def test_make_filter_and_reset(kind):
+    f = make_filter(kind, window=5)
+    for x in stream(20):
+        f.update(x, None)
+    assert len(f) > 0 and f.value is not None
+    f.reset()
+    assert len(f) == 0 and f.value is None
+
+
+def test_make_filter_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        make_filter('kalman')
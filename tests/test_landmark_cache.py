@@ -0,0 +1,86 @@
+"""
+Landmark cache: entries follow the video's bytes and the pose settings, and
+a cached session replays to the same rep count as the live evaluation.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from exercises.registry import create_evaluator
+from utils.landmark_cache import (Landmark, LandmarkCache, array_to_landmarks,
+                                  landmarks_to_array)
+from utils.pipeline import replay_video
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+SETTINGS = {'width': 960, 'model_complexity': 1}
+
+
+@pytest.fixture
+def session():
+    landmarks, timestamps_ms = synthetic_session('squat', reps=3, noise_px=1.0)
+    landmarks[::10] = np.nan  # some frames without a pose
+    return landmarks, timestamps_ms
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(os.urandom(4096))
+    return str(path)
+
+
+def test_array_round_trip():
+    arr = np.random.default_rng(0).random((33, 4), dtype=np.float32)
+    landmarks = array_to_landmarks(arr)
+    assert isinstance(landmarks[0], Landmark) and landmarks[5].visibility == arr[5, 3]
+    assert np.array_equal(landmarks_to_array(landmarks), arr)
+    out = np.empty((33, 4), dtype=np.float32)
+    assert landmarks_to_array(landmarks, out=out) is out
+
+
+def test_save_load_round_trip(tmp_path, video, session):
+    landmarks, timestamps_ms = session
+    cache = LandmarkCache(str(tmp_path / 'cache'))
+    assert cache.load(video, SETTINGS) is None
+    cache.save(video, SETTINGS, landmarks, timestamps_ms, *FRAME_SIZE, 30.0)
+
+    cached = LandmarkCache(str(tmp_path / 'cache')).load(video, SETTINGS)
+    assert len(cached) == len(landmarks)
+    assert np.array_equal(cached.landmarks, landmarks.astype(np.float32), equal_nan=True)
+    assert np.array_equal(cached.timestamps_ms, timestamps_ms)
+    assert (cached.width, cached.height, cached.fps) == (*FRAME_SIZE, 30.0)
+    assert not cached.has_pose(0) and cached.has_pose(1)
+    # Nothing but the entry itself is left in the cache directory
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+
+
+def test_key_follows_contents_and_settings(tmp_path, video, session):
+    cache = LandmarkCache(str(tmp_path / 'cache'))
+    cache.save(video, SETTINGS, *session, *FRAME_SIZE, 30.0)
+
+    renamed = str(tmp_path / 'renamed.mp4')
+    shutil.copy(video, renamed)
+    assert cache.load(renamed, SETTINGS) is not None  # same bytes, other name: hit
+    assert cache.load(video, dict(SETTINGS, model_complexity=0)) is None
+
+    with open(renamed, 'ab') as f:
+        f.write(b'\0')
+    assert LandmarkCache(cache.root).load(renamed, SETTINGS) is None  # edited video: miss
+
+
+def test_replay_counts_like_live(tmp_path, video):
+    landmarks, timestamps_ms = synthetic_session('squat', reps=4, noise_px=1.0)
+    cache = LandmarkCache(str(tmp_path / 'cache'))
+    cache.save(video, SETTINGS, landmarks, timestamps_ms, *FRAME_SIZE, 30.0)
+
+    live = create_evaluator('squat')
+    live.frame_size = FRAME_SIZE
+    for lms, t_ms in zip(landmarks, timestamps_ms):
+        live.update(array_to_landmarks(lms), t_ms / 1000.0)
+
+    report = replay_video(video, 'squat', cache.load(video, SETTINGS))
+    assert report.cached and report.reps == live.state()['reps'] == 4
+    assert report.frames == report.frames_with_pose == len(landmarks)
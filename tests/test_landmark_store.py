@@ -0,0 +1,102 @@
+"""
+LandmarkStore: sessions round-trip through the memory-mapped files, the index
+filters them, and an interrupted append never surfaces a partial session.
+"""
+
+import numpy as np
+import pytest
+
+from utils.landmark_store import LandmarkStore
+from utils.pipeline import replay_video
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+
+def add(store, session_id, exercise='squat', reps=3, label=-1, fps=30.0):
+    landmarks, timestamps_ms = synthetic_session(exercise, reps=reps, fps=fps, noise_px=1.0)
+    row = store.append(session_id, exercise, landmarks, timestamps_ms, fps, *FRAME_SIZE, reps=label)
+    return row, landmarks, timestamps_ms
+
+
+@pytest.mark.parametrize('dtype', ['float16', 'float32'])
+def test_round_trip(tmp_path, dtype):
+    store = LandmarkStore(str(tmp_path), dtype=dtype)
+    _, a, ta = add(store, 'a')
+    _, b, tb = add(store, 'b', exercise='pushup', fps=15.0)
+
+    reopened = LandmarkStore(str(tmp_path), dtype='float32')  # an existing store keeps its dtype
+    assert reopened.dtype == np.dtype(dtype) and len(reopened) == 2
+    assert reopened.frames == len(a) + len(b)
+    atol = 1e-3 if dtype == 'float16' else 0.0
+    for key, landmarks, timestamps_ms in (('a', a, ta), (1, b, tb)):
+        s = reopened.session(key)
+        np.testing.assert_allclose(s.landmarks, landmarks, atol=atol)
+        assert np.array_equal(s.timestamps_ms, timestamps_ms)
+    s = reopened.session('b')
+    assert (s.fps, s.width, s.height) == (15.0, *FRAME_SIZE)
+    assert isinstance(s.landmarks, np.memmap)  # a view into the file, not a copy
+
+
+def test_rows_and_labels(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    add(store, 'a', label=3)
+    add(store, 'b', exercise='pushup')
+    add(store, 'c')
+    assert store.rows().tolist() == [0, 1, 2]
+    assert store.rows('squat').tolist() == [0, 2]
+    assert store.rows('squat', labelled=True).tolist() == [0]
+    store.set_label('c', 5)
+    assert LandmarkStore(str(tmp_path)).index['reps'].tolist() == [3, -1, 5]
+    assert 'b' in store and store.find('zzz') is None
+    with pytest.raises(KeyError):
+        store.session('zzz')
+
+
+def test_iter_chunks(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    for sid in 'abc':
+        add(store, sid, exercise='pushup' if sid == 'b' else 'squat')
+    index = store.index
+    owner = np.repeat(np.arange(len(index)), index['frames'])  # session row of every frame
+
+    chunks = list(store.iter_chunks(chunk_frames=100))
+    assert all(len(owners) == len(frames) <= 100 for owners, frames in chunks)
+    assert np.array_equal(np.concatenate([o for o, _ in chunks]), owner)
+    assert np.array_equal(np.concatenate([f for _, f in chunks]), store.frame_range(0, store.frames))
+
+    squat = list(store.iter_chunks(chunk_frames=100, exercise='squat'))
+    owners = np.concatenate([o for o, _ in squat])
+    assert np.array_equal(owners, owner[owner != 1])
+    # Each session starts its own chunk, so no chunk mixes two sessions of the exercise
+    assert all(len(set(o.tolist())) == 1 for o, _ in squat)
+
+
+def test_append_validation(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    add(store, 'a')
+    with pytest.raises(ValueError):
+        add(store, 'a')
+    with pytest.raises(ValueError):
+        store.append('b', 'squat', np.zeros((10, 33, 3)), np.zeros(10), 30.0, *FRAME_SIZE)
+    with pytest.raises(ValueError):
+        store.append('b', 'squat', np.zeros((10, 33, 4)), np.zeros(9), 30.0, *FRAME_SIZE)
+    with pytest.raises(ValueError):
+        LandmarkStore(str(tmp_path / 'other'), dtype='int8')
+
+
+def test_interrupted_append_is_invisible(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    _, a, _ = add(store, 'a')
+    # A crash after the frames were written but before the index record
+    with open(tmp_path / 'landmarks.bin', 'ab') as f:
+        np.ones((50, 33, 4), dtype=np.float16).tofile(f)
+    reopened = LandmarkStore(str(tmp_path))
+    assert len(reopened) == 1 and reopened.frames == len(a)
+    _, b, _ = add(reopened, 'b')  # the next append overwrites the orphaned frames
+    np.testing.assert_allclose(LandmarkStore(str(tmp_path)).session('b').landmarks, b, atol=1e-3)
+
+
+def test_replay_from_store(tmp_path):
+    store = LandmarkStore(str(tmp_path))
+    add(store, 'a', reps=4)
+    report = replay_video('a', 'squat', store.session('a'))
+    assert report.reps == 4
@@ -0,0 +1,84 @@
+"""
+AdaptiveScheduler: the inference cadence follows the measured cost against
+the per-frame budget, rising at once and falling back one step at a time.
+"""
+
+import pytest
+
+from utils.scheduler import AdaptiveScheduler
+
+PERIOD = 1 / 30.0
+
+
+def feed(sched, frames, cost_s, start=0):
+    """Drive `frames` arrivals at 30 fps, recording `cost_s` for each processed one"""
+    decisions = []
+    for i in range(start, start + frames):
+        run = sched.should_process(now=i * PERIOD)
+        if run:
+            sched.record(cost_s)
+        decisions.append(run)
+    return decisions
+
+
+def test_cheap_inference_runs_every_frame():
+    sched = AdaptiveScheduler(target_fps=30.0)
+    assert all(feed(sched, 60, 0.005))
+    assert sched.interval == 1 and sched.skipped == 0
+
+
+def test_interval_follows_cost():
+    sched = AdaptiveScheduler(target_fps=30.0)  # budget 0.8 / 30 s = 26.7 ms
+    assert sched.budget() == pytest.approx(0.8 / 30.0)
+    sched.should_process(now=0.0)
+    sched.record(0.060)
+    assert sched.interval == 3  # ceil(60 / 26.7): raised on the first slow frame
+    decisions = feed(sched, 30, 0.060, start=1)
+    assert sum(decisions) == 10  # every third frame
+    assert sched.stats()['processed'] == 11 and sched.stats()['skipped'] == 20
+
+
+def test_steps_down_one_at_a_time():
+    sched = AdaptiveScheduler(target_fps=30.0)
+    feed(sched, 30, 0.060)
+    intervals = []
+    for i in range(30, 200):
+        if sched.should_process(now=i * PERIOD):
+            sched.record(0.005)
+        intervals.append(sched.interval)
+    steps = [a - b for a, b in zip(intervals, intervals[1:]) if a != b]
+    assert steps == [1, 1]  # 3 -> 2 -> 1, never a jump
+    assert sched.interval == 1
+
+
+def test_hysteresis_holds_a_borderline_cost():
+    sched = AdaptiveScheduler(budget_ms=20.0)
+    feed(sched, 30, 0.030)
+    assert sched.interval == 2
+    feed(sched, 200, 0.019, start=30)  # fits the budget, but not with 15% headroom
+    assert sched.interval == 2
+
+
+def test_interval_is_clamped():
+    sched = AdaptiveScheduler(budget_ms=10.0, max_interval=4)
+    feed(sched, 10, 1.0)
+    assert sched.interval == 4
+    assert AdaptiveScheduler(min_interval=0, max_interval=0).max_interval == 1
+
+
+def test_budget_from_measured_period():
+    sched = AdaptiveScheduler(max_load=0.5)
+    assert sched.budget() is None
+    sched.should_process(now=0.0)
+    sched.record(1.0)  # no budget yet: the cost is only remembered
+    assert sched.interval == 1
+    sched.should_process(now=0.1)
+    assert sched.budget() == pytest.approx(0.05)
+
+
+def test_reset():
+    sched = AdaptiveScheduler(target_fps=30.0)
+    feed(sched, 30, 0.060)
+    sched.reset()
+    assert sched.interval == 1 and sched.stats()['processed'] == 0
+    assert sched.stats()['cost_ms'] == 0.0
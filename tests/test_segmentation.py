@@ -0,0 +1,161 @@
+"""
+RepSegmenter on synthetic angle signals, and every evaluator on
+utils.synthetic sessions: counts must not depend on the frame rate, and
+reset() must start a clean set.
+"""
+
+import math
+
+import pytest
+
+from exercises.registry import create_evaluator, exercise_names
+from utils.landmark_cache import array_to_landmarks
+from utils.segmentation import ACTIVE, IDLE, REST, TURNED, RepSegmenter
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+FPS = (10, 15, 30, 60)
+
+
+def dips(depths, fps, rep_s=2.0, rest_s=0.5, top=170.0):
+    """(value, t) samples: one raised-cosine dip from `top` to each depth, rests in between"""
+    samples, t0 = [], 0.0
+    for depth in depths:
+        n_rest, n_rep = int(round(rest_s * fps)), int(round(rep_s * fps))
+        samples += [(top, t0 + i / fps) for i in range(n_rest)]
+        t0 += n_rest / fps
+        samples += [(top - (top - depth) * (1.0 - math.cos(2.0 * math.pi * i / n_rep)) / 2.0, t0 + i / fps)
+                    for i in range(n_rep)]
+        t0 += n_rep / fps
+    samples += [(top, t0 + i / fps) for i in range(int(round(rest_s * fps)))]
+    return samples
+
+
+def feed(seg, samples):
+    return [e for e in (seg.update(v, t) for v, t in samples) if e is not None]
+
+
+# =========================
+# RepSegmenter
+# =========================
+@pytest.mark.parametrize('fps', FPS)
+def test_hysteresis_needs_enter_and_rest(fps):
+    seg = RepSegmenter(enter=100, rest=150)
+    # 80: full rep; 120: never passes enter; 80 again: counted
+    assert len(feed(seg, dips([80, 120, 80], fps))) == 2
+    # Dipping below enter but not coming back above rest finishes nothing
+    seg = RepSegmenter(enter=100, rest=150)
+    seg.update(170, -1.0)  # armed on the rest side
+    events = feed(seg, dips([80], fps, top=140.0))
+    assert events == [] and seg.phase == TURNED
+
+
+def test_phases():
+    seg = RepSegmenter(enter=100, rest=150, start=160)
+    seg.update(155, 0.0)
+    assert seg.phase == IDLE  # not armed until the signal passes `start`
+    seg.update(165, 0.1)
+    assert seg.phase == REST
+    seg.update(95, 0.2)
+    assert seg.phase == TURNED  # no hold required: turns as soon as it enters
+    assert seg.update(160, 0.3).n == 1 and seg.phase == REST
+
+
+@pytest.mark.parametrize('fps', FPS)
+def test_min_hold_is_timed_not_counted(fps):
+    # A 2 s rep to 80 deg spends ~0.6 s below 100; a 1 s rep only ~0.3 s
+    make = lambda: RepSegmenter(enter=100, rest=150, min_hold_s=0.5, hold_range=(70, 100))
+    assert len(feed(make(), dips([80] * 3, fps, rep_s=2.0))) == 3
+    assert len(feed(make(), dips([80] * 3, fps, rep_s=1.0))) == 0
+
+
+@pytest.mark.parametrize('fps', FPS)
+def test_min_rep_spacing(fps):
+    seg = RepSegmenter(enter=100, rest=150, min_rep_s=3.0)
+    events = feed(seg, dips([80] * 4, fps, rep_s=1.0, rest_s=0.2))
+    assert len(events) >= 2
+    assert all(b.t_end - a.t_end >= 3.0 for a, b in zip(events, events[1:]))
+
+
+@pytest.mark.parametrize('fps', FPS)
+def test_peak_counts_at_turn(fps):
+    seg = RepSegmenter(enter=125, rest=35, mode='peak', count_at='turn')
+    samples = [(180.0 - v, t) for v, t in dips([45, 45], fps, top=155.0)]  # 25 -> 135 -> 25
+    events = feed(seg, samples)
+    assert [e.n for e in events] == [1, 2]
+    assert all(e.t_end < e.t_start + 1.0 for e in events)  # counted on the way up, not on return
+    assert all(e.extreme >= 125 for e in events)
+
+
+def test_gap_is_not_interpolated():
+    seg = RepSegmenter(enter=100, rest=150, min_hold_s=0.5, max_gap_s=1.0)
+    seg.update(170, 0.0)
+    seg.update(90, 0.1)
+    seg.update(None, 0.2)  # person lost: the hold does not accrue across it
+    seg.update(90, 5.0)
+    assert seg.phase == ACTIVE and seg._hold < 0.5
+
+
+def test_reset():
+    seg = RepSegmenter(enter=100, rest=150)
+    assert len(feed(seg, dips([80, 80], 30))) == 2
+    seg.reset()
+    assert seg.reps == 0 and seg.phase == IDLE and seg.last is None
+    assert [e.n for e in feed(seg, dips([80], 30))] == [1]
+
+
+# =========================
+# Evaluators on synthetic sessions
+# =========================
+def run_session(evaluator, exercise, reps, fps, noise_px=1.0, t0=0.0, seed=1):
+    evaluator.frame_size = FRAME_SIZE
+    landmarks, timestamps_ms = synthetic_session(exercise, reps=reps, fps=fps, noise_px=noise_px, seed=seed)
+    for lms, t_ms in zip(landmarks, timestamps_ms):
+        evaluator.update(array_to_landmarks(lms), t0 + t_ms / 1000.0)
+    return evaluator
+
+
+@pytest.mark.parametrize('fps', FPS)
+@pytest.mark.parametrize('exercise', exercise_names())
+def test_count_is_fps_independent(exercise, fps):
+    evaluator = run_session(create_evaluator(exercise), exercise, 20, fps)
+    assert evaluator.state()['reps'] == 20
+
+
+@pytest.mark.parametrize('exercise', exercise_names())
+def test_reset_mid_session(exercise):
+    evaluator = run_session(create_evaluator(exercise), exercise, 3, 30)
+    assert evaluator.state()['reps'] == 3
+    evaluator.update_fps(30.0)
+    evaluator.reset()
+    assert evaluator.state() == create_evaluator(exercise).state()
+    assert evaluator.frame_size == FRAME_SIZE
+    # Later timestamps (same set continues) and restarted ones (new recording) both start from 0
+    assert run_session(evaluator, exercise, 3, 30, t0=100.0).state()['reps'] == 3
+    evaluator.reset()
+    assert run_session(evaluator, exercise, 2, 30).state()['reps'] == 2
+
+
+def test_missing_frames_keep_count():
+    evaluator = create_evaluator('squat')
+    evaluator.frame_size = FRAME_SIZE
+    landmarks, timestamps_ms = synthetic_session('squat', reps=5, noise_px=1.0)
+    for i, (lms, t_ms) in enumerate(zip(landmarks, timestamps_ms)):
+        evaluator.update(None if i % 13 == 0 else array_to_landmarks(lms), t_ms / 1000.0)
+    assert evaluator.state()['reps'] == 5
+
+
+def test_press_alignment_in_normalised_units():
+    # Synthetic press keeps the elbows at shoulder height: alignment must hold at any frame size
+    for size in (FRAME_SIZE, (1920, 1080), (480, 270)):
+        evaluator = create_evaluator('press')
+        evaluator.frame_size = size
+        landmarks, _ = synthetic_session('press', reps=1, noise_px=1.0)
+        results = [evaluator.update(array_to_landmarks(lms), i / 30.0) for i, lms in enumerate(landmarks)]
+        assert all(r.flags['elbow_alignment_ok'] for r in results)
+
+
+@pytest.mark.parametrize('fps', FPS)
+def test_press_misalignment_does_not_block_count(fps):
+    evaluator = create_evaluator('press')
+    evaluator.elbow_tol = 0.0  # every frame misaligned: feedback only
+    assert run_session(evaluator, 'press', 10, fps).state()['reps'] == 10
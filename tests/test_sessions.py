@@ -0,0 +1,121 @@
+"""
+SessionManager / PosePool: admission control, one evaluator per connection,
+and pose graphs reused across connections without leaking tracking state.
+"""
+
+import threading
+import time
+
+import pytest
+
+from exercises.registry import create_evaluator
+from utils.sessions import PosePool, SessionLimitError, SessionManager
+
+
+class Graph:
+    """Records what the pool does with a pose graph"""
+    built = 0
+
+    def __init__(self):
+        Graph.built += 1
+        self.resets = 0
+        self.closed = False
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def count_graphs():
+    Graph.built = 0
+
+
+def manager(**kwargs):
+    return SessionManager(lambda: create_evaluator('squat'), Graph, **kwargs)
+
+
+def test_admission_control():
+    m = manager(max_sessions=2)
+    a, b = m.open(), m.open()
+    with pytest.raises(SessionLimitError):
+        m.open()
+    assert m.stats()['active'] == 2 and m.rejected == 1
+    m.close(a)
+    c = m.open()  # the freed slot is admitted again
+    assert len(m) == 2 and m.admitted == 3
+    assert len({a.id, b.id, c.id}) == 3
+
+
+def test_sessions_do_not_share_state():
+    m = manager(max_sessions=2)
+    a, b = m.open(), m.open()
+    assert a.evaluator is not b.evaluator and a.pose is not b.pose
+    assert a.clock is not b.clock and a.prep is not b.prep
+    a.evaluator.rep_count = 5
+    assert b.evaluator.state()['reps'] == 0
+
+
+def test_graphs_are_reused_and_reset():
+    m = manager(max_sessions=2)
+    a = m.open()
+    graph = a.pose
+    assert graph.resets == 0  # fresh graph, nothing to drop
+    m.close(a)
+    m.close(a)  # closing twice is harmless
+    assert a.pose is None and a.closed
+    b = m.open()
+    assert b.pose is graph and graph.resets == 1  # previous user's tracking dropped
+    assert Graph.built == 1
+
+
+def test_pool_is_bounded():
+    m = manager(max_sessions=3, pool_size=1)
+    a = m.open()
+    with pytest.raises(SessionLimitError):
+        m.open()  # admitted, but no graph free
+    assert len(m) == 1 and Graph.built == 1
+    m.close(a)
+    assert m.open().pose is a.pose or Graph.built == 1
+
+
+def test_open_waits_for_a_released_graph():
+    m = manager(max_sessions=2, pool_size=1, acquire_timeout=2.0)
+    a = m.open()
+    threading.Timer(0.1, m.close, args=(a,)).start()
+    start = time.perf_counter()
+    b = m.open()
+    assert 0.05 < time.perf_counter() - start < 2.0
+    assert Graph.built == 1 and b.pose.resets == 1
+
+
+def test_failed_open_frees_the_slot():
+    def broken():
+        raise RuntimeError("model file missing")
+    m = SessionManager(lambda: create_evaluator('squat'), broken, max_sessions=1)
+    with pytest.raises(RuntimeError):
+        m.open()
+    assert len(m) == 0 and m.pool.stats()['created'] == 0
+    assert m.rejected == 1
+
+
+def test_duplicate_session_id():
+    m = manager()
+    m.open('kiosk-1')
+    with pytest.raises(ValueError):
+        m.open('kiosk-1')
+    assert m.get('kiosk-1') is not None
+
+
+def test_warm_and_shutdown():
+    pool = PosePool(Graph, size=3)
+    pool.warm(2)
+    assert Graph.built == 2 and pool.stats()['idle'] == 2
+    m = SessionManager(lambda: create_evaluator('squat'), Graph, max_sessions=2)
+    m.pool = pool
+    a = m.open()
+    m.shutdown()
+    assert a.closed and len(m) == 0
+    assert a.pose is None and pool.stats() == {'size': 3, 'created': 0, 'idle': 0}
@@ -0,0 +1,123 @@
+"""
+SharedFrameRing and the processes around it: frames and landmarks cross
+process boundaries through shared memory, in order, one owner per slot.
+"""
+
+import multiprocessing
+import threading
+
+import numpy as np
+import pytest
+
+from tests.conftest import frame_index
+from utils import pose_backend
+from utils.pose_backend import SyntheticBackend
+from utils.shm_ring import PoseProcess, ProcessPipeline, SharedFrameRing
+
+SYNTHETIC = pose_backend.PoseConfig(backend='synthetic')
+
+
+def _child_write(spec, idx, value):
+    ring = SharedFrameRing.attach(spec)
+    ring.frames[idx] = value
+    ring.t[idx] = value / 10.0
+    ring.landmarks[idx] = value
+    ring.has_pose[idx] = True
+    ring.close()
+
+
+@pytest.fixture
+def ring():
+    ring = SharedFrameRing(3, (90, 160))
+    yield ring
+    ring.close()
+
+
+def test_attach_shares_the_buffers(ring):
+    other = SharedFrameRing.attach(ring.spec)
+    assert not other.owner and other.shape == (90, 160) and other.slots == 3
+    other.frames[1] = 7
+    other.landmarks[1] = 0.5
+    other.has_pose[1] = True
+    assert (ring.frames[1] == 7).all() and (ring.frames[0] == 0).all()
+    assert (ring.landmarks_of(1) == 0.5).all() and ring.landmarks_of(0) is None
+    other.close()
+    assert (ring.frames[1] == 7).all()  # closing an attached ring leaves the block
+
+
+def test_spawned_child_writes_into_the_ring(ring):
+    ctx = multiprocessing.get_context('spawn')
+    child = ctx.Process(target=_child_write, args=(ring.spec, 2, 42))
+    child.start()
+    child.join(30.0)
+    assert child.exitcode == 0
+    assert (ring.frames[2] == 42).all() and ring.t[2] == pytest.approx(4.2)
+    assert (ring.landmarks_of(2) == 42).all()
+
+
+def test_owner_close_unlinks():
+    ring = SharedFrameRing(2, (4, 4))
+    spec = ring.spec
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        SharedFrameRing.attach(spec)
+
+
+def test_process_pipeline_delivers_file_frames_in_order(make_video):
+    expected = SyntheticBackend().landmarks
+    with ProcessPipeline(make_video(30), SYNTHETIC, width=160) as pipe:
+        assert pipe.open() and not pipe.live
+        indices = []
+        while True:
+            ok, frame, landmarks, t = pipe.read(timeout=30.0)
+            if not ok:
+                break
+            i = frame_index(frame)
+            indices.append(i)
+            assert frame.shape == (90, 160, 3)
+            assert t == pytest.approx(i / 30.0, abs=1e-3)
+            np.testing.assert_allclose(landmarks, expected[i], atol=1e-6)
+        assert indices == list(range(30))
+        assert pipe.stats()['inferred'] == 30 and pipe.stats()['dropped'] == 0
+
+
+def test_process_pipeline_source_that_does_not_open(tmp_path):
+    with ProcessPipeline(str(tmp_path / 'missing.avi'), SYNTHETIC) as pipe:
+        assert not pipe.open()
+        assert pipe.read(timeout=1.0)[0] is False
+
+
+def test_pose_process_results(make_video):
+    expected = SyntheticBackend().landmarks
+    results, done = [], threading.Event()
+
+    def on_result(frame, landmarks, t):
+        results.append((frame_index(frame), landmarks.copy(), t))
+        if len(results) == 5:
+            done.set()
+
+    proc = PoseProcess(SYNTHETIC, on_result, slots=8)
+    try:
+        for i in range(5):
+            assert proc.submit(np.full((360, 640, 3), 2 * i, dtype=np.uint8), t=i)
+        assert done.wait(30.0)
+        assert [r[0] for r in results] == [r[2] for r in results] == list(range(5))
+        for i, landmarks, _ in results:
+            np.testing.assert_allclose(landmarks, expected[i], atol=1e-6)
+        assert proc.stats()['processed'] == 5 and proc.stats()['dropped'] == 0
+    finally:
+        proc.close()
+    assert not proc.alive()
+
+
+def test_pose_process_drops_when_every_slot_is_in_flight():
+    gate = threading.Event()
+    proc = PoseProcess(SYNTHETIC, lambda *args: gate.wait(30.0), slots=2)
+    try:
+        img = np.zeros((360, 640, 3), dtype=np.uint8)
+        assert proc.submit(img) and proc.submit(img)
+        assert not proc.submit(img)  # both slots still owned by the pose process / callback
+        assert proc.stats()['dropped'] == 1
+    finally:
+        gate.set()
+        proc.close()
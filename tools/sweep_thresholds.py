@@ -0,0 +1,327 @@
+"""
+Threshold sweep
+Replays labelled landmark sessions through an evaluator for many parameter
+combinations and ranks them by rep-count error. No video is decoded and no
+pose model runs: every worker process loads the sessions once (store rows
+are memory-mapped, not pickled) and then only evaluates.
+
+    python -m tools.sweep_thresholds --exercise pushup --store dataset/
+    python -m tools.sweep_thresholds --exercise squat --clips clips/ --cache cache/ --workers 0
+    python -m tools.sweep_thresholds --exercise press --synthetic 12 --search random --trials 500
+    python -m tools.sweep_thresholds --exercise curl --store dataset/ --param up_threshold=20:50:2
+
+Sessions come from a utils.landmark_store.LandmarkStore (rows with a rep
+label), from clips listed in a labels.json whose landmarks are in a batch
+--cache (pass the batch run's pose flags, e.g. --model-complexity and --roi,
+so the cache keys match), and/or from synthetic sessions at mixed frame
+rates and noise.
+
+Search: 'grid' tries every combination of the ranges, 'random' samples
+--trials of them, 'bayes' lets optuna (optional, pip install optuna) pick
+--trials combinations, a batch of --workers at a time.
+"""
+
+import argparse
+import dataclasses
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.clock import FrameClock
+from utils.landmark_cache import LandmarkCache, array_to_landmarks
+from utils.landmark_store import LandmarkStore
+from utils.pipeline import BatchConfig, load_labels
+from utils.pose_backend import BACKENDS
+from utils.synthetic import FRAME_SIZE, synthetic_session
+
+
+# =========================
+# Search spaces
+# =========================
+def _make_squat(**params):
+    from exercises.squat import CFG, SquatEvaluator
+    return SquatEvaluator(dataclasses.replace(CFG, **params))
+
+def _make_pushup(**params):
+    from exercises.pushup import PushupEvaluator
+    return PushupEvaluator(**dict({'down_threshold': 90, 'up_threshold': 160}, **params))
+
+def _make_press(**params):
+    from exercises.standing_cable_press import StandingCablePressEvaluator
+    return StandingCablePressEvaluator(**params)
+
+def _make_curl(**params):
+    from exercises.bicep_curl import BicepCurlEvaluator
+    return BicepCurlEvaluator(**params)
+
+
+# exercise -> (evaluator factory taking threshold keywords, {param: (lo, hi, step)})
+# The press's elbow_tolerance is left out: it only gates feedback, not the count.
+SPACES: Dict[str, Tuple[Callable[..., Any], Dict[str, Tuple[float, float, float]]]] = {
+    'squat': (_make_squat, {'knee_green_max': (90, 115, 5), 'knee_green_min': (55, 80, 5),
+                            'min_stand_knee_angle': (140, 165, 5), 'bottom_hold_ms': (0, 300, 50)}),
+    'pushup': (_make_pushup, {'down_threshold': (70, 110, 5), 'up_threshold': (140, 170, 5)}),
+    'press': (_make_press, {'min_chest': (25, 55, 5), 'max_chest': (100, 135, 5),
+                            'cooldown_s': (0.1, 0.6, 0.1)}),
+    'curl': (_make_curl, {'up_threshold': (20, 50, 5), 'down_threshold': (140, 170, 5)}),
+}
+
+
+def grid_values(lo: float, hi: float, step: float) -> List[float]:
+    n = int(np.floor((hi - lo) / step + 1e-9)) + 1
+    values = [round(lo + i * step, 6) for i in range(n)]
+    return [int(v) if float(v).is_integer() and float(step).is_integer() else v for v in values]
+
+
+def parse_param(spec: str) -> Tuple[str, Tuple[float, float, float]]:
+    """'name=lo:hi:step' (or 'name=value' to pin it)"""
+    name, _, rng = spec.partition('=')
+    parts = [float(p) for p in rng.split(':')]
+    if len(parts) == 1:
+        parts = [parts[0], parts[0], 1.0]
+    if len(parts) != 3 or parts[2] <= 0:
+        raise argparse.ArgumentTypeError(f"Expected name=lo:hi:step, got {spec!r}")
+    return name, (parts[0], parts[1], parts[2])
+
+
+# =========================
+# Sessions
+# =========================
+@dataclasses.dataclass
+class Sources:
+    """Where the labelled sessions come from (picklable: workers rebuild the sessions)"""
+    exercise: str
+    store: Optional[str] = None
+    clips: Optional[str] = None
+    cache: Optional[str] = None
+    synthetic: int = 0
+    seed: int = 0
+    batch: BatchConfig = dataclasses.field(default_factory=BatchConfig)  # pose settings --clips were cached with
+
+
+@dataclasses.dataclass
+class Session:
+    name: str
+    reps: int                     # label
+    fps: float
+    size: Tuple[int, int]
+    frames: List[Optional[list]]  # landmarks per frame (None: no pose)
+    timestamps_ms: np.ndarray
+
+
+def _unpack(name: str, reps: int, landmarks: np.ndarray, timestamps_ms: np.ndarray, fps: float,
+            size: Tuple[int, int]) -> Session:
+    # Landmark objects are built once per worker and reused by every combination
+    has_pose = ~np.isnan(landmarks[:, 0, 0])
+    frames = [array_to_landmarks(landmarks[i]) if has_pose[i] else None for i in range(len(landmarks))]
+    return Session(name, reps, fps, size, frames, np.asarray(timestamps_ms, dtype=np.float64))
+
+
+def load_sessions(src: Sources) -> List[Session]:
+    sessions = []
+    if src.store:
+        store = LandmarkStore(src.store)
+        for row in store.rows(src.exercise, labelled=True):
+            rec = store.index[row]
+            s = store.session(int(row))
+            sessions.append(_unpack(str(rec['id']), int(rec['reps']), s.landmarks, s.timestamps_ms,
+                                    s.fps, (s.width, s.height)))
+    if src.clips:
+        cache = LandmarkCache(src.cache)
+        settings = src.batch.pose_settings(src.exercise)
+        for name, label in sorted(load_labels(src.clips).items()):
+            if label.get('exercise', src.exercise) != src.exercise:
+                continue
+            cached = cache.load(os.path.join(src.clips, name), settings)
+            if cached is None:
+                print(f"skip {name}: not cached with these pose settings (run --batch with --cache first)",
+                      file=sys.stderr)
+                continue
+            sessions.append(_unpack(name, int(label['reps']), cached.landmarks, cached.timestamps_ms,
+                                    cached.fps, (cached.width, cached.height)))
+    rng = random.Random(src.seed)
+    for i in range(src.synthetic):
+        # Mixed frame rates and jitter so thresholds are not tuned to one clean recording
+        reps, fps, noise = rng.randint(3, 12), rng.choice((10.0, 15.0, 24.0, 30.0, 60.0)), rng.uniform(0, 4)
+        landmarks, timestamps_ms = synthetic_session(src.exercise, reps=reps, fps=fps, noise_px=noise,
+                                                     seed=src.seed + i)
+        sessions.append(_unpack(f"synthetic/{i}", reps, landmarks, timestamps_ms, fps, FRAME_SIZE))
+    return sessions
+
+
+def count_reps(make: Callable[..., Any], params: Dict[str, Any], session: Session) -> int:
+    evaluator = make(**params)
+    evaluator.frame_size = session.size
+    clock = FrameClock(origin=0.0, fps=session.fps or 30.0)
+    for lms, t_ms in zip(session.frames, session.timestamps_ms.tolist()):
+        evaluator.update(lms, clock.stamp(t_ms / 1000.0))  # lms None: no pose on that frame
+    return evaluator.state()['reps']
+
+
+def score(make: Callable[..., Any], params: Dict[str, Any], sessions: Sequence[Session]) -> Dict[str, Any]:
+    counted = [count_reps(make, params, s) for s in sessions]
+    errors = [c - s.reps for c, s in zip(counted, sessions)]
+    return {
+        'params': params,
+        'mae': round(float(np.mean(np.abs(errors))), 4) if errors else 0.0,
+        'exact': round(float(np.mean([e == 0 for e in errors])), 4) if errors else 0.0,
+        'bias': round(float(np.mean(errors)), 4) if errors else 0.0,
+        'counted': counted,
+    }
+
+
+def _rank_key(result: Dict[str, Any]):
+    return result['mae'], -result['exact'], abs(result['bias'])
+
+
+# =========================
+# Worker processes
+# =========================
+_worker: Dict[str, Any] = {}
+
+def _init_worker(src: Sources):
+    _worker['make'] = SPACES[src.exercise][0]
+    _worker['sessions'] = load_sessions(src)
+
+def _score_in_worker(params: Dict[str, Any]) -> Dict[str, Any]:
+    return score(_worker['make'], params, _worker['sessions'])
+
+
+def sweep(src: Sources, space: Dict[str, Tuple[float, float, float]], search: str = 'grid',
+          trials: int = 200, workers: int = 1, seed: int = 0,
+          progress: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Score parameter combinations against the labelled sessions of `src`
+
+    Returns:
+        One score() dict per combination, best first
+    """
+    names = list(space)
+    values = [grid_values(*space[n]) for n in names]
+    grid = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+    rng = random.Random(seed)
+    if search == 'random' and trials < len(grid):
+        grid = rng.sample(grid, trials)
+
+    results: List[Dict[str, Any]] = []
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(src,)) as pool:
+        if search == 'bayes':
+            results = _bayes(pool, names, space, trials, workers, seed, progress)
+        else:
+            chunk = max(1, len(grid) // (workers * 8))
+            for result in pool.map(_score_in_worker, grid, chunksize=chunk):
+                results.append(result)
+                if progress is not None:
+                    progress(len(results), len(grid))
+    results.sort(key=_rank_key)
+    return results
+
+
+def _bayes(pool, names, space, trials, workers, seed, progress) -> List[Dict[str, Any]]:
+    try:
+        import optuna
+    except ImportError:
+        raise SystemExit("--search bayes needs optuna (pip install optuna); use grid or random") from None
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.create_study(sampler=optuna.samplers.TPESampler(seed=seed))
+    results: List[Dict[str, Any]] = []
+    while len(results) < trials:
+        batch = [study.ask() for _ in range(min(workers, trials - len(results)))]
+        combos = []
+        for trial in batch:
+            params = {}
+            for n in names:
+                lo, hi, step = space[n]
+                params[n] = grid_values(lo, hi, step)[
+                    trial.suggest_int(n, 0, len(grid_values(lo, hi, step)) - 1)]
+            combos.append(params)
+        for trial, result in zip(batch, pool.map(_score_in_worker, combos)):
+            study.tell(trial, result['mae'] - 1e-3 * result['exact'])
+            results.append(result)
+        if progress is not None:
+            progress(len(results), trials)
+    return results
+
+
+# =========================
+# CLI
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="Tune evaluator thresholds against labelled rep counts")
+    parser.add_argument('--exercise', required=True, choices=sorted(SPACES))
+    parser.add_argument('--store', default=None, help="LandmarkStore directory (labelled rows)")
+    parser.add_argument('--clips', default=None, help="Directory with labels.json (needs --cache)")
+    parser.add_argument('--cache', default=None, help="Landmark cache of a --batch --cache run over --clips")
+    parser.add_argument('--pose-backend', default='mediapipe', choices=sorted(set(BACKENDS) - {'replay'}),
+                        help="--clips: pose settings of the --batch run that filled --cache")
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument('--min-detection-confidence', type=float, default=0.6)
+    parser.add_argument('--min-tracking-confidence', type=float, default=0.6)
+    parser.add_argument('--roi', type=int, default=None, metavar='SIZE')
+    parser.add_argument('--synthetic', type=int, default=0, help="Add N synthetic sessions")
+    parser.add_argument('--param', action='append', type=parse_param, default=[], metavar='NAME=LO:HI:STEP',
+                        help="Override / add a searched parameter (repeatable); NAME=VALUE pins it")
+    parser.add_argument('--search', choices=('grid', 'random', 'bayes'), default='grid')
+    parser.add_argument('--trials', type=int, default=200, help="random/bayes: combinations to score")
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes (0 = all CPU cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--out', default=None, help="Write all results as JSON")
+    args = parser.parse_args()
+    if args.clips and not args.cache:
+        parser.error("--clips needs --cache")
+    if not (args.store or args.clips or args.synthetic):
+        parser.error("no sessions: give --store, --clips/--cache and/or --synthetic N")
+
+    batch = BatchConfig(pose_backend=args.pose_backend, model_complexity=args.model_complexity,
+                        min_detection_confidence=args.min_detection_confidence,
+                        min_tracking_confidence=args.min_tracking_confidence, roi_size=args.roi)
+    src = Sources(args.exercise, args.store, args.clips, args.cache, args.synthetic, args.seed, batch)
+    make, space = SPACES[args.exercise]
+    space = dict(space, **dict(args.param))
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    sessions = load_sessions(src)
+    if not sessions:
+        raise SystemExit("No labelled sessions found")
+    frames = sum(len(s.frames) for s in sessions)
+    baseline = score(make, {}, sessions)
+    print(f"{len(sessions)} sessions, {frames} frames; defaults: MAE {baseline['mae']:.3f}, "
+          f"exact {baseline['exact']:.0%}")
+
+    def progress(done, total):
+        if done == total or done % max(1, total // 20) == 0:
+            print(f"  {done}/{total} combinations", flush=True)
+
+    start = time.perf_counter()
+    results = sweep(src, space, args.search, args.trials, workers, args.seed, progress)
+    elapsed = time.perf_counter() - start
+    evaluated = len(results) * frames
+    print(f"Scored {len(results)} combinations in {elapsed:.1f}s with {workers} workers "
+          f"({evaluated / elapsed:,.0f} frames/s evaluated)")
+
+    print(f"\n{'MAE':>7}{'exact':>7}{'bias':>7}  params")
+    for r in results[:args.top]:
+        params = ', '.join(f"{k}={v}" for k, v in r['params'].items())
+        print(f"{r['mae']:>7.3f}{r['exact']:>7.0%}{r['bias']:>+7.2f}  {params}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'exercise': args.exercise, 'sessions': [s.name for s in sessions],
+                       'labels': [s.reps for s in sessions], 'space': space, 'search': args.search,
+                       'baseline': baseline, 'elapsed_s': round(elapsed, 3), 'results': results},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
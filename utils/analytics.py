@@ -0,0 +1,392 @@
+"""
+Session analytics store
+Append-only per-session log of what the evaluator saw every frame (time,
+angles, stage, form flags, feedback) and of each rep, for history charts.
+
+Rows are written into preallocated fixed-dtype column chunks, so logging a
+frame is a handful of array stores. Full (or old) chunks are handed to one
+background writer thread per store, which saves each as an .npz segment:
+
+    <root>/<log id>/meta.json
+    <root>/<log id>/000003_1760680000123_1760680010456.npz   # seq_t0ms_t1ms
+
+Segments are never rewritten. The time range in the file name lets range
+queries open only the segments they need instead of the whole session.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Chunk:
+    """Preallocated columns for up to `rows` frames"""
+
+    def __init__(self, rows: int, n_angles: int, n_flags: int):
+        self.n = 0
+        self.seq = -1  # segment number, assigned when handed to the writer
+        self.opened = time.monotonic()
+        self.t = np.empty(rows, dtype=np.float64)
+        self.reps = np.empty(rows, dtype=np.int32)
+        self.state = np.empty(rows, dtype=np.int16)      # code into the log's state vocabulary, -1 = none
+        self.feedback = np.empty(rows, dtype=np.int16)   # code into the feedback vocabulary
+        self.good = np.empty(rows, dtype=np.bool_)
+        self.visible = np.empty(rows, dtype=np.bool_)
+        self.angles = np.full((rows, n_angles), np.nan, dtype=np.float32)
+        self.flags = np.full((rows, n_flags), -1, dtype=np.int8)  # 1/0, -1 = not evaluated
+        self.rep_t: List[float] = []
+        self.rep_n: List[int] = []
+
+    def widen(self, n_angles: int, n_flags: int):
+        # A key not seen before: add a column (rare - evaluators emit a fixed set)
+        rows = len(self.t)
+        if n_angles > self.angles.shape[1]:
+            extra = np.full((rows, n_angles - self.angles.shape[1]), np.nan, dtype=np.float32)
+            self.angles = np.hstack([self.angles, extra])
+        if n_flags > self.flags.shape[1]:
+            extra = np.full((rows, n_flags - self.flags.shape[1]), -1, dtype=np.int8)
+            self.flags = np.hstack([self.flags, extra])
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        n = self.n
+        return {
+            't': self.t[:n], 'reps': self.reps[:n], 'state': self.state[:n],
+            'feedback': self.feedback[:n], 'good': self.good[:n], 'visible': self.visible[:n],
+            'angles': self.angles[:n], 'flags': self.flags[:n],
+            'rep_t': np.asarray(self.rep_t, dtype=np.float64),
+            'rep_n': np.asarray(self.rep_n, dtype=np.int32),
+        }
+
+
+class SessionLog:
+    """
+    Per-frame log of one session; append() is cheap enough for the inference loop
+
+    Args:
+        store: Owning AnalyticsStore (does the disk writes)
+        log_id: Directory name of this log under the store root
+        meta: Stored in meta.json (exercise, ...)
+    """
+
+    def __init__(self, store: 'AnalyticsStore', log_id: str, meta: Dict[str, Any]):
+        self.store = store
+        self.id = log_id
+        self.path = os.path.join(store.root, log_id)
+        os.makedirs(self.path, exist_ok=True)
+        self.meta = dict(meta, id=log_id, started=time.time(), closed=None, frames=0, reps=0)
+        self.angle_names: List[str] = []
+        self.flag_names: List[str] = []
+        self.states: List[str] = []
+        self.feedbacks: List[str] = []
+        self._codes: Dict[str, Dict[str, int]] = {'state': {}, 'feedback': {}}
+        self._lock = threading.Lock()
+        self._chunk = self._new_chunk()
+        self._pending: List[_Chunk] = []  # handed to the writer, not on disk yet
+        self._seq = 0
+        self._last_reps: Optional[int] = None
+        self.closed = False
+        self._write_meta()
+
+    def _new_chunk(self) -> _Chunk:
+        return _Chunk(self.store.chunk_rows, len(self.angle_names), len(self.flag_names))
+
+    def _code(self, kind: str, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        codes = self._codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            (self.states if kind == 'state' else self.feedbacks).append(value)
+        return code
+
+    def _column(self, names: List[str], name: str) -> int:
+        try:
+            return names.index(name)
+        except ValueError:
+            names.append(name)
+            self._chunk.widen(len(self.angle_names), len(self.flag_names))
+            return len(names) - 1
+
+    def append(self, result, t: Optional[float] = None):
+        """
+        Log one EvalResult
+
+        Args:
+            result: exercises.base.EvalResult
+            t: Frame time in seconds (default result.t, else now)
+        """
+        if t is None:
+            t = result.t if result.t is not None else time.time()
+        with self._lock:
+            if self.closed:
+                return
+            c = self._chunk
+            i = c.n
+            c.t[i] = t
+            c.reps[i] = result.reps
+            c.state[i] = self._code('state', result.state)
+            c.feedback[i] = self._code('feedback', result.feedback)
+            c.good[i] = result.good
+            c.visible[i] = result.visible
+            for name, value in result.angles.items():
+                if value is not None:
+                    j = self._column(self.angle_names, name)  # may widen c.angles
+                    c.angles[i, j] = value
+            for name, value in result.flags.items():
+                j = self._column(self.flag_names, name)
+                c.flags[i, j] = bool(value)
+            if self._last_reps is not None and result.reps > self._last_reps:
+                c.rep_t.append(t)
+                c.rep_n.append(result.reps)
+            self._last_reps = result.reps
+            c.n = i + 1
+            self.meta['frames'] += 1
+            self.meta['reps'] = result.reps
+            if c.n == len(c.t) or time.monotonic() - c.opened >= self.store.flush_every_s:
+                self._hand_off()
+
+    def _hand_off(self):
+        # With the lock held: queue the current chunk for writing and start a new one
+        chunk = self._chunk
+        if chunk.n == 0:
+            return
+        self._chunk = self._new_chunk()
+        chunk.seq = self._seq
+        self._seq += 1
+        self._pending.append(chunk)
+        self.store._submit(self, chunk, list(self.angle_names), list(self.flag_names),
+                           list(self.states), list(self.feedbacks))
+
+    def flush(self):
+        """Queue whatever is buffered for writing (returns without waiting for the disk)"""
+        with self._lock:
+            self._hand_off()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._hand_off()
+            self.closed = True
+            self.meta['closed'] = time.time()
+        self.store._submit_meta(self)
+
+    def _write_meta(self):
+        _atomic_write(os.path.join(self.path, 'meta.json'),
+                      json.dumps(self.meta, indent=2).encode())
+
+    def _written(self, chunk: _Chunk):
+        with self._lock:
+            self._pending.remove(chunk)
+
+    def snapshot(self) -> Tuple[Dict[int, Dict[str, np.ndarray]], Dict[str, np.ndarray]]:
+        """Copies of the rows not on disk yet, keyed by segment number, plus the vocabularies"""
+        with self._lock:
+            chunks = {c.seq: c for c in self._pending}
+            if self._chunk.n:
+                chunks[self._seq] = self._chunk
+            rows = {seq: {k: np.array(v) for k, v in c.columns().items()} for seq, c in chunks.items()}
+            names = {'angle_names': np.array(self.angle_names, dtype=str),
+                     'flag_names': np.array(self.flag_names, dtype=str),
+                     'state_names': np.array(self.states, dtype=str),
+                     'feedback_names': np.array(self.feedbacks, dtype=str)}
+        return rows, names
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _segment_range(name: str):
+    # '000003_1760680000123_1760680010456.npz' -> (3, t0 s, t1 s)
+    seq, t0, t1 = name[:-4].split('_')
+    return int(seq), int(t0) / 1000.0, int(t1) / 1000.0
+
+
+def _decode(vocab: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    # -1 (no value) indexes the appended '' entry
+    return np.append(vocab.astype(str), '')[codes]
+
+
+class AnalyticsStore:
+    """
+    Directory of session logs plus the thread that writes them
+
+    Args:
+        root: Directory holding one sub-directory per session log
+        chunk_rows: Rows buffered per segment
+        flush_every_s: Also write a segment once the buffer is this old,
+            so a crash loses at most this much
+    """
+
+    def __init__(self, root: str, chunk_rows: int = 1024, flush_every_s: float = 10.0):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.flush_every_s = flush_every_s
+        os.makedirs(root, exist_ok=True)
+        self._q: "queue.Queue" = queue.Queue()
+        self._open: Dict[str, SessionLog] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+        self._thread.start()
+        self.segments_written = 0
+
+    def open(self, session_id: str, exercise: str, **meta) -> SessionLog:
+        """Start a new log; its id is unique across server restarts"""
+        log_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{session_id}"
+        n = 1
+        while os.path.exists(os.path.join(self.root, log_id)):
+            n += 1
+            log_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{session_id}-{n}"
+        log = SessionLog(self, log_id, dict(meta, exercise=exercise))
+        with self._lock:
+            self._open[log_id] = log
+        return log
+
+    # ---------- writer thread ----------
+    def _submit(self, log: SessionLog, chunk: _Chunk, angle_names, flag_names, states, feedbacks):
+        self._q.put((log, chunk, angle_names, flag_names, states, feedbacks))
+
+    def _submit_meta(self, log: SessionLog):
+        self._q.put((log, None, None, None, None, None))
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is _STOP:
+                break
+            log, chunk, angle_names, flag_names, states, feedbacks = item
+            try:
+                if chunk is None:
+                    log._write_meta()
+                    if log.closed:
+                        with self._lock:
+                            self._open.pop(log.id, None)
+                    continue
+                self._write_segment(log, chunk, angle_names, flag_names, states, feedbacks)
+                log._written(chunk)
+            except Exception:
+                logger.exception("Analytics write failed for %s", log.id)
+
+    def _write_segment(self, log: SessionLog, chunk: _Chunk, angle_names, flag_names,
+                       states, feedbacks):
+        cols = chunk.columns()
+        cols['angles'] = cols['angles'][:, :len(angle_names)]
+        cols['flags'] = cols['flags'][:, :len(flag_names)]
+        t = cols['t']
+        name = f"{chunk.seq:06d}_{int(t.min() * 1000)}_{int(np.ceil(t.max() * 1000))}.npz"
+        tmp = os.path.join(log.path, name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, angle_names=np.array(angle_names, dtype=str),
+                     flag_names=np.array(flag_names, dtype=str),
+                     state_names=np.array(states, dtype=str),
+                     feedback_names=np.array(feedbacks, dtype=str), **cols)
+        os.replace(tmp, os.path.join(log.path, name))
+        self.segments_written += 1
+
+    def close(self):
+        """Close every open log and wait for the writer to drain"""
+        with self._lock:
+            logs = list(self._open.values())
+        for log in logs:
+            log.close()
+        self._q.put(_STOP)
+        self._thread.join()
+
+    # ---------- reading ----------
+    def sessions(self) -> List[Dict[str, Any]]:
+        """meta.json of every log, oldest first"""
+        metas = []
+        for name in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, name, 'meta.json')) as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        with self._lock:
+            live = {log_id: log.meta for log_id, log in self._open.items()}
+        metas = [dict(live.get(m['id'], m)) for m in metas]
+        return sorted(metas, key=lambda m: m['started'])
+
+    def query(self, log_id: str, t0: Optional[float] = None, t1: Optional[float] = None,
+              max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Frames of one log with t0 <= t <= t1, reading only the segments in range
+
+        Includes rows of a live log that are not on disk yet. max_points thins
+        the frame columns evenly for charts (rep events are never dropped).
+
+        Returns:
+            {'t', 'reps', 'state', 'feedback', 'good', 'visible': arrays,
+             'angles': {name: array}, 'flags': {name: int8 array, -1 = not evaluated},
+             'rep_t', 'rep_n': one entry per rep}
+        """
+        lo = -np.inf if t0 is None else t0
+        hi = np.inf if t1 is None else t1
+        with self._lock:
+            live = self._open.get(log_id)
+        # Snapshot the live rows before listing: a segment written in between is then
+        # found in both, and the snapshot copy wins, so no row is missed or doubled
+        rows, vocab = live.snapshot() if live is not None else ({}, {})
+        parts = {}
+        path = os.path.join(self.root, log_id)
+        for name in os.listdir(path):
+            if not name.endswith('.npz'):
+                continue
+            seq, s0, s1 = _segment_range(name)
+            if seq in rows or s1 < lo or s0 > hi:
+                continue
+            with np.load(os.path.join(path, name)) as z:
+                parts[seq] = self._slice({k: z[k] for k in z.files}, lo, hi)
+        for seq, cols in rows.items():
+            parts[seq] = self._slice(dict(vocab, **cols), lo, hi)
+        return self._merge([parts[seq] for seq in sorted(parts)], max_points)
+
+    @staticmethod
+    def _slice(seg: Dict[str, np.ndarray], lo: float, hi: float) -> Dict[str, Any]:
+        keep = (seg['t'] >= lo) & (seg['t'] <= hi)
+        rep_keep = (seg['rep_t'] >= lo) & (seg['rep_t'] <= hi)
+        # Names only ever grow, so a chunk started before a new key appeared is a prefix
+        angle_names = [str(n) for n in seg['angle_names'][:seg['angles'].shape[1]]]
+        flag_names = [str(n) for n in seg['flag_names'][:seg['flags'].shape[1]]]
+        return {
+            't': seg['t'][keep], 'reps': seg['reps'][keep], 'good': seg['good'][keep],
+            'visible': seg['visible'][keep],
+            'state': _decode(seg['state_names'], seg['state'][keep]),
+            'feedback': _decode(seg['feedback_names'], seg['feedback'][keep]),
+            'angles': {n: seg['angles'][keep, j] for j, n in enumerate(angle_names)},
+            'flags': {n: seg['flags'][keep, j] for j, n in enumerate(flag_names)},
+            'rep_t': seg['rep_t'][rep_keep], 'rep_n': seg['rep_n'][rep_keep],
+        }
+
+    @staticmethod
+    def _merge(parts: List[Dict[str, Any]], max_points: Optional[int]) -> Dict[str, Any]:
+        n = sum(len(p['t']) for p in parts)
+        step = max(1, -(-n // max_points)) if max_points else 1
+        out: Dict[str, Any] = {}
+        for key, fill in (('angles', np.nan), ('flags', -1)):
+            names = list(dict.fromkeys(name for p in parts for name in p[key]))
+            dtype = np.float32 if key == 'angles' else np.int8
+            out[key] = {name: np.concatenate([p[key].get(name, np.full(len(p['t']), fill, dtype=dtype))
+                                              for p in parts] or [np.empty(0, dtype)])[::step]
+                        for name in names}
+        for key, dtype in (('t', np.float64), ('reps', np.int32), ('good', np.bool_),
+                           ('visible', np.bool_), ('state', str), ('feedback', str)):
+            out[key] = np.concatenate([p[key] for p in parts] or [np.empty(0, dtype)])[::step]
+        for key, dtype in (('rep_t', np.float64), ('rep_n', np.int32)):
+            out[key] = np.concatenate([p[key] for p in parts] or [np.empty(0, dtype)])
+        return out
@@ -4,9 +4,25 @@ Memory optimized for Streamlit hosting
 """
 
 import math
-import numpy as np
+from itertools import islice
 from typing import List, Optional, Union, Tuple
 
+def angle_deg(ax: float, ay: float, bx: float, by: float, cx: float, cy: float) -> Optional[float]:
+    """
+    Scalar fast path: angle at (bx, by) formed by a-b-c, pure math (no NumPy)
+
+    Returns:
+        Angle in degrees (0-180), or None if either segment has zero length
+    """
+    bax = ax - bx
+    bay = ay - by
+    bcx = cx - bx
+    bcy = cy - by
+    if (bax == 0.0 and bay == 0.0) or (bcx == 0.0 and bcy == 0.0):
+        return None
+    # atan2(|cross|, dot) is exact near 0/180 where acos(dot/|a||b|) loses precision
+    return math.degrees(math.atan2(abs(bax * bcy - bay * bcx), bax * bcx + bay * bcy))
+
 def angle_3pts(a: Union[List[float], Tuple[float, float]], 
                b: Union[List[float], Tuple[float, float]], 
                c: Union[List[float], Tuple[float, float]]) -> Optional[float]:
@@ -20,26 +36,8 @@ def angle_3pts(a: Union[List[float], Tuple[float, float]],
         Angle in degrees, or None if calculation fails
     """
     try:
-        # Convert to numpy arrays for calculation
-        a = np.array(a[:2])  # Take only x,y
-        b = np.array(b[:2])
-        c = np.array(c[:2])
-        
-        # Calculate vectors
-        ba = a - b
-        bc = c - b
-        
-        # Calculate angle using dot product
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        
-        # Clamp to valid range to avoid numerical errors
-        cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-        
-        # Convert to degrees
-        angle = np.arccos(cosine_angle)
-        return np.degrees(angle)
-        
-    except (ValueError, ZeroDivisionError, TypeError):
+        return angle_deg(a[0], a[1], b[0], b[1], c[0], c[1])
+    except (TypeError, IndexError):
         return None
 
 def line_angle_deg(p1: Union[List[float], Tuple[float, float]], 
@@ -69,6 +67,7 @@ def line_angle_deg(p1: Union[List[float], Tuple[float, float]],
 def moving_average(data_deque, window_size: Optional[int] = None) -> Optional[float]:
     """
     Calculate moving average from deque
+    (for per-frame smoothing prefer the streaming filters in utils.filters)
     
     Args:
         data_deque: Collections.deque containing numeric values
@@ -81,12 +80,12 @@ def moving_average(data_deque, window_size: Optional[int] = None) -> Optional[fl
         if not data_deque:
             return None
         
-        # Use specified window size or all available data
-        data_list = list(data_deque)
-        if window_size and len(data_list) > window_size:
-            data_list = data_list[-window_size:]
+        # Use specified window size or all available data (no list copy)
+        n = len(data_deque)
+        if window_size and n > window_size:
+            return sum(islice(reversed(data_deque), window_size)) / window_size
         
-        return sum(data_list) / len(data_list)
+        return sum(data_deque) / n
         
     except (TypeError, ZeroDivisionError):
         return None
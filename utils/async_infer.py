@@ -0,0 +1,104 @@
+"""
+Latest-frame-wins background worker
+The producer (e.g. a WebRTC recv()) hands frames over without waiting; the
+worker thread always processes the newest one and drops whatever was
+superseded, so latency is bounded by one processing call instead of a
+growing backlog.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameWorker:
+    """
+    One-slot mailbox + a daemon thread running `process_fn` on the newest item
+
+    Args:
+        process_fn: fn(item) -> result, run on the worker thread only
+        name: Thread name (for logs / debuggers)
+
+    Usage:
+        worker = LatestFrameWorker(infer)
+        worker.submit(frame)        # never blocks; replaces an unprocessed frame
+        result = worker.latest()    # most recent result (None before the first)
+        worker.close()
+    """
+
+    def __init__(self, process_fn: Callable[[Any], Any], name: str = 'latest-frame-worker'):
+        self.process_fn = process_fn
+        self._cond = threading.Condition()
+        self._pending: Any = None
+        self._has_pending = False
+        self._stopped = False
+        self._result: Any = None
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_latency_s = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """Offer a new item; an item still waiting in the slot is dropped"""
+        with self._cond:
+            if self._stopped:
+                return
+            if self._has_pending:
+                self.dropped += 1
+            self._pending = item
+            self._has_pending = True
+            self.submitted += 1
+            self._cond.notify()
+
+    def latest(self):
+        return self._result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                item = self._pending
+                self._pending = None
+                self._has_pending = False
+
+            start = time.perf_counter()
+            try:
+                self._result = self.process_fn(item)
+            except Exception:
+                # Keep serving: one bad frame must not kill the session's inference
+                self.errors += 1
+                logger.exception("Worker %s failed on a frame", self._thread.name)
+            self.last_latency_s = time.perf_counter() - start
+            self.processed += 1
+
+    def close(self, timeout: Optional[float] = 2.0):
+        """Stop after the frame in progress (if any); pending items are discarded"""
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._has_pending = False
+            self._cond.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'submitted': self.submitted,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'latency_ms': round(self.last_latency_s * 1000.0, 2),
+        }
@@ -0,0 +1,208 @@
+"""
+Threaded frame capture
+Decodes a cv2.VideoCapture source on a background thread into a fixed ring
+of preallocated frame buffers, so decoding overlaps inference instead of
+stalling it. 'latest' mode (live cameras, RTSP/HTTP streams) always hands
+out the newest frame and drops the rest, keeping latency at one frame;
+'all' mode (files) hands out every frame in order and makes the decoder
+wait when the consumer falls behind.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+_FREE, _READY, _HELD = 0, 1, 2
+
+
+class _Slot:
+    __slots__ = ('buf', 'state', 'seq', 't_ms', 'captured')
+
+    def __init__(self):
+        self.buf: Optional[np.ndarray] = None
+        self.state = _FREE
+        self.seq = 0
+        self.t_ms = 0.0
+        self.captured = 0.0
+
+
+def _is_live(src) -> bool:
+    if isinstance(src, int):
+        return True
+    return str(src).isdigit() or '://' in str(src)
+
+
+class ThreadedCapture:
+    """
+    Drop-in for cv2.VideoCapture (isOpened/read/get/release) with a decode thread
+
+    Args:
+        src: Camera index, file path or stream URL
+        mode: 'latest', 'all', or 'auto' (latest for cameras/URLs, all for files)
+        buffers: Ring size (at least 3: one being decoded, one ready, one held)
+
+    The array read() returns is a ring slot: it stays valid until the next
+    read() and is then reused, so copy it if you keep it longer.
+    """
+
+    def __init__(self, src, mode: str = 'auto', buffers: int = 4):
+        if mode == 'auto':
+            mode = 'latest' if _is_live(src) else 'all'
+        if mode not in ('latest', 'all'):
+            raise ValueError(f"Unknown capture mode {mode!r}")
+        self.src = src
+        self.mode = mode
+        self.live = _is_live(src)
+        self.cap = cv2.VideoCapture(src)
+        self._slots: List[_Slot] = [_Slot() for _ in range(max(3, buffers))]
+        self._cond = threading.Condition()
+        self._held: Optional[_Slot] = None
+        self._seq = 0
+        self._eof = False
+        self._stopped = False
+        self.decoded = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.waits = 0            # 'all' mode: times the decoder waited for a free slot
+        self._decode_s = 0.0
+        self.last_decode_s = 0.0
+        self.last_t_ms = 0.0      # media time of the frame last returned by read()
+        self.last_captured = 0.0  # perf_counter when that frame finished decoding
+        self._thread = None
+        if self.cap.isOpened():
+            self._thread = threading.Thread(target=self._run, name='capture', daemon=True)
+            self._thread.start()
+        else:
+            self._eof = True
+
+    # ---------- decoder thread ----------
+    def _take_free(self) -> Optional[_Slot]:
+        # Called with the lock held
+        while True:
+            free = [s for s in self._slots if s.state == _FREE]
+            if free:
+                return free[0]
+            if self.mode == 'latest':
+                # Overwrite the oldest unread frame: it is stale now
+                oldest = min((s for s in self._slots if s.state == _READY), key=lambda s: s.seq)
+                oldest.state = _FREE
+                self.dropped += 1
+                return oldest
+            self.waits += 1
+            self._cond.wait()
+            if self._stopped:
+                return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                slot = self._take_free()
+                if slot is None:
+                    return
+            start = time.perf_counter()
+            ok, frame = self.cap.read(slot.buf) if slot.buf is not None else self.cap.read()
+            end = time.perf_counter()
+            with self._cond:
+                if not ok or self._stopped:
+                    self._eof = True
+                    self._cond.notify_all()
+                    return
+                slot.buf = frame  # same array unless the frame size changed
+                self._seq += 1
+                slot.seq = self._seq
+                slot.t_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+                slot.captured = end
+                slot.state = _READY
+                self.decoded += 1
+                self.last_decode_s = end - start
+                self._decode_s += self.last_decode_s
+                self._cond.notify_all()
+
+    # ---------- consumer ----------
+    def read(self, timeout: Optional[float] = None):
+        """
+        Next frame: the newest one ('latest') or the next in order ('all')
+
+        Returns:
+            (True, frame) or (False, None) at end of stream / on timeout
+        """
+        with self._cond:
+            if self._held is not None:
+                self._held.state = _FREE
+                self._held = None
+                self._cond.notify_all()
+            deadline = None if timeout is None else time.perf_counter() + timeout
+            while True:
+                if self._stopped:  # released: like cv2, no more frames (buffered ones included)
+                    return False, None
+                ready = [s for s in self._slots if s.state == _READY]
+                if ready:
+                    break
+                if self._eof:
+                    return False, None
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False, None
+                self._cond.wait(remaining)
+
+            ready.sort(key=lambda s: s.seq)
+            if self.mode == 'latest':
+                slot = ready[-1]
+                for stale in ready[:-1]:
+                    stale.state = _FREE
+                    self.dropped += 1
+            else:
+                slot = ready[0]
+            slot.state = _HELD
+            self._held = slot
+            self.delivered += 1
+            self.last_t_ms = slot.t_ms
+            self.last_captured = slot.captured
+            self._cond.notify_all()
+            return True, slot.buf
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop: int) -> float:
+        # Position refers to the frame last handed out, not to where the decoder is
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.last_t_ms
+        return self.cap.get(prop)
+
+    def frame_time(self) -> float:
+        """
+        Media time (s) of the frame last handed out, for utils.clock.FrameClock
+
+        Files report their position; cameras and streams the moment the frame
+        was grabbed, which does not include the time it waited in the ring.
+        """
+        return self.last_captured if self.live else self.last_t_ms / 1000.0
+
+    def release(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None and threading.current_thread() is not self._thread:
+            self._thread.join(2.0)
+        self.cap.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'mode': self.mode,
+            'decoded': self.decoded,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'decoder_waits': self.waits,
+            'decode_ms_mean': round(self._decode_s / self.decoded * 1000.0, 2) if self.decoded else 0.0,
+            'decode_ms_last': round(self.last_decode_s * 1000.0, 2),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
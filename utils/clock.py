@@ -0,0 +1,95 @@
+"""
+Frame clocks
+Every evaluator times holds, cooldowns and FPS on the `t` it is given with
+each frame. FrameClock turns whatever time a source reports - a file
+position, a WebRTC PTS, the moment a camera frame was grabbed - into that t,
+so a recording replayed at full speed is timed exactly as it was live.
+Only sources that report no time at all fall back to the wall clock (or to a
+nominal frame rate for replays).
+"""
+
+import time
+from typing import Optional
+
+import av
+
+
+def av_frame_time(frame: av.VideoFrame) -> Optional[float]:
+    """Presentation time (s) of a PyAV/WebRTC frame, None if the stream has none"""
+    if frame.pts is None or frame.time_base is None:
+        return None
+    return float(frame.pts * frame.time_base)
+
+
+class FrameClock:
+    """
+    Maps per-frame media times onto one monotonic timeline
+
+    Args:
+        origin: Timeline time of the first frame; None = the wall clock when it
+            arrives, so results and analytics of live sessions carry epoch times.
+            Batch reports use 0 (times are then positions in the file).
+        fps: Nominal frame rate. With it, frames without a media time advance
+            the clock by 1/fps (replays); without it they take the wall clock (live).
+
+    A media time that jumps backwards or by more than max_gap_s (looping file,
+    restarted stream) does not move the timeline backwards: the clock re-anchors
+    one frame interval after the previous frame.
+    """
+
+    def __init__(self, origin: Optional[float] = None, fps: Optional[float] = None,
+                 max_gap_s: float = 5.0):
+        self.origin = origin
+        self.nominal_fps = fps
+        self.max_gap_s = max_gap_s
+        self.reset()
+
+    def reset(self):
+        self.t: Optional[float] = None  # timeline time of the last frame
+        self.dt = 0.0                   # interval between the last two frames
+        self.frames = 0
+        self._anchor: Optional[float] = None  # timeline - media offset
+        self._media: Optional[float] = None   # last media time seen
+        self._wall: Optional[float] = None    # wall time of the last stamp()
+
+    def _step(self) -> float:
+        if self.dt > 0:
+            return self.dt
+        return 1.0 / self.nominal_fps if self.nominal_fps else 1.0 / 30.0
+
+    def stamp(self, media_t: Optional[float] = None) -> float:
+        """
+        Timeline time (s) of the next frame
+
+        Args:
+            media_t: The frame's own time in seconds (position, PTS or grab time); None if unknown
+        """
+        wall = time.time()
+        prev = self.t
+        if prev is None:
+            t = wall if self.origin is None else self.origin
+            if media_t is not None:
+                self._anchor = t - media_t
+        elif media_t is not None:
+            if self._anchor is None or self._media is None or \
+                    not (0.0 < media_t - self._media <= self.max_gap_s):
+                self._anchor = prev + self._step() - media_t  # discontinuity: re-anchor
+            t = self._anchor + media_t
+        elif self.nominal_fps:
+            self._anchor = None
+            t = prev + 1.0 / self.nominal_fps
+        else:
+            self._anchor = None
+            t = prev + max(0.0, wall - self._wall)
+        if media_t is not None:
+            self._media = media_t
+        self._wall = wall
+        self.dt = 0.0 if prev is None else t - prev
+        self.t = t
+        self.frames += 1
+        return t
+
+    @property
+    def fps(self) -> float:
+        """Instantaneous frame rate on the timeline (0 before the second frame)"""
+        return 1.0 / self.dt if self.dt > 0 else 0.0
@@ -0,0 +1,217 @@
+"""
+Streaming smoothing filters for per-frame signals (angles, FPS, positions)
+Each filter keeps O(window) state in __slots__ and updates in constant time
+(the median in O(window), see MedianFilter), replacing the deque +
+moving_average() pattern that copied the window per call.
+"""
+
+import math
+from bisect import bisect_left, insort
+from typing import List, Optional
+
+
+class MovingAverage:
+    """Simple moving average over the last `size` samples (running sum)"""
+
+    __slots__ = ('size', '_buf', '_idx', '_count', '_sum')
+
+    def __init__(self, size: int = 5):
+        self.size = max(1, int(size))
+        self._buf: List[float] = [0.0] * self.size
+        self.reset()
+
+    def reset(self):
+        self._idx = 0
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, x: float, t: Optional[float] = None) -> float:
+        x = float(x)
+        if self._count < self.size:
+            self._count += 1
+            self._sum += x
+        else:
+            self._sum += x - self._buf[self._idx]
+        self._buf[self._idx] = x
+        self._idx += 1
+        if self._idx == self.size:
+            self._idx = 0
+            # Re-sum once per lap so float drift cannot accumulate (amortised O(1))
+            self._sum = math.fsum(self._buf[:self._count])
+        return self._sum / self._count
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self._count if self._count else None
+
+    def __len__(self):
+        return self._count
+
+
+class ExponentialMovingAverage:
+    """EMA with smoothing factor alpha (alpha = 2 / (window + 1) matches an SMA's lag)"""
+
+    __slots__ = ('alpha', '_value', '_count')
+
+    def __init__(self, alpha: float = 0.33):
+        self.alpha = float(alpha)
+        self.reset()
+
+    def reset(self):
+        self._value: Optional[float] = None
+        self._count = 0
+
+    def update(self, x: float, t: Optional[float] = None) -> float:
+        x = float(x)
+        self._count += 1
+        if self._value is None:
+            self._value = x
+        else:
+            self._value += self.alpha * (x - self._value)
+        return self._value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+    def __len__(self):
+        return self._count
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter (Casiez et al. 2012): low-pass whose cutoff rises with speed
+
+    Holds still signals steady while following fast motion with little lag,
+    so a smaller effective window can be used for rep detection.
+
+    Args:
+        freq: Nominal sample rate in Hz, used when update() gets no timestamp
+        min_cutoff: Cutoff (Hz) at rest; lower = smoother
+        beta: Speed coefficient; higher = less lag during fast movement
+        d_cutoff: Cutoff (Hz) for the derivative estimate
+    """
+
+    __slots__ = ('freq', 'min_cutoff', 'beta', 'd_cutoff', '_x', '_dx', '_t', '_count')
+
+    def __init__(self, freq: float = 30.0, min_cutoff: float = 1.0,
+                 beta: float = 0.02, d_cutoff: float = 1.0):
+        self.freq = float(freq)
+        self.min_cutoff = float(min_cutoff)
+        self.beta = float(beta)
+        self.d_cutoff = float(d_cutoff)
+        self.reset()
+
+    def reset(self):
+        self._x: Optional[float] = None
+        self._dx = 0.0
+        self._t: Optional[float] = None
+        self._count = 0
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x: float, t: Optional[float] = None) -> float:
+        """
+        Args:
+            x: New sample
+            t: Sample time in seconds (optional; 1/freq spacing is assumed without it)
+        """
+        x = float(x)
+        self._count += 1
+        if self._x is None:
+            self._x = x
+            self._t = t
+            return x
+
+        dt = 1.0 / self.freq
+        if t is not None and self._t is not None and t > self._t:
+            dt = t - self._t
+        self._t = t
+
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        self._x += self._alpha(cutoff, dt) * (x - self._x)
+        return self._x
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._x
+
+    def __len__(self):
+        return self._count
+
+
+class MedianFilter:
+    """
+    Median of the last `size` samples; rejects single-frame landmark glitches
+
+    update() is O(size): the window is kept as a sorted list, and dropping the
+    oldest sample and inserting the new one each shift part of it. For the
+    few-frame windows used on landmark signals that memmove is cheaper than the
+    Python-level bookkeeping of a two-heap median.
+    """
+
+    __slots__ = ('size', '_buf', '_sorted', '_idx')
+
+    def __init__(self, size: int = 5):
+        self.size = max(1, int(size))
+        self.reset()
+
+    def reset(self):
+        self._buf: List[float] = []
+        self._sorted: List[float] = []
+        self._idx = 0
+
+    def update(self, x: float, t: Optional[float] = None) -> float:
+        x = float(x)
+        if len(self._buf) < self.size:
+            self._buf.append(x)
+        else:
+            old = self._buf[self._idx]
+            del self._sorted[bisect_left(self._sorted, old)]
+            self._buf[self._idx] = x
+            self._idx = (self._idx + 1) % self.size
+        insort(self._sorted, x)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        n = len(self._sorted)
+        if not n:
+            return None
+        mid = n // 2
+        if n % 2:
+            return self._sorted[mid]
+        return (self._sorted[mid - 1] + self._sorted[mid]) / 2.0
+
+    def __len__(self):
+        return len(self._buf)
+
+
+FILTERS = ('sma', 'ema', 'one_euro', 'median')
+
+def make_filter(kind: str = 'sma', window: int = 5, **kwargs):
+    """
+    Build a streaming filter by name
+
+    Args:
+        kind: One of FILTERS
+        window: Window length (SMA/median) or equivalent-lag window (EMA)
+        **kwargs: Passed through to OneEuroFilter
+
+    Returns:
+        Filter with update(x, t=None), value, reset() and len()
+    """
+    if kind == 'sma':
+        return MovingAverage(window)
+    if kind == 'ema':
+        return ExponentialMovingAverage(2.0 / (max(1, window) + 1))
+    if kind == 'one_euro':
+        return OneEuroFilter(**kwargs)
+    if kind == 'median':
+        return MedianFilter(window)
+    raise ValueError(f"Unknown filter '{kind}', expected one of {FILTERS}")
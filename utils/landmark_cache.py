@@ -0,0 +1,152 @@
+"""
+On-disk cache of pose landmarks per video
+Stores the 33x4 (x, y, z, visibility) landmark array of every frame so
+evaluators can be re-run against new thresholds without pose inference.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+CACHE_VERSION = 1
+
+
+class Landmark(NamedTuple):
+    """Stand-in for a MediaPipe NormalizedLandmark (same attribute names)"""
+    x: float
+    y: float
+    z: float
+    visibility: float
+
+
+def landmarks_to_array(landmarks, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Pack MediaPipe landmarks into a (33, 4) float32 array
+
+    Args:
+        landmarks: Sequence of objects with x, y, z, visibility
+        out: Optional preallocated (33, 4) array to fill
+
+    Returns:
+        The filled array
+    """
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    for i, lm in enumerate(landmarks):
+        out[i, 0] = lm.x
+        out[i, 1] = lm.y
+        out[i, 2] = lm.z
+        out[i, 3] = lm.visibility
+    return out
+
+
+def array_to_landmarks(arr: np.ndarray) -> List[Landmark]:
+    """Unpack a (33, 4) array into landmark objects accepted by eval_and_draw()"""
+    return [Landmark(*row) for row in arr.tolist()]
+
+
+def video_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-1 of the video file contents (the cache must follow the bytes, not the name)"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(content_hash: str, settings: Dict) -> str:
+    """Combine the video hash with the pose model settings that produced the landmarks"""
+    blob = json.dumps({'v': CACHE_VERSION, 'video': content_hash, 'settings': settings},
+                      sort_keys=True)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CachedLandmarks:
+    landmarks: np.ndarray      # (frames, 33, 4) float32, NaN rows where no pose was found
+    timestamps_ms: np.ndarray  # (frames,) float64 media time of each frame
+    width: int                 # frame size the landmarks were inferred at
+    height: int
+    fps: float
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def has_pose(self, idx: int) -> bool:
+        return not np.isnan(self.landmarks[idx, 0, 0])
+
+
+class LandmarkCache:
+    """
+    Directory of cached landmark arrays
+
+    Layout: <root>/<key>/{landmarks.npy, timestamps.npy, meta.json}
+    where <key> = cache_key(video_hash(video), settings). Arrays are
+    opened memory-mapped, so loading a long session is near free.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._hashes: Dict[str, str] = {}
+
+    def _key(self, video: str, settings: Dict) -> str:
+        if video not in self._hashes:
+            self._hashes[video] = video_hash(video)
+        return cache_key(self._hashes[video], settings)
+
+    def path_for(self, video: str, settings: Dict) -> str:
+        return os.path.join(self.root, self._key(video, settings))
+
+    def load(self, video: str, settings: Dict) -> Optional[CachedLandmarks]:
+        """Return the cached landmarks for video/settings, or None on a miss"""
+        path = self.path_for(video, settings)
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return CachedLandmarks(
+                landmarks=np.load(os.path.join(path, 'landmarks.npy'), mmap_mode='r'),
+                timestamps_ms=np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r'),
+                width=int(meta['width']),
+                height=int(meta['height']),
+                fps=float(meta['fps']),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, video: str, settings: Dict, landmarks: np.ndarray,
+             timestamps_ms: np.ndarray, width: int, height: int, fps: float) -> str:
+        """Write one video's landmarks atomically (readers never see a partial entry)"""
+        path = self.path_for(video, settings)
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        try:
+            os.chmod(tmp, 0o755)
+            np.save(os.path.join(tmp, 'landmarks.npy'),
+                    np.ascontiguousarray(landmarks, dtype=np.float32))
+            np.save(os.path.join(tmp, 'timestamps.npy'),
+                    np.ascontiguousarray(timestamps_ms, dtype=np.float64))
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'video': os.path.abspath(video),
+                           'settings': settings, 'frames': int(len(landmarks)),
+                           'width': int(width), 'height': int(height), 'fps': float(fps)},
+                          f, indent=2)
+            if os.path.exists(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return path
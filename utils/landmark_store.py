@@ -0,0 +1,240 @@
+"""
+Memory-mapped landmark dataset
+One store holds the pose landmarks of many sessions back to back in a single
+(frames, 33, 4) array on disk, plus a fixed-size record per session giving
+its offset, frame count, FPS and exercise. Everything is opened with
+np.memmap, so a session or a run of frames is a view into the page cache:
+the evaluators (via replay_video) and the threshold sweep read it without a
+copy, and a scan over the whole history never builds per-session Python
+objects.
+
+Layout: <root>/{store.json, landmarks.bin, timestamps.bin, index.bin}
+Appends write the frames first and the index record last, so readers (and a
+writer restarting after a crash) only ever see whole sessions. One writer at
+a time.
+"""
+
+import json
+import os
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.landmark_cache import NUM_LANDMARKS, CachedLandmarks
+
+STORE_VERSION = 1
+
+INDEX_DTYPE = np.dtype([
+    ('id', 'U64'),         # session id (e.g. the landmark cache key)
+    ('exercise', 'U16'),
+    ('offset', '<i8'),     # first frame in landmarks.bin / timestamps.bin
+    ('frames', '<i8'),
+    ('fps', '<f4'),
+    ('width', '<i4'),      # frame size the landmarks were inferred at
+    ('height', '<i4'),
+    ('reps', '<i4'),       # labelled rep count, -1 if unknown
+])
+
+
+class LandmarkStore:
+    """
+    Append-only, memory-mapped store of landmark sessions
+
+    Args:
+        root: Store directory (created on first append)
+        dtype: 'float16' (half the disk and page cache) or 'float32'; only used
+            when the store is created, an existing store keeps its own
+    """
+
+    def __init__(self, root: str, dtype: str = 'float16'):
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float16, np.float32):
+            raise ValueError(f"Unsupported landmark dtype {dtype!r}")
+        meta_path = os.path.join(root, 'store.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.dtype = np.dtype(meta['dtype'])
+        self._index: Optional[np.ndarray] = None
+        self._landmarks: Optional[np.ndarray] = None
+        self._timestamps: Optional[np.ndarray] = None
+        self._ids = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    # ---------- reading ----------
+    @property
+    def index(self) -> np.ndarray:
+        """Structured array of INDEX_DTYPE, one row per session (read-only)"""
+        if self._index is None:
+            path = self._path('index.bin')
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            n = size // INDEX_DTYPE.itemsize
+            self._index = (np.memmap(path, dtype=INDEX_DTYPE, mode='r', shape=(n,)) if n
+                           else np.zeros(0, dtype=INDEX_DTYPE))
+        return self._index
+
+    @property
+    def frames(self) -> int:
+        """Frames covered by the index (bytes past it belong to an unfinished append)"""
+        index = self.index
+        return int(index['offset'][-1] + index['frames'][-1]) if len(index) else 0
+
+    def _maps(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._landmarks is None:
+            n = self.frames
+            if n:
+                self._landmarks = np.memmap(self._path('landmarks.bin'), dtype=self.dtype, mode='r',
+                                            shape=(n, NUM_LANDMARKS, 4))
+                self._timestamps = np.memmap(self._path('timestamps.bin'), dtype='<f8', mode='r',
+                                             shape=(n,))
+            else:
+                self._landmarks = np.zeros((0, NUM_LANDMARKS, 4), dtype=self.dtype)
+                self._timestamps = np.zeros(0, dtype='<f8')
+        return self._landmarks, self._timestamps
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.find(session_id) is not None
+
+    def find(self, session_id: str) -> Optional[int]:
+        """Index row of a session id, or None"""
+        if self._ids is None:
+            self._ids = {sid: row for row, sid in enumerate(self.index['id'].tolist())}
+        return self._ids.get(session_id)
+
+    def _row(self, key: Union[int, str]) -> int:
+        row = self.find(key) if isinstance(key, str) else int(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+
+    def frame_range(self, start: int, stop: int) -> np.ndarray:
+        """(stop - start, 33, 4) view of consecutive frames, across sessions"""
+        return self._maps()[0][start:stop]
+
+    def session(self, key: Union[int, str]) -> CachedLandmarks:
+        """
+        One session as views into the store (no copy)
+
+        The result is what utils.pipeline.replay_video() takes, so evaluators can
+        re-run straight off the store.
+        """
+        rec = self.index[self._row(key)]
+        lo, hi = int(rec['offset']), int(rec['offset'] + rec['frames'])
+        landmarks, timestamps = self._maps()
+        return CachedLandmarks(landmarks=landmarks[lo:hi], timestamps_ms=timestamps[lo:hi],
+                               width=int(rec['width']), height=int(rec['height']),
+                               fps=float(rec['fps']))
+
+    def rows(self, exercise: Optional[str] = None, labelled: bool = False) -> np.ndarray:
+        """Index rows, optionally of one exercise and/or only sessions with a rep label"""
+        index = self.index
+        mask = np.ones(len(index), dtype=bool)
+        if exercise is not None:
+            mask &= index['exercise'] == exercise
+        if labelled:
+            mask &= index['reps'] >= 0
+        return np.flatnonzero(mask)
+
+    def iter_chunks(self, chunk_frames: int = 1 << 16,
+                    exercise: Optional[str] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Stream the store in bounded pieces for aggregate scans
+
+        Yields:
+            (session row of every frame (n,), landmark view (n, 33, 4)), at most
+            chunk_frames long; with `exercise` set only that exercise's sessions
+            are visited, each in its own chunks
+        """
+        index = self.index
+        landmarks = self._maps()[0]
+        rows = self.rows(exercise)
+        if exercise is None and len(rows):
+            spans = [(0, self.frames)]
+        else:
+            spans = [(int(index['offset'][r]), int(index['offset'][r] + index['frames'][r])) for r in rows]
+        starts = index['offset']
+        for lo, hi in spans:
+            for a in range(lo, hi, chunk_frames):
+                b = min(hi, a + chunk_frames)
+                owner = np.searchsorted(starts, np.arange(a, b), side='right') - 1
+                yield owner, landmarks[a:b]
+
+    # ---------- writing ----------
+    def _reopen(self):
+        self._index = self._landmarks = self._timestamps = None
+        self._ids = None
+
+    def append(self, session_id: str, exercise: str, landmarks: np.ndarray,
+               timestamps_ms: np.ndarray, fps: float, width: int, height: int,
+               reps: int = -1) -> int:
+        """
+        Add one session
+
+        Args:
+            session_id: Unique id (at most 64 characters)
+            exercise: Key of exercises.registry.EXERCISES (at most 16 characters)
+            landmarks: (frames, 33, 4) x, y, z, visibility; NaN rows where no pose was found
+            timestamps_ms: (frames,) media time of each frame
+            fps, width, height: As recorded (see CachedLandmarks)
+            reps: Labelled rep count, -1 if unknown
+
+        Returns:
+            The session's index row
+        """
+        if len(session_id) > 64 or len(exercise) > 16:
+            raise ValueError("session id / exercise name too long for the index")
+        if session_id in self:
+            raise ValueError(f"Session {session_id!r} is already in the store")
+        landmarks = np.asarray(landmarks)
+        if landmarks.ndim != 3 or landmarks.shape[1:] != (NUM_LANDMARKS, 4):
+            raise ValueError(f"Expected (frames, {NUM_LANDMARKS}, 4) landmarks, got {landmarks.shape}")
+        if len(timestamps_ms) != len(landmarks):
+            raise ValueError("One timestamp per frame expected")
+
+        os.makedirs(self.root, exist_ok=True)
+        meta_path = self._path('store.json')
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w') as f:
+                json.dump({'version': STORE_VERSION, 'dtype': self.dtype.name,
+                           'landmarks': [NUM_LANDMARKS, 4]}, f, indent=2)
+
+        offset = self.frames
+        rec = np.zeros(1, dtype=INDEX_DTYPE)
+        rec[0] = (session_id, exercise, offset, len(landmarks), fps, width, height, reps)
+        self._reopen()  # drop the maps before the files grow
+        # Cut off whatever an interrupted append left behind, then write data before the index
+        for name, data, row_bytes in (
+                ('landmarks.bin', np.ascontiguousarray(landmarks, dtype=self.dtype),
+                 NUM_LANDMARKS * 4 * self.dtype.itemsize),
+                ('timestamps.bin', np.ascontiguousarray(timestamps_ms, dtype='<f8'), 8)):
+            with open(self._path(name), 'ab') as f:
+                f.truncate(offset * row_bytes)
+                data.tofile(f)
+        with open(self._path('index.bin'), 'ab') as f:
+            f.truncate(len(self.index) * INDEX_DTYPE.itemsize)
+            rec.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._reopen()
+        return len(self.index) - 1
+
+    def set_label(self, key: Union[int, str], reps: int):
+        """Record (or correct) a session's labelled rep count in place"""
+        row = self._row(key)
+        index = np.memmap(self._path('index.bin'), dtype=INDEX_DTYPE, mode='r+', shape=(len(self.index),))
+        index['reps'][row] = reps
+        index.flush()
+        del index
+        self._reopen()
+
+    def add_cached(self, session_id: str, exercise: str, cached: CachedLandmarks,
+                   reps: int = -1) -> int:
+        """Append a LandmarkCache entry (e.g. after a batch run)"""
+        return self.append(session_id, exercise, cached.landmarks, cached.timestamps_ms,
+                           cached.fps, cached.width, cached.height, reps)
@@ -0,0 +1,368 @@
+"""
+Multi-person tracking and scoring for one camera feed
+A people detector runs every few frames to find lifters; each person then
+becomes a track with a stable ID, its own MediaPipe Pose (borrowed from a
+PosePool), its own RoiTracker crop and its own evaluator, so rep counts and
+smoothing windows never mix. Per-track inference runs in parallel on small
+crops, so adding a person costs far less than adding a full-frame pass.
+"""
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils import startup
+from utils.profiling import get_profiler
+from utils.roi import Box, RoiTracker
+from utils.sessions import PosePool
+
+# Distinct BGR colours for track labels
+TRACK_COLORS = ((0, 200, 255), (255, 128, 0), (0, 255, 128), (255, 0, 200),
+                (128, 0, 255), (0, 128, 255), (200, 255, 0), (255, 255, 255))
+
+
+def iou(a: Box, b: Box) -> float:
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    if inter == 0:
+        return 0.0
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / float(union)
+
+
+class PersonDetector:
+    """
+    OpenCV HOG people detector (ships with OpenCV, no model download)
+
+    Args:
+        width: Frames are downscaled to this width before detection (None = as is)
+        min_score: SVM score below which hits are discarded
+        nms_iou: Overlap above which the weaker of two hits is suppressed
+    """
+
+    def __init__(self, width: Optional[int] = 640, min_score: float = 0.3, nms_iou: float = 0.4):
+        self.width = width
+        self.min_score = min_score
+        self.nms_iou = nms_iou
+        self._hog = cv2.HOGDescriptor()
+        self._hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, frame: np.ndarray) -> List[Tuple[Box, float]]:
+        """People boxes (x0, y0, x1, y1) in frame pixels with their scores"""
+        h, w = frame.shape[:2]
+        scale = 1.0
+        if self.width and w > self.width:
+            scale = w / float(self.width)
+            frame = cv2.resize(frame, (self.width, int(h / scale)), interpolation=cv2.INTER_AREA)
+        rects, weights = self._hog.detectMultiScale(frame, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(rects) == 0:
+            return []
+        rects = [[int(v) for v in r] for r in rects]
+        scores = [float(s) for s in np.ravel(weights)]
+        keep = cv2.dnn.NMSBoxes(rects, scores, self.min_score, self.nms_iou)
+        out = []
+        for i in np.ravel(keep):
+            x, y, bw, bh = rects[i]
+            out.append(((int(x * scale), int(y * scale), int((x + bw) * scale), int((y + bh) * scale)),
+                        scores[i]))
+        return out
+
+
+class Track:
+    """One person: stable ID, evaluator state, Pose graph, crop tracker and its own clock"""
+
+    def __init__(self, track_id: int, evaluator, pose, roi: RoiTracker):
+        self.id = track_id
+        self.evaluator = evaluator
+        self.pose = pose
+        self.roi = roi
+        self.landmarks = None
+        self.result = None
+        self.box: Optional[Box] = None  # tight box around the visible landmarks
+        self.missed = 0
+        self.frames = 0
+        self.fps = 0.0
+        self.latency_s = 0.0
+        self._last_t: Optional[float] = None
+
+    @property
+    def tracking(self) -> bool:
+        return self.roi.roi is not None
+
+    def search_box(self) -> Optional[Box]:
+        """Box used to match detector hits: landmarks if fresh, else the crop"""
+        return self.box if self.landmarks is not None and self.box else self.roi.roi
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'reps': self.result.reps if self.result is not None else 0,
+            'frames': self.frames,
+            'fps': round(self.fps, 2),
+            'latency_ms': round(self.latency_s * 1000.0, 2),
+            'missed': self.missed,
+        }
+
+
+class MultiPersonTracker:
+    """
+    Detect, track and score several people per frame
+
+    Args:
+        evaluator_factory: Zero-arg callable building a fresh evaluator per track
+        pose_factory: Zero-arg callable building a MediaPipe Pose
+        detector: Object with detect(frame) -> [(box, score)] (default PersonDetector)
+        max_people: Concurrent tracks (and Pose graphs) at most
+        detect_every: Run the detector every N frames (also on an empty scene), and
+            right away whenever a track is lost
+        infer_size: Longer side of each person crop sent to MediaPipe
+        match_iou: Minimum overlap for a detector hit to belong to an existing track
+        merge_iou: Two tracks overlapping more than this follow the same person; the younger goes
+        max_missed: Frames a track may go without landmarks before it is retired
+        workers: Threads running per-track inference (default max_people)
+
+    Usage per frame:
+        tracks = tracker.process(frame, t)
+        frame = tracker.draw(frame, tracks)
+    """
+
+    def __init__(self, evaluator_factory: Callable[[], Any], pose_factory: Callable[[], Any],
+                 detector=None, max_people: int = 4, detect_every: int = 15, infer_size: int = 256,
+                 match_iou: float = 0.3, merge_iou: float = 0.6, max_missed: int = 15,
+                 workers: Optional[int] = None):
+        self.evaluator_factory = evaluator_factory
+        self.detector = detector if detector is not None else PersonDetector()
+        self.max_people = max_people
+        self.detect_every = max(1, detect_every)
+        self.infer_size = infer_size
+        self.match_iou = match_iou
+        self.merge_iou = merge_iou
+        self.max_missed = max_missed
+        self.pool = PosePool(pose_factory, max_people)
+        self._executor = ThreadPoolExecutor(workers or max_people, thread_name_prefix='track')
+        self._ids = itertools.count(1)
+        self.tracks: List[Track] = []
+        self.frames = 0
+        self.detections = 0
+        self.detect_s = 0.0
+        self._since_detect = self.detect_every  # detect on the first frame
+        self._t0: Optional[float] = None
+
+    # ---------- per-track inference ----------
+    def _infer_track(self, track: Track, frame: np.ndarray, t: Optional[float]):
+        start = time.perf_counter()
+        landmarks = track.roi.process(track.pose, frame)
+        track.latency_s = time.perf_counter() - start
+        if landmarks is None:
+            track.landmarks = None
+            track.result = track.evaluator.update(None, t)
+            track.missed += 1
+            return
+        h, w = frame.shape[:2]
+        track.landmarks = landmarks
+        track.evaluator.frame_size = (w, h)
+        track.result = track.evaluator.update(landmarks, t)
+        track.box = self._tight_box(track, landmarks, w, h)
+        track.missed = 0
+        track.frames += 1
+        now = start if t is None else t  # frame time when the caller has one
+        if track._last_t is not None:
+            dt = now - track._last_t
+            if dt > 0:
+                track.fps = 1.0 / dt if track.fps == 0.0 else track.fps + 0.2 * (1.0 / dt - track.fps)
+        track._last_t = now
+
+    @staticmethod
+    def _tight_box(track: Track, landmarks, w: int, h: int) -> Optional[Box]:
+        pts = [(lm.x * w, lm.y * h) for lm in landmarks if lm.visibility >= track.roi.min_visibility]
+        if len(pts) < track.roi.min_points:
+            return None
+        xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+        return int(min(xs)), int(min(ys)), int(max(xs)) + 1, int(max(ys)) + 1
+
+    # ---------- detection / association ----------
+    def _new_track(self, box: Box, w: int, h: int) -> Optional[Track]:
+        pose = self.pool.acquire()
+        if pose is None:
+            return None
+        roi = RoiTracker(self.infer_size, min_side=0.1, retry_full=False)
+        roi.seed(box, w, h)
+        return Track(next(self._ids), self.evaluator_factory(), pose, roi)
+
+    def _associate(self, hits: List[Tuple[Box, float]], w: int, h: int):
+        # Greedy one-to-one matching by overlap, best pairs first
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            tbox = track.search_box()
+            if tbox is None:
+                continue
+            for di, (box, _) in enumerate(hits):
+                overlap = iou(tbox, box)
+                if overlap >= self.match_iou:
+                    pairs.append((overlap, ti, di))
+        used_t, used_d = set(), set()
+        for _, ti, di in sorted(pairs, reverse=True):
+            if ti in used_t or di in used_d:
+                continue
+            used_t.add(ti)
+            used_d.add(di)
+            track = self.tracks[ti]
+            if not track.tracking:
+                track.roi.seed(hits[di][0], w, h)
+
+        # Lost tracks nobody matched keep their last crop, so a brief occlusion keeps the ID
+        for ti, track in enumerate(self.tracks):
+            if ti not in used_t and not track.tracking and track.box is not None:
+                track.roi.seed(track.box, w, h, pad=track.roi.pad)
+
+        for di, (box, _) in sorted(enumerate(hits), key=lambda d: -d[1][1]):
+            if di in used_d or len(self.tracks) >= self.max_people:
+                continue
+            track = self._new_track(box, w, h)
+            if track is None:
+                break
+            self.tracks.append(track)
+
+    def _retire(self, track: Track):
+        self.tracks.remove(track)
+        self.pool.release(track.pose)
+        track.pose = None
+
+    def _prune(self):
+        for track in [tr for tr in self.tracks if tr.missed > self.max_missed]:
+            self._retire(track)
+        # Two crops that converged on one person: keep the older track (it holds the reps)
+        live = sorted((tr for tr in self.tracks if tr.box is not None and tr.landmarks is not None),
+                      key=lambda tr: tr.id)
+        for i, a in enumerate(live):
+            for b in live[i + 1:]:
+                if b in self.tracks and a in self.tracks and iou(a.box, b.box) > self.merge_iou:
+                    self._retire(b)
+
+    # ---------- frame loop ----------
+    def process(self, frame: np.ndarray, t: Optional[float] = None, profiler=None) -> List[Track]:
+        """
+        Update every track with one frame
+
+        Args:
+            frame: BGR frame
+            t: Media time in seconds for the evaluators' rep timing (None = wall clock)
+            profiler: Optional StageProfiler; marks 'pose' and 'detect'
+
+        Returns:
+            Active tracks; track.landmarks is None when the person was not found this
+            frame (track.result then holds the evaluator's missing-frame result)
+        """
+        prof = get_profiler(profiler)
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+        self.frames += 1
+        h, w = frame.shape[:2]
+
+        active = [tr for tr in self.tracks if tr.tracking]
+        for tr in self.tracks:
+            if not tr.tracking:
+                tr.landmarks = None
+                tr.result = tr.evaluator.update(None, t)
+                tr.missed += 1
+        for fut in [self._executor.submit(self._infer_track, tr, frame, t) for tr in active]:
+            fut.result()
+        prof.mark('pose')
+
+        self._since_detect += 1
+        lost = any(not tr.tracking for tr in self.tracks)
+        if self._since_detect >= self.detect_every or lost:
+            start = time.perf_counter()
+            self._associate(self.detector.detect(frame), w, h)
+            self.detect_s = time.perf_counter() - start
+            self.detections += 1
+            self._since_detect = 0
+            prof.mark('detect')
+
+        self._prune()
+        return list(self.tracks)
+
+    def draw(self, frame: np.ndarray, tracks: Optional[List[Track]] = None) -> np.ndarray:
+        """Skeleton, ID, reps and feedback per track (the single-person panels don't stack)"""
+        for track in self.tracks if tracks is None else tracks:
+            if track.landmarks is None or track.result is None:
+                continue
+            color = TRACK_COLORS[(track.id - 1) % len(TRACK_COLORS)]
+            track.evaluator.skeleton.draw(frame, track.landmarks, color, color)
+            x0, y0 = track.box[:2] if track.box else (10, 30)
+            y0 = max(20, y0 - 10)
+            cv2.putText(frame, f"#{track.id}  Reps: {track.result.reps}", (x0, y0),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            if track.result.feedback:
+                cv2.putText(frame, track.result.feedback, (x0, y0 + 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        return frame
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._t0 if self._t0 is not None else 0.0
+        return {
+            'frames': self.frames,
+            'fps': round(self.frames / elapsed, 2) if elapsed > 0 else 0.0,
+            'people': len(self.tracks),
+            'detections': self.detections,
+            'detect_ms': round(self.detect_s * 1000.0, 2),
+            'tracks': [tr.stats() for tr in self.tracks],
+        }
+
+    def close(self):
+        for track in list(self.tracks):
+            self._retire(track)
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+def run(src=0, exercise: str = 'squat', max_people: int = 4, profiler=None):
+    """Desktop loop: every detected person gets their own counter"""
+    from exercises.registry import get_exercise
+    from utils.capture import ThreadedCapture
+    from utils.clock import FrameClock
+    from utils.pose_backend import create_pose
+    from utils.preprocess import FramePreprocessor
+
+    cap = ThreadedCapture(src)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video source: {src}")
+    spec = get_exercise(exercise)
+    tracker = MultiPersonTracker(spec.factory, lambda: create_pose(**spec.pose_overrides),
+                                 max_people=max_people)
+    prep = FramePreprocessor()
+    prof = get_profiler(profiler)
+    clock = FrameClock()
+    try:
+        while True:
+            prof.start()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            prof.mark('capture')
+            tracks = tracker.process(frame, clock.stamp(cap.frame_time()), prof)
+            frame = tracker.draw(frame, tracks)
+            prof.mark('render')
+
+            frame = prep.resize_width(frame, 960)
+            prof.draw(frame)
+            cv2.imshow('AI Gym Trainer - group', frame)
+            startup.once('first frame')
+            key = cv2.waitKey(1) & 0xFF
+            prof.mark('display')
+            prof.end()
+            if key == ord('q'):
+                break
+    finally:
+        for track in tracker.stats()['tracks']:
+            print(f"Person #{track['id']}: {track['reps']} reps, {track['fps']:.1f} FPS")
+        cap.release()
+        if profiler is not None:
+            print("Capture:", cap.stats())
+        tracker.close()
+        cv2.destroyAllWindows()
@@ -0,0 +1,149 @@
+"""
+Allocation-free overlay drawing
+SkeletonRenderer draws the pose straight from landmark coordinates (no
+NormalizedLandmarkList / DrawingSpec per frame), and PanelCanvas composes
+"status panel above the frame" into one reused output buffer instead of
+np.zeros + np.vstack every frame.
+"""
+
+from typing import Callable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from utils.landmark_cache import NUM_LANDMARKS, landmarks_to_array
+
+Color = Tuple[int, int, int]
+
+# mp.solutions.pose.POSE_CONNECTIONS, sorted; kept here so drawing does not need mediapipe
+POSE_CONNECTIONS: Tuple[Tuple[int, int], ...] = (
+    (0, 1), (0, 4), (1, 2), (2, 3), (3, 7), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (11, 23), (12, 14), (12, 24), (13, 15), (14, 16),
+    (15, 17), (15, 19), (15, 21), (16, 18), (16, 20), (16, 22), (17, 19), (18, 20),
+    (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29), (27, 31),
+    (28, 30), (28, 32), (29, 31), (30, 32),
+)
+
+WHITE: Color = (255, 255, 255)
+BORDER: Color = (224, 224, 224)  # mp_drawing's landmark border colour
+
+
+class SkeletonRenderer:
+    """
+    Draws landmarks + connections the way mp_drawing.draw_landmarks() does
+    (same visibility threshold, point border, in-frame check), reusing
+    its coordinate buffers between frames.
+
+    Args:
+        point_color: Landmark circle colour (BGR)
+        line_color: Connection colour (BGR)
+        thickness: Line / circle thickness
+        radius: Landmark circle radius
+        min_visibility: Landmarks below this visibility are skipped
+        connections: Landmark index pairs to join
+    """
+
+    __slots__ = ('point_color', 'line_color', 'thickness', 'radius', 'border_radius',
+                 'min_visibility', 'connections', '_arr', '_xy', '_px')
+
+    def __init__(self, point_color: Color = WHITE, line_color: Color = (180, 180, 180),
+                 thickness: int = 2, radius: int = 2, min_visibility: float = 0.5,
+                 connections: Sequence[Tuple[int, int]] = POSE_CONNECTIONS):
+        self.point_color = point_color
+        self.line_color = line_color
+        self.thickness = thickness
+        self.radius = radius
+        self.border_radius = max(radius + 1, int(radius * 1.2))
+        self.min_visibility = min_visibility
+        self.connections = tuple(connections)
+        self._arr = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._xy = np.zeros((NUM_LANDMARKS, 2), dtype=np.float64)
+        self._px = np.zeros((NUM_LANDMARKS, 2), dtype=np.int32)
+
+    def draw(self, image, landmarks, point_color: Optional[Color] = None,
+             line_color: Optional[Color] = None):
+        """
+        Args:
+            image: BGR frame, drawn on in place
+            landmarks: MediaPipe landmark sequence or a (33, 4) x/y/z/visibility array
+            point_color, line_color: Per-call colour overrides (e.g. form good/bad)
+        """
+        h, w = image.shape[:2]
+        arr = landmarks if isinstance(landmarks, np.ndarray) else landmarks_to_array(landmarks, out=self._arr)
+        # floor(x * w) in float64 like mediapipe, clipped to the last pixel
+        xy, px = self._xy, self._px
+        np.multiply(arr[:, 0], w, out=xy[:, 0], dtype=np.float64)
+        np.multiply(arr[:, 1], h, out=xy[:, 1], dtype=np.float64)
+        np.floor(xy, out=xy)
+        np.copyto(px, xy, casting='unsafe')
+        np.minimum(px[:, 0], w - 1, out=px[:, 0])
+        np.minimum(px[:, 1], h - 1, out=px[:, 1])
+
+        x, y, vis = arr[:, 0], arr[:, 1], arr[:, 3]
+        shown = ((vis >= self.min_visibility) & (x >= 0.0) & (x <= 1.0)
+                 & (y >= 0.0) & (y <= 1.0)).tolist()
+        pts = px.tolist()
+
+        line_color = line_color or self.line_color
+        for a, b in self.connections:
+            if shown[a] and shown[b]:
+                cv2.line(image, pts[a], pts[b], line_color, self.thickness)
+
+        point_color = point_color or self.point_color
+        for i, p in enumerate(pts):
+            if shown[i]:
+                cv2.circle(image, p, self.border_radius, BORDER, self.thickness)
+                cv2.circle(image, p, self.radius, point_color, self.thickness)
+        return image
+
+
+class PanelCanvas:
+    """
+    Reused output buffer laid out as [panel; frame]
+
+    The panel's static parts (background, labels) are drawn once per frame
+    width by `static_fn` and blitted each frame; only the dynamic values are
+    drawn on top. The buffer is reallocated only when the frame size changes.
+
+    Args:
+        panel_height: Panel rows above the frame
+        background: Panel fill colour (BGR)
+        static_fn: Optional fn(panel) drawing the labels that never change
+
+    Note:
+        compose() returns the same buffer every frame, so copy it if it must
+        outlive the next compose() (e.g. when queued for another thread).
+    """
+
+    def __init__(self, panel_height: int, background: Color = (25, 25, 25),
+                 static_fn: Optional[Callable[[np.ndarray], None]] = None):
+        self.panel_height = panel_height
+        self.background = background
+        self.static_fn = static_fn
+        self.out: Optional[np.ndarray] = None
+        self._static: Optional[np.ndarray] = None
+
+    def _allocate(self, h: int, w: int):
+        self.out = np.empty((self.panel_height + h, w, 3), dtype=np.uint8)
+        self._static = np.empty((self.panel_height, w, 3), dtype=np.uint8)
+        self._static[:] = self.background
+        if self.static_fn is not None:
+            self.static_fn(self._static)
+
+    def compose(self, frame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copy the static panel and `frame` into the output buffer
+
+        Returns:
+            (out, panel view, frame view); draw on the views, show/encode `out`
+        """
+        h, w = frame.shape[:2]
+        out = self.out
+        if out is None or out.shape[0] != self.panel_height + h or out.shape[1] != w:
+            self._allocate(h, w)
+            out = self.out
+        panel = out[:self.panel_height]
+        body = out[self.panel_height:]
+        np.copyto(panel, self._static)
+        np.copyto(body, frame)
+        return out, panel, body
@@ -0,0 +1,596 @@
+"""
+Headless batch analysis of recorded sessions
+Decode, pose inference and evaluation run as separate pipeline stages
+connected by bounded queues so decoding overlaps MediaPipe inference.
+Many videos can be sharded across a process pool, one Pose per worker,
+and a landmark cache lets evaluators be re-run without inference.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.landmark_cache import (CachedLandmarks, LandmarkCache, array_to_landmarks,
+                                  landmarks_to_array)
+from utils.landmark_store import LandmarkStore
+from exercises.registry import get_exercise
+from utils import pose_backend
+from utils.clock import FrameClock
+from utils.preprocess import FramePreprocessor, fit_width
+from utils.roi import RoiTracker
+
+VIDEO_EXTS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v')
+
+_END = object()  # end-of-stream marker passed between stages
+
+
+# =========================
+# Configuration / results
+# =========================
+@dataclass
+class BatchConfig:
+    width: int = 960                      # frames are resized to this width, like run()
+    queue_size: int = 8                   # bound for every inter-stage queue
+    pose_backend: str = 'mediapipe'       # key of utils.pose_backend.BACKENDS
+    model_complexity: int = 1
+    min_detection_confidence: float = 0.6
+    min_tracking_confidence: float = 0.6
+    out_dir: Optional[str] = None         # write annotated videos here (None = no encoder)
+    report_path: Optional[str] = None     # write the JSON report here
+    cache_dir: Optional[str] = None       # landmark cache; hits skip pose inference entirely
+    dataset_dir: Optional[str] = None     # also pack cached landmarks into this LandmarkStore
+    roi_size: Optional[int] = None        # infer on a tracked person crop of this size (None = full frame)
+
+    def pose_options(self, exercise: Optional[str] = None) -> Dict[str, Any]:
+        """PoseConfig fields for a run: these settings, then the exercise's pose_overrides (as live)"""
+        options = {
+            'backend': self.pose_backend,
+            'model_complexity': self.model_complexity,
+            'min_detection_confidence': self.min_detection_confidence,
+            'min_tracking_confidence': self.min_tracking_confidence,
+        }
+        if exercise is not None:
+            options.update(get_exercise(exercise).pose_overrides)
+        return options
+
+    def pose_settings(self, exercise: Optional[str] = None) -> Dict[str, Any]:
+        """Everything that changes the landmarks MediaPipe returns (part of the cache key)"""
+        options = self.pose_options(exercise)
+        backend = options.pop('backend')
+        settings = {'width': self.width}
+        settings.update(options)
+        if self.roi_size:  # only when set, so full-frame cache keys stay valid
+            settings['roi_size'] = self.roi_size
+        if backend != 'mediapipe':
+            settings['pose_backend'] = backend
+        return settings
+
+
+@dataclass
+class VideoReport:
+    video: str
+    exercise: str
+    frames: int = 0
+    frames_with_pose: int = 0
+    reps: int = 0
+    elapsed_s: float = 0.0
+    fps: float = 0.0
+    output: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False                  # landmarks came from the cache, not inference
+    # (media time in seconds, reps so far, feedback text) whenever either changes
+    timeline: List[Tuple[float, int, str]] = field(default_factory=list)
+
+
+def collect_videos(inputs: Iterable[str]) -> List[str]:
+    """
+    Expand directories into the video files they contain
+
+    Args:
+        inputs: Video file paths and/or directories
+
+    Returns:
+        Sorted list of video file paths
+    """
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTS):
+                    videos.append(os.path.join(path, name))
+        else:
+            videos.append(path)
+    return videos
+
+
+def create_pose(cfg: BatchConfig, exercise: Optional[str] = None,
+                pose_cfg: Optional[pose_backend.PoseConfig] = None):
+    """Build the pose backend from the batch settings (and the exercise's pose_overrides)"""
+    # Backend options (e.g. the synthetic exercise) come from pose_cfg, by default the
+    # process-wide one; spawned workers get the parent's, which they cannot rebuild from the env
+    return pose_backend.create_pose(pose_cfg, **cfg.pose_options(exercise))
+
+
+# =========================
+# Stages
+# =========================
+def _put(q: queue.Queue, item, stop: threading.Event):
+    # Blocking put that gives up once another stage has failed
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+def _stage(fn, errors: List[BaseException], stop: threading.Event):
+    # Thread body wrapper: a failing stage records its error and stops the whole pipeline
+    def body(*args):
+        try:
+            fn(*args)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+    return body
+
+
+def _decode(cap, width: int, out_q: queue.Queue, stop: threading.Event):
+    idx = 0
+    while not stop.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+        frame = cv2.resize(frame, fit_width(frame.shape[1], frame.shape[0], width))  # queued: own array
+        if not _put(out_q, (idx, t_ms, frame), stop):
+            break
+        idx += 1
+    _put(out_q, _END, stop)
+
+
+def _infer(pose, in_q: queue.Queue, out_q: queue.Queue, stop: threading.Event,
+           tracker: Optional[RoiTracker] = None):
+    prep = FramePreprocessor()  # RGB buffer reused: only `frame` travels downstream
+    while True:
+        item = _get(in_q, stop)
+        if item is _END:
+            break
+        idx, t_ms, frame = item
+        if tracker is not None:
+            landmarks = tracker.process(pose, frame)
+        else:
+            res = pose.process(prep.rgb(frame))
+            landmarks = res.pose_landmarks.landmark if res.pose_landmarks else None
+        if not _put(out_q, (idx, t_ms, frame, landmarks), stop):
+            break
+    _put(out_q, _END, stop)
+
+
+def _lookup(cached: CachedLandmarks, in_q: queue.Queue, out_q: queue.Queue, stop: threading.Event):
+    # Inference stage replacement when the landmarks are already cached
+    while True:
+        item = _get(in_q, stop)
+        if item is _END:
+            break
+        idx, t_ms, frame = item
+        landmarks = None
+        if idx < len(cached) and cached.has_pose(idx):
+            landmarks = array_to_landmarks(cached.landmarks[idx])
+        if not _put(out_q, (idx, t_ms, frame, landmarks), stop):
+            break
+    _put(out_q, _END, stop)
+
+
+def _encode(path: str, fps: float, in_q: queue.Queue, stop: threading.Event):
+    # Every frame arrives rendered (render() or render_missing()), so the first one sizes the writer
+    writer = None
+    size = None
+    try:
+        while True:
+            frame = _get(in_q, stop)
+            if frame is _END:
+                break
+            if writer is None:
+                size = (frame.shape[1], frame.shape[0])
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size)  # VideoWriter silently drops frames of another size
+            writer.write(frame)
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+# =========================
+# Drivers
+# =========================
+def _track(report: VideoReport, evaluator, t_ms: float):
+    # Append to the timeline whenever the rep count or the feedback text changes
+    state = evaluator.state()
+    reps, feedback = state['reps'], state['feedback']
+    if not report.timeline or report.timeline[-1][1:] != (reps, feedback):
+        report.timeline.append((round(t_ms / 1000.0, 3), reps, feedback))
+
+
+def replay_video(path: str, exercise: str, cached: CachedLandmarks) -> VideoReport:
+    """
+    Re-run an evaluator over cached landmarks: no decoding, no inference
+
+    Args:
+        path: Video the landmarks belong to (for the report only)
+        exercise: Key of exercises.registry.EXERCISES
+        cached: Landmarks loaded from a LandmarkCache
+
+    Returns:
+        VideoReport built exactly like process_video() would
+    """
+    report = VideoReport(video=path, exercise=exercise, cached=True)
+    evaluator = get_exercise(exercise).factory()
+    evaluator.frame_size = (cached.width, cached.height)
+    clock = FrameClock(origin=0.0, fps=cached.fps or 30.0)
+
+    start = time.perf_counter()
+    for idx in range(len(cached)):
+        report.frames += 1
+        t = clock.stamp(float(cached.timestamps_ms[idx]) / 1000.0)
+        if cached.has_pose(idx):
+            report.frames_with_pose += 1
+            # Headless: evaluate only, nothing is drawn
+            evaluator.update(array_to_landmarks(cached.landmarks[idx]), t)
+        else:
+            evaluator.update(None, t)
+        _track(report, evaluator, t * 1000.0)
+
+    report.elapsed_s = time.perf_counter() - start
+    report.fps = report.frames / report.elapsed_s if report.elapsed_s > 0 else 0.0
+    report.reps = evaluator.state()['reps']
+    return report
+
+
+def process_video(path: str, exercise: str, cfg: BatchConfig, pose=None) -> VideoReport:
+    """
+    Run one recorded session through decode -> inference -> evaluation (-> encode)
+
+    With cfg.cache_dir set, landmarks are written to the cache after inference,
+    and a cache hit replaces the inference stage (or, without cfg.out_dir,
+    skips decoding too via replay_video()).
+
+    Args:
+        path: Video file path
+        exercise: Key of exercises.registry.EXERCISES
+        cfg: Batch settings
+        pose: Optional MediaPipe Pose to reuse, built with create_pose(cfg, exercise);
+            a fresh graph is built otherwise
+
+    Returns:
+        VideoReport with rep count, feedback timeline and throughput
+    """
+    spec = get_exercise(exercise)
+    report = VideoReport(video=path, exercise=exercise)
+
+    cache = cached = None
+    if cfg.cache_dir and os.path.isfile(path):
+        cache = LandmarkCache(cfg.cache_dir)
+        cached = cache.load(path, cfg.pose_settings(exercise))
+        if cached is not None and not cfg.out_dir:
+            return replay_video(path, exercise, cached)
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        report.error = f"Cannot open video source: {path}"
+        return report
+
+    own_pose = False
+    if cached is None:
+        own_pose = pose is None
+        if own_pose:
+            pose = create_pose(cfg, exercise)
+        else:
+            pose.reset()  # drop tracking state left over from the previous video
+    report.cached = cached is not None
+    evaluator = spec.factory()
+
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    decoded = queue.Queue(maxsize=cfg.queue_size)
+    inferred = queue.Queue(maxsize=cfg.queue_size)
+    encoded = None
+    if cached is None:
+        tracker = RoiTracker(cfg.roi_size) if cfg.roi_size else None
+        landmark_stage = threading.Thread(target=_stage(_infer, errors, stop),
+                                          args=(pose, decoded, inferred, stop, tracker), daemon=True)
+    else:
+        landmark_stage = threading.Thread(target=_stage(_lookup, errors, stop),
+                                          args=(cached, decoded, inferred, stop), daemon=True)
+    threads = [
+        threading.Thread(target=_stage(_decode, errors, stop),
+                         args=(cap, cfg.width, decoded, stop), daemon=True),
+        landmark_stage,
+    ]
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    # File times, re-anchored where the container's timestamps are missing or jump back,
+    # so holds are timed as in real time however fast the video is processed
+    clock = FrameClock(origin=0.0, fps=src_fps)
+    if cfg.out_dir:
+        os.makedirs(cfg.out_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        report.output = os.path.join(cfg.out_dir, f"{stem}_{exercise}.mp4")
+        encoded = queue.Queue(maxsize=cfg.queue_size)
+        threads.append(threading.Thread(target=_stage(_encode, errors, stop),
+                                        args=(report.output, src_fps, encoded, stop), daemon=True))
+
+    # Landmark recording for the cache (NaN rows mark frames without a pose)
+    record = cache is not None and cached is None
+    rec_landmarks: List[np.ndarray] = []
+    rec_times: List[float] = []
+    frame_size = (cfg.width, 0)
+
+    start = time.perf_counter()
+    for th in threads:
+        th.start()
+
+    # Evaluation stage runs on the calling thread (evaluators are not thread-safe)
+    try:
+        while True:
+            item = _get(inferred, stop)
+            if item is _END:
+                break
+            idx, t_ms, frame, landmarks = item
+            report.frames += 1
+            t = clock.stamp(t_ms / 1000.0)
+            if record:
+                frame_size = (frame.shape[1], frame.shape[0])
+                rec_times.append(t_ms)
+                if landmarks is not None:
+                    rec_landmarks.append(landmarks_to_array(landmarks))
+                else:
+                    rec_landmarks.append(np.full((33, 4), np.nan, dtype=np.float32))
+
+            if landmarks is not None:
+                report.frames_with_pose += 1
+                evaluator.frame_size = (frame.shape[1], frame.shape[0])
+                result = evaluator.update(landmarks, t)
+                if encoded is not None:  # render only when someone will see the frame
+                    rendered = evaluator.render(frame, landmarks, result)
+                    # Renderers may return a reused buffer; the encoder thread needs its own copy
+                    frame = rendered if rendered is frame else rendered.copy()
+            else:
+                result = evaluator.update(None, t)
+                if encoded is not None:
+                    rendered = evaluator.render_missing(frame, result)
+                    frame = rendered if rendered is frame else rendered.copy()
+            _track(report, evaluator, t * 1000.0)
+
+            if encoded is not None and not _put(encoded, frame, stop):
+                break
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        if encoded is not None:
+            _put(encoded, _END, stop)
+        if errors:
+            stop.set()
+        for th in threads:
+            th.join()
+        cap.release()
+        if own_pose:
+            pose.close()
+
+    if record and not errors and rec_landmarks:
+        cache.save(path, cfg.pose_settings(exercise), np.stack(rec_landmarks),
+                   np.asarray(rec_times), frame_size[0], frame_size[1], src_fps)
+
+    report.elapsed_s = time.perf_counter() - start
+    report.fps = report.frames / report.elapsed_s if report.elapsed_s > 0 else 0.0
+    report.reps = evaluator.state()['reps']
+    if errors:
+        report.error = f"{type(errors[0]).__name__}: {errors[0]}"
+    return report
+
+
+def summarize(reports: List[VideoReport], elapsed_s: float) -> Dict[str, Any]:
+    frames = sum(r.frames for r in reports)
+    return {
+        'videos': len(reports),
+        'failed': sum(1 for r in reports if r.error),
+        'frames': frames,
+        'reps': sum(r.reps for r in reports),
+        'elapsed_s': round(elapsed_s, 3),
+        'fps': round(frames / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+    }
+
+
+def write_report(reports: List[VideoReport], summary: Dict[str, Any], path: str):
+    with open(path, 'w') as f:
+        json.dump({'summary': summary, 'videos': [asdict(r) for r in reports]}, f, indent=2)
+
+
+class Progress:
+    """Prints one line per finished video with an ETA based on frame counts"""
+
+    def __init__(self, videos: List[str]):
+        self.total_videos = len(videos)
+        self.total_frames = sum(_frame_count(v) for v in videos)
+        self.done_videos = 0
+        self.done_frames = 0
+        self.start = time.perf_counter()
+
+    def update(self, report: VideoReport):
+        self.done_videos += 1
+        self.done_frames += report.frames
+        elapsed = time.perf_counter() - self.start
+        eta = ""
+        if self.done_frames and self.total_frames > self.done_frames:
+            remaining = (self.total_frames - self.done_frames) * elapsed / self.done_frames
+            eta = f", ETA {remaining:.0f}s"
+        prefix = f"[{self.done_videos}/{self.total_videos}{eta}]"
+        if report.error:
+            print(f"{prefix} FAIL {report.video}: {report.error}")
+        else:
+            print(f"{prefix} {report.video}: {report.reps} reps, {report.frames} frames "
+                  f"({report.frames_with_pose} with pose), {report.fps:.1f} FPS"
+                  f"{' [cached]' if report.cached else ''}")
+
+
+def _frame_count(path: str) -> int:
+    cap = cv2.VideoCapture(path)
+    n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    cap.release()
+    return max(n, 0)
+
+
+def load_labels(directory: str) -> Dict[str, Dict[str, Any]]:
+    """labels.json of a clip directory: {"squat_01.mp4": {"exercise": "squat", "reps": 12}, ...}"""
+    path = os.path.join(directory, 'labels.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def pack_dataset(reports: List[VideoReport], cfg: BatchConfig) -> int:
+    """
+    Append the cached landmarks of every successfully analysed video to cfg.dataset_dir
+
+    Runs in the parent process after the batch, so the store has a single writer.
+    Sessions are keyed by their cache key and added once; a labels.json next to a
+    video (same format as benchmarks.bench_evaluators --clips) supplies its rep label.
+
+    Returns:
+        Number of sessions added
+    """
+    cache = LandmarkCache(cfg.cache_dir)
+    store = LandmarkStore(cfg.dataset_dir)
+    labels: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    added = 0
+    for report in reports:
+        if report.error:
+            continue
+        settings = cfg.pose_settings(report.exercise)
+        session_id = os.path.basename(cache.path_for(report.video, settings))
+        if session_id in store:
+            continue
+        cached = cache.load(report.video, settings)
+        if cached is None:
+            continue
+        directory, name = os.path.split(os.path.abspath(report.video))
+        if directory not in labels:
+            labels[directory] = load_labels(directory)
+        label = labels[directory].get(name, {})
+        reps = int(label['reps']) if label.get('exercise', report.exercise) == report.exercise \
+            and 'reps' in label else -1
+        store.add_cached(session_id, report.exercise, cached, reps)
+        added += 1
+    return added
+
+
+# =========================
+# Process-pool fan-out
+# =========================
+_worker_pose = None  # one Pose graph per worker process, reused across its videos
+
+def _init_worker(cfg: BatchConfig, exercise: str, pose_cfg: pose_backend.PoseConfig):
+    global _worker_pose
+    cv2.setNumThreads(1)  # parallelism comes from the pool; avoid oversubscribing cores
+    _worker_pose = create_pose(cfg, exercise, pose_cfg)
+
+def _worker_process_video(path: str, exercise: str, cfg: BatchConfig) -> VideoReport:
+    return process_video(path, exercise, cfg, pose=_worker_pose)
+
+
+def _run_serial(videos: List[str], exercise: str, cfg: BatchConfig, progress: Progress) -> List[VideoReport]:
+    reports = []
+    pose = create_pose(cfg, exercise)
+    try:
+        for path in videos:
+            report = process_video(path, exercise, cfg, pose=pose)
+            progress.update(report)
+            reports.append(report)
+    finally:
+        pose.close()
+    return reports
+
+
+def _run_pool(videos: List[str], exercise: str, cfg: BatchConfig, progress: Progress,
+              workers: int) -> List[VideoReport]:
+    # spawn: MediaPipe graphs and decoder threads do not survive fork()
+    ctx = multiprocessing.get_context('spawn')
+    by_path = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(cfg, exercise, pose_backend.DEFAULT)) as pool:
+        futures = {pool.submit(_worker_process_video, path, exercise, cfg): path for path in videos}
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                report = fut.result()
+            except Exception as e:
+                report = VideoReport(video=path, exercise=exercise,
+                                     error=f"{type(e).__name__}: {e}")
+            progress.update(report)
+            by_path[path] = report
+    return [by_path[path] for path in videos]
+
+
+def run_batch(inputs: Iterable[str], exercise: str, cfg: BatchConfig,
+              workers: int = 1) -> List[VideoReport]:
+    """
+    Analyse every recorded session in inputs
+
+    Args:
+        inputs: Video files and/or directories of videos
+        exercise: Key of exercises.registry.EXERCISES
+        cfg: Batch settings
+        workers: Worker processes; 1 runs in-process, 0 uses every CPU core
+
+    Returns:
+        One VideoReport per video, in input order
+    """
+    if cfg.pose_backend == 'replay':
+        # A replay backend plays one video's cached landmarks; per-video replay is the cache itself
+        raise SystemExit("Batch mode replays cached landmarks through cache_dir, not the replay backend")
+    videos = collect_videos(inputs)
+    if not videos:
+        raise SystemExit("No videos found for batch mode")
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(videos))
+
+    start = time.perf_counter()
+    progress = Progress(videos)
+    if workers == 1:
+        reports = _run_serial(videos, exercise, cfg, progress)
+    else:
+        print(f"Analysing {len(videos)} videos with {workers} worker processes")
+        reports = _run_pool(videos, exercise, cfg, progress, workers)
+
+    summary = summarize(reports, time.perf_counter() - start)
+    summary['workers'] = workers
+    print(f"Processed {summary['videos']} videos, {summary['frames']} frames "
+          f"in {summary['elapsed_s']:.1f}s ({summary['fps']:.1f} FPS)")
+    if cfg.report_path:
+        write_report(reports, summary, cfg.report_path)
+    if cfg.dataset_dir and cfg.cache_dir:
+        added = pack_dataset(reports, cfg)
+        print(f"Landmark store {cfg.dataset_dir}: {added} sessions added")
+    return reports
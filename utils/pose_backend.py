@@ -0,0 +1,217 @@
+"""
+Pluggable pose estimators behind one factory
+Every backend exposes the MediaPipe Pose surface the rest of the code
+already uses - process(rgb).pose_landmarks.landmark, reset(), close() - so
+runners, sessions and the batch pipeline can swap the model tier (lite /
+full / heavy), replay cached landmarks or feed synthetic ones without
+changes. Pick one with create_pose(PoseConfig(...)), --pose-backend and
+--model-complexity on the CLI, or POSE_BACKEND / POSE_MODEL_COMPLEXITY.
+"""
+
+import os
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from utils import startup
+from utils.landmark_cache import CachedLandmarks, Landmark
+
+
+class LandmarkList(NamedTuple):
+    """Stand-in for MediaPipe's NormalizedLandmarkList"""
+    landmark: List[Landmark]
+
+
+class PoseResult(NamedTuple):
+    """Stand-in for the object Pose.process() returns"""
+    pose_landmarks: Optional[LandmarkList]
+
+
+NO_POSE = PoseResult(None)
+
+
+# =========================
+# Configuration
+# =========================
+@dataclass
+class PoseConfig:
+    backend: str = 'mediapipe'            # key of BACKENDS
+    model_complexity: int = 1             # MediaPipe tier: 0 lite, 1 full, 2 heavy
+    min_detection_confidence: float = 0.6
+    min_tracking_confidence: float = 0.6
+    smooth_landmarks: bool = True
+    options: Dict[str, Any] = field(default_factory=dict)  # backend-specific extras
+
+    @classmethod
+    def from_env(cls) -> 'PoseConfig':
+        cfg = cls()
+        cfg.backend = os.environ.get('POSE_BACKEND', cfg.backend)
+        cfg.model_complexity = int(os.environ.get('POSE_MODEL_COMPLEXITY', cfg.model_complexity))
+        return cfg
+
+
+# Process-wide default used when a caller does not pass a PoseConfig
+DEFAULT = PoseConfig.from_env()
+
+
+def configure(**overrides) -> PoseConfig:
+    """Update the process-wide default (e.g. from CLI flags) and return it"""
+    global DEFAULT
+    DEFAULT = replace(DEFAULT, **overrides)
+    return DEFAULT
+
+
+# =========================
+# Registry
+# =========================
+BACKENDS: Dict[str, Callable[[PoseConfig], Any]] = {}
+
+
+def register_backend(name: str):
+    """Decorator: make `fn(cfg) -> backend` available as create_pose(PoseConfig(backend=name))"""
+    def wrap(fn):
+        BACKENDS[name] = fn
+        return fn
+    return wrap
+
+
+def create_pose(cfg: Optional[PoseConfig] = None, **overrides):
+    """
+    Build a pose estimator
+
+    Args:
+        cfg: Settings (default: the process-wide DEFAULT)
+        **overrides: PoseConfig fields replaced for this call only, e.g. a
+            runner's own confidence thresholds
+
+    Returns:
+        Object with process(rgb), reset() and close()
+    """
+    cfg = cfg or DEFAULT
+    if overrides:
+        cfg = replace(cfg, **overrides)
+    try:
+        factory = BACKENDS[cfg.backend]
+    except KeyError:
+        raise ValueError(f"Unknown pose backend {cfg.backend!r} "
+                         f"(available: {', '.join(sorted(BACKENDS))})") from None
+    with startup.timed('pose model'):
+        return factory(cfg)
+
+
+# =========================
+# Backends
+# =========================
+class PoseBackend:
+    """Base class: process() one RGB frame, reset() between users/videos, close() when done"""
+
+    def process(self, rgb: np.ndarray):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@register_backend('mediapipe')
+def _mediapipe(cfg: PoseConfig):
+    # The MediaPipe graph already has the backend surface; returned as-is so the
+    # hot path pays no wrapper call. Complexity 0 and 2 download their model on first use.
+    import mediapipe as mp
+    return mp.solutions.pose.Pose(min_detection_confidence=cfg.min_detection_confidence,
+                                  min_tracking_confidence=cfg.min_tracking_confidence,
+                                  model_complexity=cfg.model_complexity,
+                                  smooth_landmarks=cfg.smooth_landmarks)
+
+
+class ReplayBackend(PoseBackend):
+    """
+    Plays back cached landmarks frame by frame, ignoring the image
+
+    Args:
+        cached: Landmarks from a LandmarkCache (NaN rows = no pose that frame)
+        loop: Start over after the last frame instead of reporting no pose
+    """
+
+    def __init__(self, cached: CachedLandmarks, loop: bool = False):
+        self.cached = cached
+        self.loop = loop
+        self.idx = 0
+
+    def process(self, rgb):
+        if self.idx >= len(self.cached):
+            if not self.loop or not len(self.cached):
+                return NO_POSE
+            self.idx = 0
+        idx = self.idx
+        self.idx += 1
+        if not self.cached.has_pose(idx):
+            return NO_POSE
+        return PoseResult(LandmarkList([Landmark(*row) for row in self.cached.landmarks[idx].tolist()]))
+
+    def reset(self):
+        self.idx = 0
+
+
+@register_backend('replay')
+def _replay(cfg: PoseConfig):
+    # options: cache_dir + video written by a batch run (+ its settings, default BatchConfig's), loop
+    from utils.landmark_cache import LandmarkCache
+    from utils.pipeline import BatchConfig
+    opts = cfg.options
+    if 'cache_dir' not in opts or 'video' not in opts:
+        raise ValueError("replay backend needs options cache_dir and video")
+    settings = opts.get('settings') or BatchConfig(
+        model_complexity=cfg.model_complexity,
+        min_detection_confidence=cfg.min_detection_confidence,
+        min_tracking_confidence=cfg.min_tracking_confidence).pose_settings()
+    cached = LandmarkCache(opts['cache_dir']).load(opts['video'], settings)
+    if cached is None:
+        raise ValueError(f"No cached landmarks for {opts['video']} in {opts['cache_dir']}")
+    return ReplayBackend(cached, loop=opts.get('loop', False))
+
+
+class SyntheticBackend(PoseBackend):
+    """
+    Deterministic stick-figure landmarks from utils.synthetic, ignoring the image
+
+    The landmarks are normalised to synthetic.FRAME_SIZE; evaluators see the
+    intended joint angles only on frames of that aspect ratio.
+
+    Args:
+        exercise: Key of synthetic.POSES
+        reps: Repetitions per loop of the session
+        noise_px: Landmark jitter in pixels
+    """
+
+    def __init__(self, exercise: str = 'squat', reps: int = 10, noise_px: float = 1.0, seed: int = 0):
+        from utils.synthetic import synthetic_session
+        self.landmarks, self.timestamps_ms = synthetic_session(exercise, reps=reps, noise_px=noise_px,
+                                                               seed=seed)
+        self._frames = [PoseResult(LandmarkList([Landmark(*row) for row in frame.tolist()]))
+                        for frame in self.landmarks]
+        self.idx = 0
+
+    def process(self, rgb):
+        result = self._frames[self.idx % len(self._frames)]
+        self.idx += 1
+        return result
+
+    def reset(self):
+        self.idx = 0
+
+
+@register_backend('synthetic')
+def _synthetic(cfg: PoseConfig):
+    opts = cfg.options
+    return SyntheticBackend(opts.get('exercise', 'squat'), reps=opts.get('reps', 10),
+                            noise_px=opts.get('noise_px', 1.0), seed=opts.get('seed', 0))
@@ -0,0 +1,81 @@
+"""
+Frame preprocessing into reused buffers
+Every loop used to resize the frame and convert it to RGB for MediaPipe into
+two freshly allocated arrays. FramePreprocessor writes both into buffers it
+keeps between frames (cv2 `dst=`), reallocating only when the frame size
+changes, and hands MediaPipe a read-only RGB view so it can take the pixels
+by reference. PyAV (WebRTC) frames are scaled and converted by libswscale in
+the same pass that unpacks them from YUV.
+"""
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def fit_width(w: int, h: int, width: Optional[int]) -> Tuple[int, int]:
+    """(width, height) keeping the aspect ratio; the input size if width is None"""
+    if not width or width == w:
+        return w, h
+    return width, int(width * h / w)
+
+
+def av_to_ndarray(frame, width: Optional[int] = None, format: str = 'bgr24',
+                  interpolation: str = 'FAST_BILINEAR') -> np.ndarray:
+    """
+    Unpack an av.VideoFrame straight at processing size
+
+    Colour conversion and scaling happen in one libswscale pass instead of
+    a full-resolution unpack followed by cv2.resize.
+    """
+    w, h = fit_width(frame.width, frame.height, width)
+    if (w, h) == (frame.width, frame.height):
+        return frame.to_ndarray(format=format)
+    return frame.to_ndarray(width=w, height=h, format=format, interpolation=interpolation)
+
+
+class FramePreprocessor:
+    """
+    Resize + BGR->RGB for one loop (or one thread) into persistent buffers
+
+    Arrays returned by resize() and rgb() belong to the preprocessor and are
+    overwritten by the next call: copy them if they have to outlive the frame,
+    and give each thread its own preprocessor.
+    """
+
+    def __init__(self, interpolation: int = cv2.INTER_LINEAR):
+        self.interpolation = interpolation
+        self._bgr: Optional[np.ndarray] = None
+        self._rgb: Optional[np.ndarray] = None
+        self.allocations = 0
+
+    def _buffer(self, buf: Optional[np.ndarray], shape) -> np.ndarray:
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self.allocations += 1
+        else:
+            buf.flags.writeable = True
+        return buf
+
+    def resize(self, frame: np.ndarray, size: Tuple[int, int],
+               interpolation: Optional[int] = None) -> np.ndarray:
+        """Frame scaled to size=(w, h); the frame itself when it already has that size"""
+        h, w = frame.shape[:2]
+        if (w, h) == tuple(size):
+            return frame
+        self._bgr = self._buffer(self._bgr, (size[1], size[0]) + frame.shape[2:])
+        cv2.resize(frame, tuple(size), dst=self._bgr,
+                   interpolation=self.interpolation if interpolation is None else interpolation)
+        return self._bgr
+
+    def resize_width(self, frame: np.ndarray, width: Optional[int]) -> np.ndarray:
+        h, w = frame.shape[:2]
+        return self.resize(frame, fit_width(w, h, width))
+
+    def rgb(self, bgr: np.ndarray) -> np.ndarray:
+        """Read-only RGB copy of a BGR frame (MediaPipe passes non-writeable images by reference)"""
+        self._rgb = self._buffer(self._rgb, bgr.shape)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        self._rgb.flags.writeable = False
+        return self._rgb
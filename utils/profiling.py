@@ -0,0 +1,171 @@
+"""
+Per-stage latency instrumentation for frame loops
+Cheap enough to leave on in production: one perf_counter_ns() call and one
+array store per stage per frame. Percentiles are only computed on demand.
+"""
+
+import csv
+import json
+import math
+import time
+from array import array
+from typing import Dict, Optional
+
+import cv2
+
+_now = time.perf_counter_ns
+
+
+class _Ring:
+    """Fixed-size ring of int64 nanosecond samples"""
+
+    __slots__ = ('buf', 'idx', 'count')
+
+    def __init__(self, size: int):
+        self.buf = array('q', bytes(8 * size))
+        self.idx = 0
+        self.count = 0
+
+    def add(self, ns: int):
+        buf = self.buf
+        buf[self.idx] = ns
+        self.idx += 1
+        if self.idx == len(buf):
+            self.idx = 0
+        if self.count < len(buf):
+            self.count += 1
+
+    def samples(self):
+        return self.buf[:self.count] if self.count < len(self.buf) else self.buf
+
+
+def _percentile(sorted_vals, q: float) -> float:
+    # Nearest-rank percentile of an already sorted sequence
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+class StageProfiler:
+    """
+    Rolling latency histograms for the stages of a frame loop
+
+    Usage per frame:
+        prof.start()
+        frame = capture();  prof.mark('capture')
+        res = infer(frame); prof.mark('pose')
+        prof.end()          # also records 'total' since start()
+
+    One thread records (start/mark/end); summary() and draw() may be called
+    from others while it does.
+
+    Args:
+        window: Samples kept per stage (rolling)
+        overlay: Draw the p50/p95 table on frames passed to draw()
+    """
+
+    def __init__(self, window: int = 1000, overlay: bool = False):
+        self.window = window
+        self.overlay = overlay
+        self.frames = 0
+        self._stages: Dict[str, _Ring] = {}
+        self._t0 = 0
+        self._last = 0
+        self._overlay_lines = []
+
+    def start(self):
+        self._t0 = self._last = _now()
+
+    def mark(self, stage: str):
+        """Record the time since the previous mark (or start) under `stage`"""
+        now = _now()
+        ring = self._stages.get(stage)
+        if ring is None:
+            ring = self._stages[stage] = _Ring(self.window)
+        ring.add(now - self._last)
+        self._last = now
+
+    def end(self):
+        now = _now()
+        ring = self._stages.get('total')
+        if ring is None:
+            ring = self._stages['total'] = _Ring(self.window)
+        ring.add(now - self._t0)
+        self.frames += 1
+
+    def reset(self):
+        self._stages.clear()
+        self.frames = 0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per stage: count, mean/p50/p95/p99/max in milliseconds over the rolling window"""
+        out = {}
+        # Snapshot the table: the recording thread may add a stage meanwhile
+        for stage, ring in list(self._stages.items()):
+            vals = sorted(ring.samples())
+            n = len(vals)
+            out[stage] = {
+                'count': n,
+                'mean_ms': round(sum(vals) / n / 1e6, 3) if n else 0.0,
+                'p50_ms': round(_percentile(vals, 50) / 1e6, 3),
+                'p95_ms': round(_percentile(vals, 95) / 1e6, 3),
+                'p99_ms': round(_percentile(vals, 99) / 1e6, 3),
+                'max_ms': round(vals[-1] / 1e6, 3) if n else 0.0,
+            }
+        return out
+
+    def dump(self, path: str):
+        """Write summary() to .json, or to .csv (one row per stage) by file extension"""
+        summary = self.summary()
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+                for stage, s in summary.items():
+                    writer.writerow([stage, s['count'], s['mean_ms'], s['p50_ms'],
+                                     s['p95_ms'], s['p99_ms'], s['max_ms']])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'frames': self.frames, 'stages': summary}, f, indent=2)
+
+    def draw(self, frame, origin=(10, 140), refresh_every: int = 30):
+        """Debug overlay: p50/p95 per stage (the table is rebuilt every `refresh_every` frames)"""
+        if not self.overlay:
+            return frame
+        if not self._overlay_lines or self.frames % refresh_every == 0:
+            self._overlay_lines = [f"{stage:<10} p50 {s['p50_ms']:6.1f}  p95 {s['p95_ms']:6.1f} ms"
+                                   for stage, s in self.summary().items()]
+        x, y = origin
+        for line in self._overlay_lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 255, 255), 1)
+            y += 16
+        return frame
+
+
+class NullProfiler:
+    """Drop-in no-op used when profiling is off"""
+
+    overlay = False
+    frames = 0
+
+    def start(self):
+        pass
+
+    def mark(self, stage: str):
+        pass
+
+    def end(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def draw(self, frame, origin=(10, 140), refresh_every: int = 30):
+        return frame
+
+
+NULL_PROFILER = NullProfiler()
+
+def get_profiler(profiler: Optional[StageProfiler]):
+    return profiler if profiler is not None else NULL_PROFILER
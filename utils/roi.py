@@ -0,0 +1,144 @@
+"""
+Region-of-interest tracking for pose inference
+Runs MediaPipe on a padded box around the person found in the previous
+frame instead of the whole (often wide-angle) frame, and maps the landmarks
+back to full-frame normalised coordinates, so evaluators never see the crop.
+Falls back to a full-frame search whenever the person is lost.
+"""
+
+from typing import List, Optional, Tuple
+
+import cv2
+
+from utils.landmark_cache import Landmark
+from utils.preprocess import FramePreprocessor
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1 in pixels (x1/y1 exclusive)
+
+
+class RoiTracker:
+    """
+    Args:
+        infer_size: Longer side of the image sent to MediaPipe (crops and full
+            frames are downscaled to it; None = no resize)
+        pad: Margin added around the landmark box, as a fraction of its size
+        min_visibility: Landmarks at or above this visibility define the box
+        min_points: Fewer visible landmarks than this counts as lost
+        min_side: Smallest crop side as a fraction of the frame's shorter side
+        retry_full: Re-run on the full frame in the same call when the crop finds nobody
+
+    The crop only moves when the person nears its edge or changes size
+    noticeably, so MediaPipe's own frame-to-frame tracking and landmark
+    smoothing see a stable input most of the time.
+    """
+
+    def __init__(self, infer_size: Optional[int] = 384, pad: float = 0.25,
+                 min_visibility: float = 0.5, min_points: int = 8, min_side: float = 0.3,
+                 retry_full: bool = True):
+        self.infer_size = infer_size
+        self.pad = pad
+        self.min_visibility = min_visibility
+        self.min_points = min_points
+        self.min_side = min_side
+        self.retry_full = retry_full
+        self.roi: Optional[Box] = None
+        self.frames = 0
+        self.full_searches = 0
+        self.losses = 0
+        self._prep = FramePreprocessor(cv2.INTER_AREA)
+
+    def reset(self):
+        self.roi = None
+
+    # ---------- geometry ----------
+    def _box_from(self, landmarks: List[Landmark], w: int, h: int) -> Optional[Box]:
+        xs = [lm.x for lm in landmarks if lm.visibility >= self.min_visibility]
+        ys = [lm.y for lm in landmarks if lm.visibility >= self.min_visibility]
+        if len(xs) < self.min_points:
+            return None
+        return self._square(min(xs) * w, min(ys) * h, max(xs) * w, max(ys) * h, w, h, self.pad)
+
+    def _square(self, x0: float, y0: float, x1: float, y1: float, w: int, h: int,
+                pad: float) -> Optional[Box]:
+        # Square, padded box: MediaPipe's pose input is square, so this wastes no resolution
+        side = max(x1 - x0, y1 - y0) * (1.0 + 2.0 * pad)
+        side = max(side, self.min_side * min(w, h))
+        cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+        half = side / 2.0
+        bx0, by0 = max(0, int(cx - half)), max(0, int(cy - half))
+        bx1, by1 = min(w, int(cx + half)), min(h, int(cy + half))
+        if bx1 - bx0 < 2 or by1 - by0 < 2:
+            return None
+        return bx0, by0, bx1, by1
+
+    def _keep(self, new: Box) -> bool:
+        # Keep the current crop while the new box sits inside it and is not much smaller
+        if self.roi is None:
+            return False
+        x0, y0, x1, y1 = self.roi
+        n0, m0, n1, m1 = new
+        inside = n0 >= x0 and m0 >= y0 and n1 <= x1 and m1 <= y1
+        area, new_area = (x1 - x0) * (y1 - y0), (n1 - n0) * (m1 - m0)
+        return inside and new_area >= 0.6 * area
+
+    def seed(self, box: Box, w: int, h: int, pad: float = 0.05):
+        """Start tracking from an external person box (e.g. a detector hit in a w x h frame)"""
+        self.roi = self._square(*box, w, h, pad)
+
+    # ---------- inference ----------
+    def _run(self, pose, frame, box: Optional[Box]):
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = box if box is not None else (0, 0, w, h)
+        crop = frame[y0:y1, x0:x1]
+        cw, ch = x1 - x0, y1 - y0
+        if self.infer_size and max(cw, ch) > self.infer_size:
+            scale = self.infer_size / float(max(cw, ch))
+            crop = self._prep.resize(crop, (max(1, int(cw * scale)), max(1, int(ch * scale))))
+        res = pose.process(self._prep.rgb(crop))
+        if not res.pose_landmarks:
+            return None
+        # Crop-normalised -> full-frame-normalised (z shares x's scale in MediaPipe)
+        sx, sy = cw / float(w), ch / float(h)
+        ox, oy = x0 / float(w), y0 / float(h)
+        return [Landmark(ox + lm.x * sx, oy + lm.y * sy, lm.z * sx, lm.visibility)
+                for lm in res.pose_landmarks.landmark]
+
+    def process(self, pose, frame) -> Optional[List[Landmark]]:
+        """
+        Pose inference on the tracked crop (or the full frame when not tracking)
+
+        Args:
+            pose: MediaPipe Pose
+            frame: BGR frame
+
+        Returns:
+            33 landmarks normalised to the full frame, or None if nobody was found
+        """
+        self.frames += 1
+        h, w = frame.shape[:2]
+        tracking = self.roi is not None
+        if not tracking:
+            self.full_searches += 1
+        landmarks = self._run(pose, frame, self.roi)
+        if landmarks is None and tracking:
+            self.losses += 1
+            self.roi = None
+            if self.retry_full:
+                self.full_searches += 1
+                landmarks = self._run(pose, frame, None)
+        if landmarks is None:
+            return None
+
+        box = self._box_from(landmarks, w, h)
+        if box is None:
+            self.roi = None
+        elif not self._keep(box):
+            self.roi = box
+        return landmarks
+
+    def draw(self, frame, color=(255, 200, 0)):
+        """Debug: outline the current crop"""
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            cv2.rectangle(frame, (x0, y0), (x1 - 1, y1 - 1), color, 1)
+        return frame
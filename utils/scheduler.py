@@ -0,0 +1,111 @@
+"""
+Adaptive inference cadence for live streams
+Instead of a fixed "process every Nth frame", the interval is derived from
+the measured processing cost and a per-frame compute budget, so a loaded box
+runs inference less often (and redraws the last overlay in between) rather
+than letting frames queue up.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveScheduler:
+    """
+    Decides per incoming frame whether to run inference
+
+    interval = ceil(processing cost / per-frame budget), clamped to
+    [min_interval, max_interval]. It rises as soon as the cost exceeds the
+    budget and falls one step at a time once the cost fits comfortably
+    (hysteresis) so the cadence does not flap.
+
+    Usage per frame:
+        if sched.should_process():
+            t = time.perf_counter(); run_inference(); sched.record(time.perf_counter() - t)
+        else:
+            redraw_last_overlay()
+
+    Args:
+        budget_ms: Compute budget per incoming frame (overrides target_fps)
+        target_fps: Nominal stream rate; budget = max_load / target_fps. Prefer this
+            over the measured period when frames may be dropped upstream, since
+            drops stretch the measured period and would inflate the budget.
+        max_load: Share of the frame period inference may use (the measured
+            arrival period stands in when neither budget_ms nor target_fps is given)
+        min_interval: Smallest cadence (1 = every frame)
+        max_interval: Largest cadence, so the overlay never goes too stale
+        alpha: EMA factor for the cost and frame-period estimates
+        hysteresis: Step down only when cost <= hysteresis x budget at the lower interval
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None, target_fps: Optional[float] = None,
+                 max_load: float = 0.8, min_interval: int = 1, max_interval: int = 10,
+                 alpha: float = 0.2, hysteresis: float = 0.85):
+        if budget_ms:
+            self.budget_s = budget_ms / 1000.0
+        elif target_fps:
+            self.budget_s = max_load / target_fps
+        else:
+            self.budget_s = None
+        self.max_load = max_load
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.reset()
+
+    def reset(self):
+        self.interval = self.min_interval
+        self.processed = 0
+        self.skipped = 0
+        self._cost: Optional[float] = None
+        self._period: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+        self._since = 0
+
+    def should_process(self, now: Optional[float] = None) -> bool:
+        """Call once per incoming frame (now: arrival time in seconds, perf_counter by default)"""
+        now = time.perf_counter() if now is None else now
+        if self._last_arrival is not None:
+            dt = now - self._last_arrival
+            if dt > 0:
+                self._period = dt if self._period is None else self._period + self.alpha * (dt - self._period)
+        self._last_arrival = now
+
+        self._since += 1
+        if self._since >= self.interval:
+            self._since = 0
+            self.processed += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def budget(self) -> Optional[float]:
+        """Per-frame compute budget in seconds (None until the frame period is known)"""
+        if self.budget_s is not None:
+            return self.budget_s
+        return self.max_load * self._period if self._period else None
+
+    def record(self, cost_s: float):
+        """Feed back the processing time of a frame that should_process() let through"""
+        self._cost = cost_s if self._cost is None else self._cost + self.alpha * (cost_s - self._cost)
+        budget = self.budget()
+        if not budget:
+            return
+        needed = min(self.max_interval, max(self.min_interval, math.ceil(self._cost / budget)))
+        if needed > self.interval:
+            self.interval = needed
+        elif needed < self.interval and self._cost <= (self.interval - 1) * budget * self.hysteresis:
+            self.interval -= 1
+
+    def stats(self) -> Dict[str, float]:
+        budget = self.budget()
+        return {
+            'interval': self.interval,
+            'cost_ms': round(self._cost * 1000.0, 2) if self._cost is not None else 0.0,
+            'budget_ms': round(budget * 1000.0, 2) if budget else 0.0,
+            'period_ms': round(self._period * 1000.0, 2) if self._period else 0.0,
+            'processed': self.processed,
+            'skipped': self.skipped,
+        }
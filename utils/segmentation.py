@@ -0,0 +1,177 @@
+"""
+Incremental rep segmentation over an angle time series
+One state machine for every exercise: hysteresis between a 'rest' threshold
+and an 'enter' threshold, the extreme (valley or peak) of each rep, and all
+timing - bottom holds, minimum time between reps - measured on timestamps
+rather than frame counts. Threshold crossings are interpolated between
+samples, so counts do not change with FPS, frame skipping or
+faster-than-realtime replay.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+IDLE, REST, ACTIVE, TURNED = 'idle', 'rest', 'active', 'turned'
+
+
+@dataclass
+class RepEvent:
+    n: int              # rep number (1-based)
+    t_start: float      # signal left the rest side
+    t_turn: float       # hold satisfied (the rep's bottom/top was reached)
+    t_end: float        # rep counted
+    extreme: float      # deepest valley / highest peak of the rep
+    t_extreme: float
+    hold_s: float       # time spent inside the hold range
+
+    @property
+    def duration(self) -> float:
+        return self.t_end - self.t_start
+
+
+def _time_inside(v0: float, v1: float, dt: float, lo: float, hi: float) -> float:
+    # Time a linear ramp from v0 to v1 over dt spends within [lo, hi]
+    if v0 == v1:
+        return dt if lo <= v0 <= hi else 0.0
+    a, b = (lo - v0) / (v1 - v0), (hi - v0) / (v1 - v0)
+    if a > b:
+        a, b = b, a
+    return max(0.0, min(1.0, b) - max(0.0, a)) * dt
+
+
+def _crossing(v0: float, t0: float, v1: float, t1: float, level: float) -> float:
+    # Interpolated time the ramp v0 -> v1 passes `level`
+    if v0 == v1:
+        return t1
+    s = (level - v0) / (v1 - v0)
+    return t0 + min(1.0, max(0.0, s)) * (t1 - t0)
+
+
+class RepSegmenter:
+    """
+    Args:
+        enter: Level the signal must pass to start a rep (below it for 'valley', above for 'peak')
+        rest: Level it must pass back to finish it (hysteresis: rest lies beyond enter, away from
+            the extreme)
+        mode: 'valley' (squat/push-up knee or elbow angle dips) or 'peak'
+        start: Level that arms the segmenter the first time (default `rest`); until then the
+            phase is 'idle', e.g. a push-up must begin with arms extended
+        min_hold_s: Time the signal must spend inside `hold_range` before the rep turns
+        hold_range: (lo, hi) counted towards the hold (default: everything beyond `enter`)
+        min_rep_s: Minimum time between two counted reps
+        count_at: 'rest' counts when the signal returns (squat, push-up, curl);
+            'turn' counts as soon as the extreme is held (a press counts at full extension)
+        max_gap_s: Samples further apart than this are not interpolated between
+            (the person was lost), only the newer one counts
+
+    update(value, t) returns a RepEvent when a rep is counted, else None.
+    """
+
+    def __init__(self, enter: float, rest: float, mode: str = 'valley', start: Optional[float] = None,
+                 min_hold_s: float = 0.0, hold_range: Optional[Tuple[float, float]] = None,
+                 min_rep_s: float = 0.0, count_at: str = 'rest', max_gap_s: float = 1.0):
+        if mode not in ('valley', 'peak'):
+            raise ValueError(f"Unknown mode {mode!r}")
+        if count_at not in ('rest', 'turn'):
+            raise ValueError(f"Unknown count_at {count_at!r}")
+        self.mode = mode
+        self._sign = 1.0 if mode == 'valley' else -1.0  # work in 'valley' orientation internally
+        self.enter = enter
+        self.rest = rest
+        self.start = rest if start is None else start
+        self.min_hold_s = min_hold_s
+        if hold_range is None:
+            hold_range = (float('-inf'), enter) if mode == 'valley' else (enter, float('inf'))
+        self.hold_range = hold_range
+        self.min_rep_s = min_rep_s
+        self.count_at = count_at
+        self.max_gap_s = max_gap_s
+        self.reset()
+
+    def reset(self):
+        self.phase = IDLE
+        self.reps = 0
+        self.last: Optional[RepEvent] = None
+        self._prev: Optional[Tuple[float, float, float]] = None  # (value, rest value, t)
+        self._t_start = self._t_turn = 0.0
+        self._hold = 0.0
+        self._extreme = self._t_extreme = 0.0
+        self._last_count_t = float('-inf')
+
+    # 'valley' orientation: smaller is deeper
+    def _beyond(self, value: float, level: float) -> bool:
+        return value * self._sign <= level * self._sign
+
+    def _deeper(self, a: float, b: float) -> bool:
+        return a * self._sign < b * self._sign
+
+    def update(self, value: Optional[float], t: float,
+               rest_value: Optional[float] = None) -> Optional[RepEvent]:
+        """
+        Feed one sample
+
+        Args:
+            value: Signal (degrees); None = not measured this frame
+            t: Sample time in seconds (media/capture time, not processing time)
+            rest_value: Signal tested against `rest` when it differs from the one tested
+                against `enter`, e.g. the less extended of two arms
+
+        Returns:
+            RepEvent if this sample completed a rep
+        """
+        if value is None:
+            self._prev = None  # nothing to interpolate across
+            return None
+        rest_value = value if rest_value is None else rest_value
+        prev = self._prev
+        if prev is not None and not (0.0 < t - prev[2] <= self.max_gap_s):
+            prev = None
+        self._prev = (value, rest_value, t)
+
+        if self.phase == IDLE:
+            if not self._beyond(rest_value, self.start):  # on the rest side of `start`
+                self.phase = REST
+            return None
+
+        lo, hi = self.hold_range
+        if self.phase == REST:
+            if not self._beyond(value, self.enter):
+                return None
+            self.phase = ACTIVE
+            self._t_start = _crossing(prev[0], prev[2], value, t, self.enter) if prev else t
+            # The part of this step already inside the hold range counts
+            self._hold = _time_inside(prev[0], value, t - prev[2], lo, hi) if prev else 0.0
+            self._extreme, self._t_extreme = value, t
+        else:
+            if self._deeper(value, self._extreme):
+                self._extreme, self._t_extreme = value, t
+            if self.phase == ACTIVE and prev is not None:
+                self._hold += _time_inside(prev[0], value, t - prev[2], lo, hi)
+
+        # ACTIVE / TURNED
+        if self.phase == ACTIVE and self._hold >= self.min_hold_s:
+            if self.count_at == 'rest':
+                self.phase = TURNED
+                self._t_turn = t
+            elif t - self._last_count_t >= self.min_rep_s:  # else stay active until allowed
+                self.phase = TURNED
+                self._t_turn = t
+                return self._count(t)
+
+        if not self._beyond(rest_value, self.rest):
+            # Back on the rest side
+            if self.phase == TURNED and self.count_at == 'rest':
+                t_end = _crossing(prev[1], prev[2], rest_value, t, self.rest) if prev else t
+                if t_end - self._last_count_t < self.min_rep_s:
+                    return None  # too soon after the previous rep: hold the turn until allowed
+                self.phase = REST
+                return self._count(t_end)
+            self.phase = REST  # came back without holding the bottom: not a rep
+        return None
+
+    def _count(self, t: float) -> RepEvent:
+        self.reps += 1
+        self._last_count_t = t
+        self.last = RepEvent(self.reps, self._t_start, self._t_turn, t, self._extreme,
+                             self._t_extreme, self._hold)
+        return self.last
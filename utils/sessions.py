@@ -0,0 +1,244 @@
+"""
+Per-connection session state for the WebRTC server
+Each connection gets its own evaluator and a MediaPipe Pose borrowed from a
+bounded pool, so concurrent users never share a rep counter or a tracker.
+Admission control rejects connections beyond max_sessions instead of letting
+every session slow down.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.clock import FrameClock
+from utils.preprocess import FramePreprocessor
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(RuntimeError):
+    """Raised by SessionManager.open() when the server is at capacity"""
+
+
+class PosePool:
+    """
+    Bounded pool of MediaPipe Pose graphs
+
+    Graphs are built lazily (or up front with warm()) and reused across
+    connections; reset() on checkout drops the previous user's tracking state.
+
+    Args:
+        factory: Zero-arg callable building a Pose
+        size: Maximum number of graphs alive at once
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int):
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def warm(self, n: Optional[int] = None):
+        """Build up to `n` (default: size) graphs now so first connections don't pay for it"""
+        for _ in range(min(self.size, n if n is not None else self.size) - self._created):
+            pose = self._create()
+            if pose is None:
+                break
+            self._idle.put(pose)
+
+    def _create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self.factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def acquire(self, timeout: float = 0.0):
+        """
+        Borrow a graph: an idle one, a new one while under `size`, or wait up to `timeout`
+
+        Returns:
+            Pose, or None if none became available in time
+        """
+        try:
+            pose = self._idle.get_nowait()
+        except queue.Empty:
+            pose = self._create()
+            if pose is not None:
+                return pose  # fresh graph, no tracking state to drop
+            if timeout <= 0:
+                return None
+            try:
+                pose = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        if hasattr(pose, 'reset'):
+            pose.reset()
+        return pose
+
+    def release(self, pose):
+        if self._closed:
+            self._discard(pose)
+        else:
+            self._idle.put(pose)
+
+    def _discard(self, pose):
+        with self._lock:
+            self._created -= 1
+        if hasattr(pose, 'close'):
+            pose.close()
+
+    def close(self):
+        """Close idle graphs now and borrowed ones as they are released"""
+        self._closed = True
+        while True:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pose)
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': self.size, 'created': self._created, 'idle': self._idle.qsize()}
+
+
+class Session:
+    """State owned by one connection: its evaluator, its Pose and its frame clock"""
+
+    def __init__(self, session_id: str, evaluator, pose):
+        self.id = session_id
+        self.evaluator = evaluator
+        self.pose = pose
+        self.opened = time.time()
+        self.frames = 0
+        self.clock = FrameClock()  # frame PTS -> evaluator time (wall clock when frames carry none)
+        self.closed = False
+        # (landmarks, result) of the last processed frame, re-drawn on skipped frames
+        self.last_overlay = None
+        self.roi = None  # optional utils.roi.RoiTracker for cropped inference
+        self.prep = FramePreprocessor()  # inference-side resize/RGB buffers
+        self.log = None  # optional utils.analytics.SessionLog of per-frame results
+
+    def tick(self, media_t: Optional[float] = None) -> float:
+        """Count a frame and return its evaluator time; clock.fps is the rate since the previous one"""
+        self.frames += 1
+        return self.clock.stamp(media_t)
+
+
+class SessionManager:
+    """
+    Opens/closes sessions with admission control
+
+    Args:
+        evaluator_factory: Zero-arg callable building a fresh evaluator per session
+        pose_factory: Zero-arg callable building a MediaPipe Pose
+        max_sessions: Concurrent sessions admitted; further open() calls raise SessionLimitError
+        pool_size: Pose graphs kept alive (default max_sessions)
+        acquire_timeout: Seconds open() waits for a graph when the pool is exhausted
+        roi_factory: Optional zero-arg callable giving each session its own RoiTracker
+        log_factory: Optional callable(session_id) giving each session its own SessionLog
+    """
+
+    def __init__(self, evaluator_factory: Callable[[], Any], pose_factory: Callable[[], Any],
+                 max_sessions: int = 4, pool_size: Optional[int] = None,
+                 acquire_timeout: float = 0.0, roi_factory: Optional[Callable[[], Any]] = None,
+                 log_factory: Optional[Callable[[str], Any]] = None):
+        self.evaluator_factory = evaluator_factory
+        self.roi_factory = roi_factory
+        self.log_factory = log_factory
+        self.max_sessions = max_sessions
+        self.acquire_timeout = acquire_timeout
+        self.pool = PosePool(pose_factory, pool_size or max_sessions)
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.admitted = 0
+        self.rejected = 0
+
+    def open(self, session_id: Optional[str] = None) -> Session:
+        """
+        Admit a new connection
+
+        Raises:
+            SessionLimitError: max_sessions reached, or no Pose graph available in time
+        """
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self.rejected += 1
+                raise SessionLimitError(f"Server busy: {self.max_sessions} sessions active")
+            session_id = session_id or f"s{next(self._ids)}"
+            if session_id in self._sessions:
+                raise ValueError(f"Session {session_id} is already open")
+            # Reserve the slot before the (possibly slow) graph checkout
+            self._sessions[session_id] = None
+
+        pose = None
+        try:
+            pose = self.pool.acquire(self.acquire_timeout)
+            if pose is None:
+                raise SessionLimitError("Server busy: no pose graph available")
+            session = Session(session_id, self.evaluator_factory(), pose)
+            if self.roi_factory is not None:
+                session.roi = self.roi_factory()
+            if self.log_factory is not None:
+                session.log = self.log_factory(session_id)
+        except BaseException:
+            if pose is not None:
+                self.pool.release(pose)
+            with self._lock:
+                self._sessions.pop(session_id, None)
+                self.rejected += 1
+            raise
+
+        with self._lock:
+            self._sessions[session_id] = session
+            self.admitted += 1
+        logger.info("Session %s opened (%d active)", session_id, len(self))
+        return session
+
+    def close(self, session: Session):
+        """Return the session's Pose to the pool; safe to call more than once"""
+        with self._lock:
+            if session.closed or self._sessions.get(session.id) is not session:
+                return
+            del self._sessions[session.id]
+            session.closed = True
+        self.pool.release(session.pose)
+        session.pose = None
+        if session.log is not None:
+            session.log.close()
+        logger.info("Session %s closed after %d frames (%d active)", session.id, session.frames, len(self))
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'active': len(self),
+            'max_sessions': self.max_sessions,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'pool': self.pool.stats(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            sessions = [s for s in self._sessions.values() if s is not None]
+        for session in sessions:
+            self.close(session)
+        self.pool.close()
@@ -0,0 +1,393 @@
+"""
+Shared-memory frame transport between processes
+Capture, pose inference and evaluation/render can run in separate processes
+without pickling frames: all of them map one SharedFrameRing (frames,
+landmarks, timestamps) and the queues between them carry slot indices only.
+A slot goes free -> captured (frame + time written) -> inferred (landmarks
+written) -> consumed -> free again, and belongs to exactly one process at a
+time, so the arrays need no locks.
+
+ProcessPipeline: desktop loop, capture and pose each in their own process.
+PoseProcess: pose in a child process for frames the caller already has
+(the WebRTC server), results delivered on a thread.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.landmark_cache import NUM_LANDMARKS, landmarks_to_array
+from utils.preprocess import fit_width
+
+_EOS = -1  # end of stream, passed along the index queues
+_POLL_S = 0.1  # queue waits wake up this often to check for a stop request
+
+# stats counters kept in the ring so every process can update its own
+_DECODED, _DROPPED, _INFERRED = range(3)
+
+RingSpec = Tuple[str, int, Tuple[int, int]]  # (shm name, slots, (h, w))
+
+
+def _align(n: int) -> int:
+    return (n + 63) & ~63
+
+
+class SharedFrameRing:
+    """
+    Ring of `slots` BGR frames of shape (h, w, 3) plus per-slot landmarks and times
+
+    Args:
+        slots: Number of frames in flight across all stages
+        shape: (h, w) of every frame
+        name: Attach to an existing ring with this name instead of creating one
+    """
+
+    def __init__(self, slots: int, shape: Tuple[int, int], name: Optional[str] = None):
+        h, w = shape
+        self.slots = slots
+        self.shape = (h, w)
+        layout = [('frames', np.uint8, (slots, h, w, 3)),
+                  ('landmarks', np.float32, (slots, NUM_LANDMARKS, 4)),
+                  ('t', np.float64, (slots,)),
+                  ('has_pose', np.bool_, (slots,)),
+                  ('counters', np.int64, (3,))]
+        offsets, size = [], 0
+        for _, dtype, dims in layout:
+            offsets.append(size)
+            size = _align(size + int(np.prod(dims)) * np.dtype(dtype).itemsize)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Children are spawned by the owner and share its resource tracker, which
+            # unlinks the block once, when the owner does (or exits)
+            self.shm = shared_memory.SharedMemory(name=name)
+        for (field, dtype, dims), offset in zip(layout, offsets):
+            setattr(self, field, np.ndarray(dims, dtype=dtype, buffer=self.shm.buf, offset=offset))
+        if self.owner:
+            self.counters[:] = 0
+
+    @property
+    def spec(self) -> RingSpec:
+        """What another process needs to attach: SharedFrameRing.attach(spec)"""
+        return self.shm.name, self.slots, self.shape
+
+    @classmethod
+    def attach(cls, spec: RingSpec) -> 'SharedFrameRing':
+        name, slots, shape = spec
+        return cls(slots, shape, name=name)
+
+    def landmarks_of(self, idx: int) -> Optional[np.ndarray]:
+        """(33, 4) view of a slot's landmarks, None if no pose was found"""
+        return self.landmarks[idx] if self.has_pose[idx] else None
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed; one a caller
+        # still holds keeps it mapped until that view is collected
+        for field in ('frames', 'landmarks', 't', 'has_pose', 'counters'):
+            setattr(self, field, None)
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _get(q, stop) -> Optional[int]:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_S)
+        except queue.Empty:
+            continue
+    return None
+
+
+# =========================
+# Child processes
+# =========================
+def _capture_main(src, width: int, live: bool, info_q, spec_q, free_q, out_q, stop):
+    """Decode (and resize) straight into ring slots; live sources drop frames when no slot is free"""
+    cap = cv2.VideoCapture(src)
+    ok, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ok:
+        info_q.put(None)
+        cap.release()
+        return
+    size = fit_width(frame.shape[1], frame.shape[0], width)
+    info_q.put((size[1], size[0], cap.get(cv2.CAP_PROP_FPS) or 0.0))
+    spec = _get(spec_q, stop)
+    if spec is None:
+        cap.release()
+        return
+    ring = SharedFrameRing.attach(spec)
+    try:
+        while ok and not stop.is_set():
+            t = time.perf_counter() if live else cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            ring.counters[_DECODED] += 1
+            if live:
+                try:
+                    idx = free_q.get_nowait()
+                except queue.Empty:
+                    idx = None  # every slot is busy: drop this frame, keep latency at one frame
+            else:
+                idx = _get(free_q, stop)
+                if idx is None:
+                    break
+            if idx is None:
+                ring.counters[_DROPPED] += 1
+            else:
+                dst = ring.frames[idx]
+                if frame.shape[:2] == dst.shape[:2]:
+                    np.copyto(dst, frame)
+                else:
+                    cv2.resize(frame, size, dst=dst)
+                ring.t[idx] = t
+                out_q.put(idx)
+            ok, frame = cap.read(frame)
+    finally:
+        out_q.put(_EOS)
+        cap.release()
+        ring.close()
+
+
+def _pose_main(pose_cfg, in_q, out_q, stop):
+    """Pose on ring slots: the first message is the ring spec, then slot indices"""
+    from utils.pose_backend import create_pose
+    from utils.preprocess import FramePreprocessor
+
+    pose = create_pose(pose_cfg)
+    prep = FramePreprocessor()
+    ring = None
+    try:
+        spec = _get(in_q, stop)
+        if spec is None or spec == _EOS:
+            out_q.put(_EOS)
+            return
+        ring = SharedFrameRing.attach(spec)
+        while True:
+            idx = _get(in_q, stop)
+            if idx is None or idx == _EOS:
+                out_q.put(_EOS)
+                return
+            res = pose.process(prep.rgb(ring.frames[idx]))
+            if res.pose_landmarks:
+                landmarks_to_array(res.pose_landmarks.landmark, out=ring.landmarks[idx])
+                ring.has_pose[idx] = True
+            else:
+                ring.has_pose[idx] = False
+            ring.counters[_INFERRED] += 1
+            out_q.put(idx)
+    finally:
+        pose.close()
+        if ring is not None:
+            ring.close()
+
+
+# =========================
+# Desktop: capture -> pose -> caller
+# =========================
+class ProcessPipeline:
+    """
+    Capture and pose inference in two child processes, frames in shared memory
+
+    Args:
+        src: cv2.VideoCapture source
+        pose_cfg: utils.pose_backend.PoseConfig for the pose process
+        width: Frames are resized to this width in the capture process
+        live: Drop frames when the pipeline is full (default: cameras and URLs)
+        slots: Frames in flight (capture, pose and caller each hold at most one
+            at a time; extra slots let files queue up)
+
+    read() returns a view into the ring that stays valid until the next read().
+    """
+
+    def __init__(self, src, pose_cfg, width: int = 960, live: Optional[bool] = None,
+                 slots: Optional[int] = None):
+        from utils.capture import _is_live
+        self.live = _is_live(src) if live is None else live
+        self.slots = slots or (3 if self.live else 6)
+        ctx = multiprocessing.get_context('spawn')  # MediaPipe and decoders do not survive fork()
+        self._stop = ctx.Event()
+        self._info_q, self._spec_q = ctx.Queue(), ctx.Queue()
+        self._free_q, self._captured_q, self._inferred_q = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        self._procs = [
+            ctx.Process(target=_capture_main, name='capture', daemon=True,
+                        args=(src, width, self.live, self._info_q, self._spec_q, self._free_q,
+                              self._captured_q, self._stop)),
+            ctx.Process(target=_pose_main, name='pose', daemon=True,
+                        args=(pose_cfg, self._captured_q, self._inferred_q, self._stop)),
+        ]
+        for p in self._procs:
+            p.start()
+        self.ring: Optional[SharedFrameRing] = None
+        self.fps = 0.0
+        self.delivered = 0
+        self._held: Optional[int] = None
+        self._eof = False
+
+    def open(self, timeout: float = 30.0) -> bool:
+        """Wait for the first frame's size and set up the ring; False if the source did not open"""
+        try:
+            info = self._info_q.get(timeout=timeout)
+        except queue.Empty:
+            info = None
+        if info is None:
+            self._eof = True
+            self._captured_q.put(_EOS)
+            return False
+        h, w, self.fps = info
+        self.ring = SharedFrameRing(self.slots, (h, w))
+        self._captured_q.put(self.ring.spec)  # the pose process attaches first...
+        self._spec_q.put(self.ring.spec)      # ...then capture starts filling slots
+        for idx in range(self.slots):
+            self._free_q.put(idx)
+        return True
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], Optional[np.ndarray], float]:
+        """
+        Next inferred frame
+
+        Returns:
+            (ok, BGR frame view, (33, 4) landmarks or None, frame time in seconds)
+        """
+        if self._held is not None:
+            self._free_q.put(self._held)
+            self._held = None
+        if self._eof or self.ring is None:
+            return False, None, None, 0.0
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            try:
+                idx = self._inferred_q.get(timeout=_POLL_S)
+                break
+            except queue.Empty:
+                if deadline is not None and time.perf_counter() > deadline:
+                    return False, None, None, 0.0
+                if not all(p.is_alive() for p in self._procs):
+                    if self._inferred_q.empty():
+                        self._eof = True
+                        return False, None, None, 0.0
+        if idx == _EOS:
+            self._eof = True
+            return False, None, None, 0.0
+        self._held = idx
+        self.delivered += 1
+        ring = self.ring
+        return True, ring.frames[idx], ring.landmarks_of(idx), float(ring.t[idx])
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self.ring.counters.tolist() if self.ring is not None else [0, 0, 0]
+        return {'slots': self.slots, 'decoded': counters[_DECODED], 'dropped': counters[_DROPPED],
+                'inferred': counters[_INFERRED], 'delivered': self.delivered}
+
+    def close(self):
+        self._stop.set()
+        for p in self._procs:
+            p.join(2.0)
+            if p.is_alive():
+                p.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =========================
+# Server: caller's frames -> pose process -> callback
+# =========================
+class PoseProcess:
+    """
+    Pose inference for one stream in a child process
+
+    submit() copies a frame into a free ring slot and returns at once (False,
+    and the frame is dropped, when every slot is still in flight). Results
+    arrive on a thread as on_result(frame view, landmarks (33, 4) or None, t);
+    the slot is recycled when the callback returns.
+
+    Args:
+        pose_cfg: utils.pose_backend.PoseConfig
+        on_result: Callback run on the result thread
+        slots: Frames in flight
+    """
+
+    def __init__(self, pose_cfg, on_result: Callable[[np.ndarray, Optional[np.ndarray], Any], None],
+                 slots: int = 3, name: str = 'pose-process'):
+        ctx = multiprocessing.get_context('spawn')
+        self.on_result = on_result
+        self.slots = slots
+        self._stop = ctx.Event()
+        self._in_q, self._out_q = ctx.Queue(), ctx.Queue()
+        self._proc = ctx.Process(target=_pose_main, name=name, daemon=True,
+                                 args=(pose_cfg, self._in_q, self._out_q, self._stop))
+        self._proc.start()  # the model loads while the first frame is on its way
+        self.ring: Optional[SharedFrameRing] = None
+        self._free: deque = deque()
+        self._lock = threading.Lock()
+        self._times: Dict[int, Any] = {}
+        self.submitted = self.dropped = self.processed = 0
+        self._thread = threading.Thread(target=self._collect, name=f"{name}-results", daemon=True)
+
+    def submit(self, img: np.ndarray, t: Any = None) -> bool:
+        with self._lock:
+            if self.ring is None:
+                self.ring = SharedFrameRing(self.slots, img.shape[:2])
+                self._free.extend(range(self.slots))
+                self._in_q.put(self.ring.spec)
+                self._thread.start()
+            if not self._free:
+                self.dropped += 1
+                return False
+            idx = self._free.popleft()
+        dst = self.ring.frames[idx]
+        if img.shape == dst.shape:
+            np.copyto(dst, img)
+        else:  # the stream changed resolution: keep the ring, scale into it
+            cv2.resize(img, (dst.shape[1], dst.shape[0]), dst=dst)
+        self._times[idx] = t
+        self.submitted += 1
+        self._in_q.put(idx)
+        return True
+
+    def _collect(self):
+        while True:
+            idx = _get(self._out_q, self._stop)
+            if idx is None or idx == _EOS:
+                return
+            try:
+                self.on_result(self.ring.frames[idx], self.ring.landmarks_of(idx), self._times.pop(idx, None))
+            finally:
+                self.processed += 1
+                with self._lock:
+                    self._free.append(idx)
+
+    def alive(self) -> bool:
+        return self._proc.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'slots': self.slots, 'submitted': self.submitted, 'processed': self.processed,
+                'dropped': self.dropped}
+
+    def close(self, timeout: float = 2.0):
+        self._in_q.put(_EOS)
+        self._proc.join(timeout)
+        self._stop.set()
+        if self._proc.is_alive():
+            self._proc.terminate()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -0,0 +1,88 @@
+"""
+Startup timing report
+Records how long the process spends getting to its first frame - interpreter
+start, imports, pose model load - so regressions in launch time show up as
+numbers instead of a feeling. Import this module first thing; marks are
+cheap and recorded unconditionally, printing is opt-in.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_T0 = time.perf_counter()
+
+
+def _process_age() -> Optional[float]:
+    # Seconds since the OS started this process (Linux only); covers interpreter start-up
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_BOOT = _process_age()  # interpreter start -> this module imported
+_stages: List[Tuple[str, float, float]] = []  # (name, start, end) in perf_counter seconds
+_seen = set()
+
+
+def _last_end() -> float:
+    return _stages[-1][2] if _stages else _T0
+
+
+def mark(name: str):
+    """Record that `name` finished now; it is taken to have started at the previous stage's end"""
+    _stages.append((name, _last_end(), time.perf_counter()))
+
+
+def once(name: str):
+    """mark() only the first time `name` is seen, e.g. 'first frame' in a loop"""
+    if name not in _seen:
+        _seen.add(name)
+        mark(name)
+
+
+@contextmanager
+def timed(name: str, first_only: bool = True):
+    """Time the enclosed block exactly (by default only its first run, e.g. the first model load)"""
+    if first_only and name in _seen:
+        yield
+        return
+    _seen.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages.append((name, start, time.perf_counter()))
+
+
+def report() -> Dict[str, object]:
+    """Stage durations in ms, in order, plus the total since the process started"""
+    stages = {}
+    if _BOOT is not None:
+        stages['interpreter'] = round(_BOOT * 1000.0, 1)
+    for name, start, end in _stages:
+        stages[name] = round((end - start) * 1000.0, 1)
+    return {
+        'stages_ms': stages,
+        'total_ms': round(((_BOOT or 0.0) + max([_T0] + [e for _, _, e in _stages]) - _T0) * 1000.0, 1),
+    }
+
+
+def print_report(stream=None):
+    stream = stream or sys.stderr
+    r = report()
+    print("Startup:", file=stream)
+    for name, ms in r['stages_ms'].items():
+        print(f"  {name:<16}{ms:>9.1f} ms", file=stream)
+    print(f"  {'total':<16}{r['total_ms']:>9.1f} ms", file=stream)
+
+
+def enabled() -> bool:
+    return os.environ.get('STARTUP_REPORT', '0') != '0'
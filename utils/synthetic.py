@@ -0,0 +1,160 @@
+"""
+Synthetic pose landmark sequences with known rep counts
+Stick-figure kinematics for each exercise, used by the benchmarks
+(and anywhere a deterministic stand-in for MediaPipe output is needed).
+"""
+
+import math
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+# Landmarks are generated in pixel space at this size and stored normalised,
+# so evaluators must be given frames of the same size to see the same angles.
+FRAME_SIZE = (960, 540)  # (width, height)
+
+NUM_LANDMARKS = 33
+VISIBILITY = 0.95
+
+
+def _blank(visibility: float = VISIBILITY) -> np.ndarray:
+    pts = np.zeros((NUM_LANDMARKS, 4), dtype=np.float64)
+    pts[:, 3] = visibility
+    return pts
+
+
+def _finish(pts: np.ndarray) -> np.ndarray:
+    # Face follows the shoulders, hands follow the wrists, feet follow the ankles
+    mid_sh = (pts[11, :2] + pts[12, :2]) / 2.0
+    pts[0, :2] = mid_sh + (0.0, -60.0)
+    for i in range(1, 11):
+        pts[i, :2] = pts[0, :2] + ((i - 5.5) * 4.0, -8.0 if i <= 8 else 12.0)
+    for i in (17, 19, 21):
+        pts[i, :2] = pts[15, :2]
+    for i in (18, 20, 22):
+        pts[i, :2] = pts[16, :2]
+    pts[29, :2] = pts[31, :2] = pts[27, :2]
+    pts[30, :2] = pts[32, :2] = pts[28, :2]
+    return pts
+
+
+def _squat(p: float) -> np.ndarray:
+    # Knee angle 175 deg standing -> 85 deg at the bottom (inside the 70-100 green zone)
+    pts = _blank()
+    knee = 175.0 - 90.0 * p
+    tilt = math.radians((180.0 - knee) / 2.0)
+    for side, x in ((0, 445.0), (1, 515.0)):
+        ankle = np.array([x, 500.0])
+        knee_pt = ankle + 110.0 * np.array([math.sin(tilt), -math.cos(tilt)])
+        hip = knee_pt + 110.0 * np.array([-math.sin(tilt), -math.cos(tilt)])
+        shoulder = hip + (0.0, -150.0)
+        pts[27 + side, :2] = ankle
+        pts[25 + side, :2] = knee_pt
+        pts[23 + side, :2] = hip
+        pts[11 + side, :2] = shoulder
+        pts[13 + side, :2] = shoulder + (0.0, 70.0)
+        pts[15 + side, :2] = shoulder + (0.0, 140.0)
+    return _finish(pts)
+
+
+def _pushup(p: float) -> np.ndarray:
+    # Elbow angle 170 deg (arms extended) -> 80 deg at the bottom
+    pts = _blank()
+    elbow = math.radians(170.0 - 90.0 * p)
+    arm = 80.0
+    reach = 2.0 * arm * math.sin(elbow / 2.0)  # shoulder-wrist distance
+    for side, dx in ((0, 0.0), (1, 20.0)):
+        wrist = np.array([400.0 + dx, 450.0])
+        shoulder = wrist + (0.0, -reach)
+        pts[15 + side, :2] = wrist
+        pts[11 + side, :2] = shoulder
+        pts[13 + side, :2] = (wrist + shoulder) / 2.0 + (arm * math.cos(elbow / 2.0), 0.0)
+        pts[23 + side, :2] = shoulder + (200.0, 10.0)
+        pts[25 + side, :2] = shoulder + (320.0, 20.0)
+        pts[27 + side, :2] = shoulder + (440.0, 30.0)
+    return _finish(pts)
+
+
+def _press(p: float) -> np.ndarray:
+    # Standing straight; shoulder-hip-wrist angle 25 deg -> 135 deg at full press
+    pts = _blank()
+    chest = math.radians(25.0 + 110.0 * p)
+    for side, dx in ((0, 0.0), (1, 1.0)):
+        hip = np.array([480.0 + dx, 330.0])
+        shoulder = hip + (0.0, -160.0)
+        wrist = hip + 200.0 * np.array([math.sin(chest), -math.cos(chest)])
+        pts[23 + side, :2] = hip
+        pts[25 + side, :2] = hip + (0.0, 100.0)
+        pts[27 + side, :2] = hip + (0.0, 190.0)
+        pts[11 + side, :2] = shoulder
+        pts[15 + side, :2] = wrist
+        pts[13 + side, :2] = ((shoulder[0] + wrist[0]) / 2.0, shoulder[1])  # elbow at shoulder height
+    return _finish(pts)
+
+
+def _curl(p: float) -> np.ndarray:
+    # Elbow angle 170 deg (extended) -> 15 deg (curled), both arms together
+    pts = _blank()
+    bend = math.radians(180.0 - (170.0 - 155.0 * p))
+    for side, x, sign in ((0, 430.0, -1.0), (1, 530.0, 1.0)):
+        shoulder = np.array([x, 150.0])
+        elbow = shoulder + (0.0, 100.0)
+        wrist = elbow + 90.0 * np.array([sign * math.sin(bend), math.cos(bend)])
+        pts[11 + side, :2] = shoulder
+        pts[13 + side, :2] = elbow
+        pts[15 + side, :2] = wrist
+        pts[23 + side, :2] = shoulder + (15.0 * -sign, 160.0)
+        pts[25 + side, :2] = pts[23 + side, :2] + (0.0, 110.0)
+        pts[27 + side, :2] = pts[25 + side, :2] + (0.0, 110.0)
+    return _finish(pts)
+
+
+POSES: Dict[str, Callable[[float], np.ndarray]] = {
+    'squat': _squat,
+    'pushup': _pushup,
+    'press': _press,
+    'curl': _curl,
+}
+
+
+def synthetic_session(exercise: str, reps: int = 10, fps: float = 30.0,
+                      rep_seconds: float = 2.0, rest_seconds: float = 0.5,
+                      noise_px: float = 0.0, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate a session of `reps` clean repetitions
+
+    Each rep follows a raised-cosine trajectory from the start position to
+    the bottom/top and back, separated by rests in the start position.
+
+    Args:
+        exercise: Key of POSES
+        reps: Number of repetitions (the ground truth count)
+        fps: Frame rate of the generated timestamps
+        rep_seconds: Duration of one repetition
+        rest_seconds: Rest before the first and after every repetition
+        noise_px: Std-dev of Gaussian jitter added to every landmark, in pixels
+        seed: RNG seed for the jitter
+
+    Returns:
+        (landmarks (N, 33, 4) float32 normalised to FRAME_SIZE, timestamps_ms (N,))
+    """
+    pose_at = POSES[exercise]
+    rest = int(round(rest_seconds * fps))
+    rep = max(2, int(round(rep_seconds * fps)))
+    phases = [0.0] * rest
+    for _ in range(reps):
+        phases.extend((1.0 - math.cos(2.0 * math.pi * i / rep)) / 2.0 for i in range(rep))
+        phases.extend([0.0] * rest)
+
+    w, h = FRAME_SIZE
+    out = np.empty((len(phases), NUM_LANDMARKS, 4), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    for i, p in enumerate(phases):
+        pts = pose_at(p)
+        if noise_px:
+            pts[:, :2] += rng.normal(0.0, noise_px, size=(NUM_LANDMARKS, 2))
+        pts[:, 0] /= w
+        pts[:, 1] /= h
+        out[i] = pts
+    timestamps_ms = np.arange(len(phases), dtype=np.float64) * (1000.0 / fps)
+    return out, timestamps_ms
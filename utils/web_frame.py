@@ -0,0 +1,132 @@
+"""
+Per-session WebRTC frame processing
+Decode, infer, evaluate and draw one browser frame with the Pose and
+evaluator of a utils.sessions.Session. Nothing here depends on the
+exercise: the session's evaluator does the exercise-specific work, so the
+same helpers serve the Streamlit server, the pose-process path and
+benchmarks/load_test.py.
+"""
+
+from typing import Dict, Tuple
+
+import av
+import cv2
+import numpy as np
+
+from exercises.base import EvalResult
+from utils.preprocess import av_to_ndarray, fit_width
+from utils.profiling import get_profiler
+
+
+def decode_web_frame(session, frame: av.VideoFrame, width=640) -> np.ndarray:
+    """
+    BGR array of a WebRTC frame, unpacked and scaled to `width` in one pass
+
+    Sessions with an ROI tracker get the full-resolution frame: the crop is
+    taken from the camera image, not the resized view.
+    """
+    return av_to_ndarray(frame, None if session.roi is not None else width)
+
+
+def infer_web_frame(session, img, profiler=None, width=640, t=None) -> Tuple[np.ndarray, Dict]:
+    """
+    Pose + evaluation for one session, no drawing
+
+    Publishes (landmarks, EvalResult) as session.last_overlay for draw_web_overlay().
+    Safe to run on a worker thread while another thread draws the previous overlay:
+    the tuple is replaced whole, never mutated, and drawing only reads it.
+
+    Args:
+        session: utils.sessions.Session
+        img: BGR frame
+        profiler: Optional StageProfiler (resize/convert/pose/evaluate marks)
+        width: Processing width
+        t: The frame's media time in seconds (utils.clock.av_frame_time); None = wall clock
+
+    Returns:
+        (resized BGR frame, metrics dict with reps/feedback/fps)
+    """
+    prof = get_profiler(profiler)
+
+    # Resize for performance (a no-op for frames from decode_web_frame)
+    raw = img
+    img = session.prep.resize_width(img, width)
+    prof.mark('resize')
+
+    if session.roi is not None:
+        # Tracked person crop of the camera frame; landmarks come back full-frame normalised
+        landmarks = session.roi.process(session.pose, raw)
+    else:
+        rgb = session.prep.rgb(img)
+        prof.mark('convert')
+        results = session.pose.process(rgb)
+        landmarks = results.pose_landmarks.landmark if results.pose_landmarks else None
+    prof.mark('pose')
+
+    return img, evaluate_web_landmarks(session, img.shape[1], img.shape[0], landmarks, t, prof)
+
+
+def evaluate_web_landmarks(session, w, h, landmarks, t=None, profiler=None) -> Dict:
+    """
+    Evaluation half of infer_web_frame(), for landmarks inferred elsewhere
+    (e.g. a utils.shm_ring.PoseProcess); w, h is the processed frame size
+
+    Returns:
+        metrics dict with reps/feedback/fps
+    """
+    evaluator = session.evaluator
+    t = session.tick(t)
+    fps = session.clock.fps
+    if fps:
+        evaluator.update_fps(fps)
+
+    if landmarks is not None:
+        evaluator.frame_size = (w, h)
+        result = evaluator.update(landmarks, t)
+        if session.log is not None:
+            session.log.append(result)
+        feedback = result.feedback
+    else:
+        result = evaluator.update(None, t)
+        feedback = "Awaiting pose detection..."
+    session.last_overlay = (landmarks, result)
+    get_profiler(profiler).mark('evaluate')
+    return {"reps": result.reps, "feedback": feedback, "fps": fps}
+
+
+def draw_web_overlay(session, img) -> np.ndarray:
+    """
+    Render the session's latest (landmarks, EvalResult) onto an already resized frame
+
+    Reads only that snapshot (and the evaluator's drawing resources), never the
+    evaluator's live state, so it may run while another thread evaluates.
+    """
+    overlay = session.last_overlay
+    if overlay is None:  # nothing evaluated yet
+        overlay = (None, EvalResult(visible=False, good=False))
+    landmarks, result = overlay
+    if landmarks is None:
+        return session.evaluator.render_missing(img, result)
+    return session.evaluator.render(img, landmarks, result)
+
+
+def process_web_frame(session, img, profiler=None, width=640, t=None) -> Tuple[np.ndarray, Dict]:
+    """One WebRTC frame for one session, synchronously: infer_web_frame() + draw_web_overlay()"""
+    img, metrics = infer_web_frame(session, img, profiler, width, t)
+    img = draw_web_overlay(session, img)
+    get_profiler(profiler).mark('render')
+    return img, metrics
+
+
+def redraw_web_frame(session, img, width=640) -> np.ndarray:
+    """
+    Frame without fresh inference: draw the last overlay on it instead of passing it through raw
+
+    The overlay is held, not extrapolated: its joint lines and panel come from the
+    last EvalResult, so moving only the skeleton would pull the two apart.
+    """
+    h, w = img.shape[:2]
+    size = fit_width(w, h, width)
+    if size != (w, h):
+        img = cv2.resize(img, size)
+    return draw_web_overlay(session, img)